@@ -0,0 +1,131 @@
+"""IngestFilter と従来の判定（BlueskyDB.is_japanese）の比較ベンチマーク。
+
+フィクスチャの投稿（作成）を使って次を測る。
+
+1. デフォルトのルール（日本語）: IngestFilter.match と is_japanese の texts/s と一致件数（同じになること）
+2. 複数ルール（langs・dids・scripts・keywords の 6 ルール、キーワード 200 語）:
+   IngestFilter.match と、キーワードごとに re.search する素朴な実装、(?i:...) の 1 本の選言との比較
+3. 生フレームの判定: IngestFilter.raw_match と、段階フィルタ導入時の判定（"ja" タグかかなを含むか）
+
+    python benchmarks/bench_filter.py [--repeat 10]
+"""
+
+import argparse
+import json
+import random
+import re
+import time
+
+from fixture import load_frames
+from mcpbluesky.bluesky_db import BlueskyDB
+from mcpbluesky.ingest_filter import IngestFilter
+from mcpbluesky.jetstream import POST_COLLECTION, _raw_collection
+
+_KANA_RE = re.compile(r"[぀-ゟ゠-ヿ]")
+
+
+def multi_rules(posts):
+    """6 ルール。キーワードは本文に出る語を少し含む 200 語（大半は一致しない）。"""
+    rng = random.Random(1)
+    words = ["bluesky", "photo", "festa", "ラーメン", "atproto", "猫"]
+    words += [f"{rng.choice(['tag', 'news', 'topic', 'event'])}{i}" for i in range(194)]
+    dids = [did for did, _, _ in rng.sample(posts, 100)]
+    return [
+        {"name": "ko", "langs": ["ko"]},
+        {"name": "hangul", "scripts": ["hangul"]},
+        {"name": "thai", "scripts": ["thai", "U+0E80-U+0EFF"]},
+        {"name": "topics", "keywords": words[:100]},
+        {"name": "more", "keywords": words[100:]},
+        {"name": "watch", "dids": dids},
+    ], words, dids
+
+
+def naive_matcher(words, dids):
+    """ルールごと・キーワードごとに本文を走査する素朴な実装。"""
+    patterns = [re.compile(re.escape(w), re.IGNORECASE) for w in words]
+    hangul = re.compile(r"[ᄀ-ᇿ㄰-㆏가-힯]")
+    thai = re.compile(r"[฀-๿຀-໿]")
+    did_set = set(dids)
+
+    def match(did, text, langs):
+        if did in did_set:
+            return True
+        if langs and any(lang.lower().split("-")[0] == "ko" for lang in langs):
+            return True
+        if hangul.search(text) or thai.search(text):
+            return True
+        return any(p.search(text) for p in patterns)
+
+    return match
+
+
+def alternation_matcher(words, dids):
+    """キーワードを (?i:a|b|...) の 1 本の正規表現にまとめた実装（trie 化なし）。"""
+    keywords = re.compile("(?i:" + "|".join(re.escape(w) for w in words) + ")")
+    scripts = re.compile(r"[ᄀ-ᇿ㄰-㆏가-힯฀-๿຀-໿]")
+    did_set = set(dids)
+
+    def match(did, text, langs):
+        if did in did_set:
+            return True
+        if langs and any(lang.lower().split("-")[0] == "ko" for lang in langs):
+            return True
+        return bool(scripts.search(text) or keywords.search(text))
+
+    return match
+
+
+def rate(fn, items):
+    t0 = time.perf_counter()
+    kept = sum(1 for item in items if fn(*item))
+    return len(items) / (time.perf_counter() - t0), kept
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10, help="フィクスチャを繰り返す回数（デフォルト 10）")
+    args = parser.parse_args()
+
+    frames = load_frames()
+    posts = []
+    for frame in frames:
+        data = json.loads(frame)
+        commit = data.get("commit") or {}
+        if commit.get("collection") == POST_COLLECTION and commit.get("operation") == "create":
+            record = commit["record"]
+            posts.append((data["did"], record.get("text", ""), record.get("langs")))
+    posts *= args.repeat
+    print(f"{len(posts)} post texts, {len(frames) * args.repeat} frames")
+
+    print("1. default rules (Japanese)")
+    default = IngestFilter()
+    for name, fn in (
+        ("is_japanese", lambda did, text, langs: BlueskyDB.is_japanese(None, text, langs)),
+        ("IngestFilter", lambda did, text, langs: default.match(did, text, langs) is not None),
+    ):
+        r, kept = rate(fn, posts)
+        print(f"   {name:24}{r:12,.0f} texts/s  kept {kept}")
+
+    rules, words, dids = multi_rules(posts)
+    print(f"2. {len(rules)} rules, {len(words)} keywords, {len(dids)} dids")
+    compiled = IngestFilter(rules)
+    for name, fn in (
+        ("regex per keyword", naive_matcher(words, dids)),
+        ("(?i:...) alternation", alternation_matcher(words, dids)),
+        ("IngestFilter", lambda did, text, langs: compiled.match(did, text, langs) is not None),
+    ):
+        r, kept = rate(fn, posts)
+        print(f"   {name:24}{r:12,.0f} texts/s  kept {kept}")
+
+    raw_posts = [(f,) for f in frames if _raw_collection(f) == POST_COLLECTION] * args.repeat
+    print(f"3. raw post frames ({len(raw_posts)})")
+    for name, fn in (
+        ('"ja" or kana', lambda raw: '"ja"' in raw or _KANA_RE.search(raw) is not None),
+        ("IngestFilter.raw_match", default.raw_match),
+    ):
+        r, kept = rate(fn, raw_posts)
+        print(f"   {name:24}{r:12,.0f} frames/s  kept {kept}")
+
+
+if __name__ == "__main__":
+    main()
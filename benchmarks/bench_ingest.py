@@ -0,0 +1,95 @@
+"""Jetstream 取り込みループの messages/sec ベンチマーク（フィクスチャを JetstreamListener.handle_message に流す）。
+
+比較するもの:
+
+- baseline: 段階フィルタ導入前のループ（全フレームを json.loads し、
+  投稿の作成なら langs に "ja" があるか本文にかなを含むかを判定する）
+- no-prefilter: 生フレームの判定を省き、デコード（orjson があれば使う）と分類だけ行う
+- prefilter: 生フレームの部分文字列判定で大半を落としてからデコードする（デフォルト）
+
+保存は行わず件数だけ数える。段階ごとの破棄件数と所要時間（bsky_ingest_stats と同じ値）も表示する。
+
+    python benchmarks/bench_ingest.py [--repeat 10] [--stdlib-json]
+"""
+
+import argparse
+import json
+import re
+import time
+
+from fixture import load_frames
+from mcpbluesky import jetstream
+from mcpbluesky.jetstream import JetstreamListener
+
+
+class NullDB:
+    def __init__(self):
+        self.posts = 0
+
+    def save_jetstream_cursor(self, time_us):
+        pass
+
+    def insert_post(self, post):
+        self.posts += 1
+
+    def apply_record_event(self, *args, **kwargs):
+        return True
+
+
+def baseline(frames):
+    """段階フィルタ導入前の判定（is_japanese は呼び出しごとに re.search でパターンを引いていた）。"""
+    kept = 0
+    for message in frames:
+        data = json.loads(message)
+        if data.get("kind") != "commit":
+            continue
+        commit = data.get("commit", {})
+        if commit.get("operation") != "create" or commit.get("collection") != "app.bsky.feed.post":
+            continue
+        record = commit.get("record", {})
+        langs = record.get("langs") or []
+        text = record.get("text", "")
+        if "ja" in langs or (text and re.search(r"[぀-ゟ゠-ヿ]", text)):
+            kept += 1
+    return kept
+
+
+def listener_pass(frames, prefilter):
+    db = NullDB()
+    listener = JetstreamListener(db, prefilter=prefilter)
+    for message in frames:
+        listener.handle_message(message)
+    return db.posts, listener.stats
+
+
+def measure(fn, frames, *args):
+    t0 = time.perf_counter()
+    result = fn(frames, *args)
+    return len(frames) / (time.perf_counter() - t0), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10, help="フィクスチャを繰り返す回数（デフォルト 10）")
+    parser.add_argument("--stdlib-json", action="store_true", help="orjson があっても標準の json でデコードする")
+    args = parser.parse_args()
+    if args.stdlib_json:
+        jetstream._json_loads = json.loads
+
+    frames = load_frames() * args.repeat
+    decoder = "orjson" if jetstream._json_loads is not json.loads else "json"
+    print(f"{len(frames)} messages, decoder: {decoder}")
+
+    rate, kept = measure(baseline, frames)
+    print(f"{'baseline':14}{rate:12,.0f} msgs/s  kept {kept}")
+    for name, prefilter in (("no-prefilter", False), ("prefilter", True)):
+        rate, (kept, stats) = measure(listener_pass, frames, prefilter)
+        print(f"{name:14}{rate:12,.0f} msgs/s  kept {kept}")
+        for key in ("dropped_prefilter", "dropped_decoded", "dropped_classifier"):
+            print(f"    {key:20}{stats[key]:>10,}")
+        for key in ("prefilter_seconds", "decode_seconds", "classify_seconds"):
+            print(f"    {key:20}{stats[key]:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Jetstream の圧縮モード（compress=true）と非圧縮モードの比較ベンチマーク。
+
+別プロセスの WebSocket スタンドインがフィクスチャのフレームを送り、JetstreamListener.run() で受信する。
+圧縮モードでは Jetstream と同じく 1 フレームずつ共有辞書付きで zstd 圧縮して送る。
+Jetstream が公開している zstd_dictionary はリポジトリに含まれないので、
+フィクスチャの先頭 --train 件から辞書を学習し、残りのフレームを送る。
+
+モードごとに、1 メッセージあたりのワイヤ上のバイト数（WebSocket のペイロード）と、
+受信側プロセスの CPU 時間（解凍を含む）を表示する。値は bsky_ingest_stats と同じ統計から取るので、
+非圧縮モードのバイト数はテキストフレームの文字数（日本語などを含む分だけ実際より小さい）。
+
+    python benchmarks/bench_zstd.py [--repeat 5] [--train 2000]
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import time
+import urllib.parse
+
+import zstandard
+from websockets.asyncio.server import serve
+
+from fixture import load_frames
+from mcpbluesky.jetstream import JetstreamListener
+
+
+class NullDB:
+    """保存せずに件数だけ数える BlueskyDB の代わり（受信・フィルタの CPU だけを測る）。"""
+
+    def __init__(self):
+        self.posts = 0
+        self.records = 0
+
+    def get_jetstream_cursor(self):
+        return None
+
+    def save_jetstream_cursor(self, time_us):
+        pass
+
+    def insert_post(self, post):
+        self.posts += 1
+
+    def apply_record_event(self, *args, **kwargs):
+        self.records += 1
+        return True
+
+
+def _serve(frames, dict_path, repeat, port_queue):
+    """スタンドイン: 接続ごとに frames を repeat 回送り、クライアントが切るまで待つ。"""
+    with open(dict_path, "rb") as f:
+        cctx = zstandard.ZstdCompressor(dict_data=zstandard.ZstdCompressionDict(f.read()))
+    payloads = {
+        False: list(frames),
+        True: [cctx.compress(frame.encode("utf-8")) for frame in frames],
+    }
+
+    async def handler(ws):
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(ws.request.path).query)
+        compressed = query.get("compress") == ["true"]
+        for _ in range(repeat):
+            for payload in payloads[compressed]:
+                await ws.send(payload)
+        await ws.wait_closed()
+
+    async def main():
+        async with serve(handler, "127.0.0.1", 0, max_size=None) as server:
+            port_queue.put(server.sockets[0].getsockname()[1])
+            await asyncio.Future()
+
+    asyncio.run(main())
+
+
+async def _receive(endpoint, compress, dict_path, expected):
+    db = NullDB()
+    listener = JetstreamListener(
+        db,
+        endpoint=endpoint,
+        compress=compress,
+        zstd_dict_path=dict_path,
+        collections=["app.bsky.feed.post", "app.bsky.feed.like", "app.bsky.feed.repost", "app.bsky.graph.follow"],
+    )
+    task = asyncio.ensure_future(listener.run())
+    wall0, cpu0 = time.perf_counter(), time.process_time()
+    while listener.stats["messages"] < expected:
+        await asyncio.sleep(0.01)
+        if task.done():
+            task.result()
+    wall, cpu = time.perf_counter() - wall0, time.process_time() - cpu0
+    task.cancel()
+    stats = listener.stats
+    n = stats["messages"]
+    return {
+        "messages": n,
+        "wire B/msg": stats["wire_bytes"] / n,
+        "json B/msg": stats["json_bytes"] / n,
+        "CPU us/msg": cpu / n * 1e6,
+        "decompress us/msg": stats["decompress_seconds"] / n * 1e6,
+        "msgs/s": n / wall,
+        "kept": db.posts + db.records,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="フレームを送り直す回数（デフォルト 5）")
+    parser.add_argument("--train", type=int, default=2000, help="辞書の学習に使う先頭のフレーム数（デフォルト 2000）")
+    parser.add_argument("--dict-size", type=int, default=64 * 1024, help="学習する辞書のサイズ（バイト）")
+    args = parser.parse_args()
+
+    frames = load_frames()
+    samples, replay = frames[: args.train], frames[args.train :]
+    trained = zstandard.train_dictionary(args.dict_size, [s.encode("utf-8") for s in samples])
+    fd, dict_path = tempfile.mkstemp(suffix=".zstd_dict")
+    with os.fdopen(fd, "wb") as f:
+        f.write(trained.as_bytes())
+
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(
+        target=_serve, args=(replay, dict_path, args.repeat, port_queue), daemon=True
+    )
+    server.start()
+    try:
+        endpoint = f"ws://127.0.0.1:{port_queue.get(timeout=60)}/subscribe"
+        expected = len(replay) * args.repeat
+        print(f"{expected} messages per mode ({len(replay)} frames x {args.repeat}), dictionary {len(trained.as_bytes())} bytes")
+        results = {}
+        for compress in (False, True):
+            results[compress] = asyncio.run(_receive(endpoint, compress, dict_path, expected))
+        print(f"{'':20}{'uncompressed':>14}{'compressed':>14}")
+        for key in results[False]:
+            row = [results[False][key], results[True][key]]
+            print(f"{key:20}" + "".join(f"{v:14,.1f}" if isinstance(v, float) else f"{v:14,}" for v in row))
+    finally:
+        server.terminate()
+        os.unlink(dict_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""ベンチマーク用の Jetstream フレームのフィクスチャ。
+
+fixtures/jetstream_frames.jsonl.gz は Jetstream（app.bsky.* の commit / identity / account）と同じ形・
+同じ構成比で合成したフレームを 1 行 1 フレームで保存したもの。乱数の種を固定しているので、
+`python benchmarks/fixture.py` で同じファイルを作り直せる。
+
+構成（おおよそ）: いいね 45%、投稿の作成 20%（日本語 2 割・英語 5 割・ポルトガル語・韓国語など）、
+フォロー 12%、リポスト 10%、削除 8%、identity / account 5%。
+"""
+
+import gzip
+import json
+import random
+import sys
+from pathlib import Path
+from typing import List
+
+ROOT = Path(__file__).resolve().parent
+FIXTURE = ROOT / "fixtures" / "jetstream_frames.jsonl.gz"
+
+# ベンチマークから import したときにリポジトリの src を使う
+sys.path.insert(0, str(ROOT.parent / "src"))
+
+_B32 = "234567abcdefghijklmnopqrstuvwxyz"
+_START_US = 1_730_419_200_000_000  # 2024-11-01T00:00:00Z
+
+_WORDS = {
+    "en": "the a and to of is it this bluesky post today great love art photo new just like my so".split(),
+    "ja": "今日 は いい 天気 です ね ありがとう 東京 ラーメン 食べた 猫 かわいい 仕事 おはよう 眠い".split(),
+    "pt": "olá bom dia amanhã também não você muito obrigado hoje festa futebol".split(),
+    "ko": "오늘 날씨 좋다 감사합니다 고양이 커피 안녕하세요 사랑해".split(),
+    "de": "heute gut danke schön katze kaffee wetter morgen".split(),
+}
+_LANG_WEIGHTS = [("en", 50), ("ja", 20), ("pt", 12), ("ko", 6), ("de", 7), (None, 5)]
+_EMOJI = ["🎉", "🔥", "❤️", "😂", "✨"]
+
+
+def _tid(rng: random.Random, time_us: int) -> str:
+    value = (time_us << 10) | rng.getrandbits(10)
+    return "".join(_B32[(value >> (5 * i)) & 31] for i in reversed(range(13)))
+
+
+def _cid(rng: random.Random) -> str:
+    return "bafyrei" + "".join(rng.choice(_B32) for _ in range(52))
+
+
+def _did(rng: random.Random) -> str:
+    return "did:plc:" + "".join(rng.choice(_B32) for _ in range(24))
+
+
+def _frame(event: dict) -> str:
+    return json.dumps(event, separators=(",", ":"), ensure_ascii=False)
+
+
+def generate(n: int = 10_000, seed: int = 20241101) -> List[str]:
+    rng = random.Random(seed)
+    actors = [_did(rng) for _ in range(4000)]
+    langs, weights = zip(*_LANG_WEIGHTS)
+    recent_posts: List[dict] = []
+    frames = []
+    time_us = _START_US
+    for i in range(n):
+        time_us += rng.randint(100, 900)
+        did = rng.choice(actors)
+        r = rng.random()
+        if r < 0.05:
+            kind = rng.choice(["identity", "account"])
+            body = {"did": did, "seq": 4_000_000_000 + i, "time": "2024-11-01T00:00:00.000Z"}
+            if kind == "identity":
+                body["handle"] = f"user{i}.bsky.social"
+            else:
+                body["active"] = True
+            frames.append(_frame({"did": did, "time_us": time_us, "kind": kind, kind: body}))
+            continue
+
+        rkey = _tid(rng, time_us)
+        commit = {"rev": _tid(rng, time_us), "operation": "create", "rkey": rkey}
+        createdAt = "2024-11-01T00:00:00.000Z"
+        if r < 0.25:
+            lang = rng.choices(langs, weights)[0]
+            text = " ".join(rng.choice(_WORDS[lang or "en"]) for _ in range(rng.randint(3, 30)))
+            if rng.random() < 0.2:
+                text += rng.choice(_EMOJI)
+            record = {"$type": "app.bsky.feed.post", "createdAt": createdAt, "text": text}
+            if lang:
+                record["langs"] = [lang]
+            if recent_posts and rng.random() < 0.3:
+                parent = rng.choice(recent_posts)
+                record["reply"] = {"parent": parent, "root": parent}
+            commit.update(collection="app.bsky.feed.post", record=record, cid=_cid(rng))
+            recent_posts.append({"uri": f"at://{did}/app.bsky.feed.post/{rkey}", "cid": commit["cid"]})
+            recent_posts = recent_posts[-500:]
+        elif r < 0.80:
+            collection = "app.bsky.feed.like" if r < 0.70 else "app.bsky.feed.repost"
+            if recent_posts and rng.random() < 0.5:
+                subject = rng.choice(recent_posts)
+            else:
+                subject = {"uri": f"at://{rng.choice(actors)}/app.bsky.feed.post/{_tid(rng, time_us - 10**9)}", "cid": _cid(rng)}
+            record = {"$type": collection, "createdAt": createdAt, "subject": subject}
+            commit.update(collection=collection, record=record, cid=_cid(rng))
+        elif r < 0.92:
+            record = {"$type": "app.bsky.graph.follow", "createdAt": createdAt, "subject": rng.choice(actors)}
+            commit.update(collection="app.bsky.graph.follow", record=record, cid=_cid(rng))
+        else:
+            commit["operation"] = "delete"
+            commit["collection"] = rng.choice(
+                ["app.bsky.feed.like", "app.bsky.feed.post", "app.bsky.graph.follow", "app.bsky.feed.repost"]
+            )
+        frames.append(_frame({"did": did, "time_us": time_us, "kind": "commit", "commit": commit}))
+    return frames
+
+
+def load_frames() -> List[str]:
+    """記録済みのフィクスチャを読み込む（1 要素 1 フレームの JSON 文字列）。"""
+    with gzip.open(FIXTURE, "rt", encoding="utf-8") as f:
+        return [line.rstrip("\n") for line in f if line.strip()]
+
+
+if __name__ == "__main__":
+    FIXTURE.parent.mkdir(exist_ok=True)
+    frames = generate()
+    # mtime を 0 にして、作り直しても同じバイト列になるようにする
+    with open(FIXTURE, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as gz:
+        gz.write(("\n".join(frames) + "\n").encode("utf-8"))
+    print(f"{len(frames)} frames -> {FIXTURE} ({FIXTURE.stat().st_size} bytes)")
@@ -5,5 +5,16 @@ __all__ = [
     "bluesky_api",
     "bluesky_db",
     "common_http",
+    "did_resolver",
+    "ingest_filter",
+    "jetstream",
+    "outbox",
+    "http_cache",
+    "pagination",
+    "projection",
+    "ratelimit",
+    "session_store",
+    "singleflight",
+    "tid",
     "tools_bluesky",
 ]
@@ -1,9 +1,90 @@
+import sys
 import json
 import re
+import time
+import functools
+import threading
 import grapheme
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .common_http import jwt_claims
+from .did_resolver import pds_endpoint
+from .pagination import Paginator
+from .projection import dumps, project_result
+from .tid import next_tid
+
+# *_all 系で 1 回に取得できる件数の上限
+MAX_ALL_ITEMS = 10000
+
+# getProfiles / getPosts が 1 リクエストで受け付ける件数の上限と、同時に送るリクエスト数
+HYDRATE_CHUNK_SIZE = 25
+HYDRATE_CONCURRENCY = 4
+
+# ログイン先が分からないときに使うエントリウェイ（bsky.social 上のアカウントは各 PDS へ中継される）
+ENTRYWAY = "https://bsky.social"
+
+# applyWrites 1 回で送れる書き込みの上限（PDS の制限）と、同時に送るリクエスト数
+APPLY_WRITES_MAX = 200
+APPLY_WRITES_CONCURRENCY = 2
+
+# accessJwt の残り時間がこれを切ったら、バックグラウンドで先に更新する（秒）
+TOKEN_REFRESH_AHEAD = 300
+# 残り時間がこれ以下なら送っても ExpiredToken になるので、送信前に同期で更新する（秒）
+TOKEN_EXPIRY_SKEW = 30
+
+
+def _compact_post(pv: dict, text_max_len: Optional[int] = 120) -> dict:
+    """postView から一覧表示に必要な項目だけを取り出す（本文は text_max_len 文字で切る）。"""
+    author = pv.get("author") or {}
+    record = pv.get("record") or {}
+    text = record.get("text")
+    if (
+        isinstance(text, str)
+        and text_max_len is not None
+        and text_max_len > 0
+        and len(text) > text_max_len
+    ):
+        text = text[:text_max_len] + "…"
+
+    return {
+        "uri": pv.get("uri"),
+        "cid": pv.get("cid"),
+        "createdAt": record.get("createdAt"),
+        "author": {
+            "did": author.get("did"),
+            "handle": author.get("handle"),
+            "displayName": author.get("displayName"),
+        },
+        "text": text,
+        "likeCount": pv.get("likeCount"),
+        "replyCount": pv.get("replyCount"),
+        "repostCount": pv.get("repostCount"),
+        "quoteCount": pv.get("quoteCount"),
+    }
+
+
+def _compact_actor(actor: dict) -> dict:
+    return {
+        "did": actor.get("did"),
+        "handle": actor.get("handle"),
+        "displayName": actor.get("displayName"),
+    }
+
+
+def _compact_list(lv: dict) -> dict:
+    return {
+        "uri": lv.get("uri"),
+        "name": lv.get("name"),
+        "purpose": lv.get("purpose"),
+        "listItemCount": lv.get("listItemCount"),
+    }
+
+
+def _compact_list_item(item: dict) -> dict:
+    return {"uri": item.get("uri"), **_compact_actor(item.get("subject") or {})}
 
 
 @dataclass
@@ -12,7 +93,7 @@ class BlueskySession:
     refreshJwt: Optional[str] = None
     did: Optional[str] = None
     handle: Optional[str] = None
-    pds_url: str = "https://bsky.social"
+    pds_url: str = ENTRYWAY
 
 
 class BlueskyAPI:
@@ -20,12 +101,26 @@ class BlueskyAPI:
 
     - MCP tool 実装から HTTP 呼び出し・セッション管理・共通ロジックを分離するための薄い層。
     - http_get_json / http_post_json は外部から注入し、テストや差し替えを容易にする。
+    - resolver（DidResolver）を渡すと、ログイン時に DID ドキュメントからアカウントの PDS を求め、
+      認証付きの呼び出しをエントリウェイを経由せずその PDS へ直接送る。
     """
 
-    def __init__(self, session: BlueskySession, http_get_json, http_post_json):
+    def __init__(self, session: BlueskySession, http_get_json, http_post_json, resolver=None):
         self.session = session
-        self.http_get_json = http_get_json
-        self.http_post_json = http_post_json
+        self.resolver = resolver
+        self._raw_get_json = http_get_json
+        self._raw_post_json = http_post_json
+        # ExpiredToken を受けたらトークンを更新して 1 回だけ再送する
+        self.http_get_json = functools.partial(self._call_with_refresh, http_get_json)
+        self.http_post_json = functools.partial(self._call_with_refresh, http_post_json)
+        # トークンを更新した後に呼ばれる（SessionManager が永続化に使う）
+        self.on_session_update: Optional[Callable[["BlueskyAPI"], None]] = None
+        # 設定されていればレコード作成を Outbox に記録し、バックグラウンドで配送する（SessionManager が設定）
+        self.outbox = None
+        self._refresh_lock = threading.Lock()
+        self._token_exp: Tuple[Optional[str], Optional[float]] = (None, None)
+        # エントリウェイのままのセッションの PDS 解決を試みたか（auth_params の初回に 1 度だけ行う）
+        self._pds_checked = False
 
     # -------------------------
     # Common helpers
@@ -76,22 +171,262 @@ class BlueskyAPI:
     def _now_iso_z(self) -> str:
         return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
 
+    # -------------------------
+    # Token lifecycle
+    # -------------------------
+    def token_expiry(self) -> Optional[float]:
+        """accessJwt の exp（UNIX 秒）。読めなければ None。"""
+        token = self.session.accessJwt
+        cached_token, exp = self._token_exp
+        if token != cached_token:
+            exp = jwt_claims(token).get("exp")
+            exp = float(exp) if isinstance(exp, (int, float)) else None
+            self._token_exp = (token, exp)
+        return exp
+
+    def _refresh_tokens(self) -> None:
+        """refreshJwt でトークンを更新する。呼び出し側で _refresh_lock を持つこと。"""
+        result = self._raw_post_json(
+            "/xrpc/com.atproto.server.refreshSession",
+            {},
+            extra_headers={"Authorization": f"Bearer {self.session.refreshJwt}"},
+            base_url=self.session.pds_url,
+        )
+
+        self.session.accessJwt = result.get("accessJwt")
+        self.session.refreshJwt = result.get("refreshJwt")
+        self.session.did = result.get("did")
+        self.session.handle = result.get("handle")
+        self._update_pds(result.get("didDoc"), fetch=False)
+        if self.on_session_update is not None:
+            self.on_session_update(self)
+
+    def _update_pds(self, did_doc: Optional[dict] = None, fetch: bool = True) -> bool:
+        """DID ドキュメントの PDS を session.pds_url にする。変わったら True。
+
+        did_doc が無ければ resolver で取得する（fetch=False なら何もしない）。失敗しても今の pds_url を使い続ける。
+        """
+        did = self.session.did
+        if not did:
+            return False
+        try:
+            if self.resolver is not None and isinstance(did_doc, dict):
+                self.resolver.put(did, did_doc)
+            endpoint = pds_endpoint(did_doc)
+            if endpoint is None and fetch and self.resolver is not None:
+                endpoint = self.resolver.pds_for_did(did)
+        except Exception as e:
+            print(f"PDS resolution failed for {did}: {e}", file=sys.stderr)
+            return False
+        if not endpoint or endpoint == self.session.pds_url:
+            return False
+        self.session.pds_url = endpoint
+        return True
+
+    def ensure_pds(self) -> None:
+        """エントリウェイのままのセッション（旧 sessions.json から移行したもの等）を PDS 直結にする。
+
+        ネットワークを使うため、API 呼び出しと同じワーカースレッド（auth_params）から呼ぶ。
+        """
+        self._pds_checked = True
+        if self.session.accessJwt and self.session.pds_url == ENTRYWAY and self._update_pds():
+            if self.on_session_update is not None:
+                self.on_session_update(self)
+
+    def _refresh_if_current(self, token: Optional[str]) -> None:
+        """token がまだ現在の accessJwt なら更新する。同時に呼ばれても更新は 1 回だけ。"""
+        with self._refresh_lock:
+            if self.session.accessJwt == token:
+                self._refresh_tokens()
+
+    def _refresh_in_background(self, token: str) -> None:
+        try:
+            if self.session.accessJwt == token:
+                self._refresh_tokens()
+        except Exception as e:
+            print(f"Background token refresh failed for {self.session.handle}: {e}", file=sys.stderr)
+        finally:
+            self._refresh_lock.release()
+
+    def _refresh_ahead(self) -> None:
+        """期限が近いトークンを送信前に更新する。"""
+        exp = self.token_expiry()
+        if exp is None or not self.session.refreshJwt:
+            return
+        token = self.session.accessJwt
+        left = exp - time.time()
+        if left <= TOKEN_EXPIRY_SKEW:
+            try:
+                self._refresh_if_current(token)
+            except Exception as e:
+                # 失敗してもそのまま送る（ExpiredToken になれば _call_with_refresh がもう一度試す）
+                print(f"Token refresh failed for {self.session.handle}: {e}", file=sys.stderr)
+        elif left <= TOKEN_REFRESH_AHEAD and self._refresh_lock.acquire(blocking=False):
+            # ロックは更新スレッドが解放する
+            threading.Thread(
+                target=self._refresh_in_background, args=(token,), name="bsky-token-refresh", daemon=True
+            ).start()
+
+    def _call_with_refresh(self, fn, path: str, *args, **kwargs):
+        try:
+            return fn(path, *args, **kwargs)
+        except Exception as e:
+            if getattr(e, "error", None) != "ExpiredToken" or not self.session.refreshJwt:
+                raise
+            headers = kwargs.get("extra_headers") or {}
+            sent = headers.get("Authorization", "")
+            if not sent.startswith("Bearer ") or sent == f"Bearer {self.session.refreshJwt}":
+                raise
+            # 他の呼び出しが既に更新していれば、新しいトークンで送り直すだけ
+            self._refresh_if_current(sent[len("Bearer "):])
+            kwargs["extra_headers"] = {**headers, "Authorization": f"Bearer {self.session.accessJwt}"}
+            return fn(path, *args, **kwargs)
+
     def auth_params(self) -> dict:
         if self.session.accessJwt:
+            if not self._pds_checked:
+                self.ensure_pds()
+            self._refresh_ahead()
             return {
                 "extra_headers": {"Authorization": f"Bearer {self.session.accessJwt}"},
                 "base_url": self.session.pds_url,
             }
         return {"base_url": "https://public.api.bsky.app"}
 
+    def _create_record(self, data: dict, params: dict) -> str:
+        """createRecord を送る。outbox が設定されていれば記録だけして、受付結果（URI と id）を返す。"""
+        if self.outbox is not None:
+            return json.dumps(self.outbox.enqueue(data), ensure_ascii=False, indent=2)
+        result = self.http_post_json("/xrpc/com.atproto.repo.createRecord", data, **params)
+        return json.dumps(result, ensure_ascii=False, indent=2)
+
     def require_auth(self) -> Optional[str]:
         if not self.session.accessJwt:
             return "Error: Authentication required."
         return None
 
+    def _render(
+        self,
+        result: Any,
+        shape: Dict[str, str],
+        view: Optional[str],
+        fields: Optional[List[str]],
+    ) -> str:
+        """読み取り結果にビュー（minimal/summary/full）またはフィールド指定を適用し、コンパクトな JSON にする。"""
+        try:
+            return dumps(project_result(result, shape, view, fields))
+        except ValueError as e:
+            return f"Error: {e}"
+
+    def paginate(
+        self,
+        path: str,
+        query: dict,
+        items_key: str,
+        max_items: int,
+        key: Optional[Callable[[dict], Any]] = None,
+        cursor: Optional[str] = None,
+    ) -> Paginator:
+        """cursor 付き一覧 API を全ページ辿る Paginator を返す。
+
+        1 回限りの大量取得でレスポンスキャッシュを埋めないよう、ページはキャッシュを通さずに取得する。
+        取得が長引いてもトークンの先行更新が効くよう、認証ヘッダはページごとに作り直す。
+        """
+
+        def fetch(page_cursor: Optional[str], limit: int) -> dict:
+            q = dict(query, limit=limit)
+            if page_cursor:
+                q["cursor"] = page_cursor
+            return self.http_get_json(path, q, cache=False, **self.auth_params())
+
+        return Paginator(fetch, items_key, max_items, key=key, cursor=cursor)
+
+    def _hydrate(
+        self,
+        path: str,
+        param: str,
+        values: List[str],
+        items_key: str,
+        keys_of: Callable[[dict], Iterable[str]],
+    ) -> Tuple[List[Optional[dict]], int, List[dict]]:
+        """values を重複除去して HYDRATE_CHUNK_SIZE 件ずつに分け、並行に取得する。
+
+        戻り値は (values と同じ順序の結果（見つからなければ None）, リクエスト数, 失敗したチャンク)。
+        認証ヘッダはチャンクごとに作る（待ち行列の後ろのチャンクが古いトークンで送られないように）。
+        """
+        unique = list(dict.fromkeys(v for v in values if v))
+        chunks = [unique[i : i + HYDRATE_CHUNK_SIZE] for i in range(0, len(unique), HYDRATE_CHUNK_SIZE)]
+
+        def fetch(chunk: List[str]) -> list:
+            return self.http_get_json(path, {param: chunk}, **self.auth_params()).get(items_key) or []
+
+        found: Dict[str, dict] = {}
+        errors: List[dict] = []
+        if chunks:
+            with ThreadPoolExecutor(
+                max_workers=min(HYDRATE_CONCURRENCY, len(chunks)), thread_name_prefix="bsky-hydrate"
+            ) as ex:
+                futures = [(chunk, ex.submit(fetch, chunk)) for chunk in chunks]
+                for chunk, future in futures:
+                    try:
+                        for item in future.result():
+                            for k in keys_of(item):
+                                if k:
+                                    found.setdefault(k, item)
+                    except Exception as e:
+                        errors.append({param: chunk, "error": str(e)})
+
+        results = [found.get(v) or found.get(v.lower()) if v else None for v in values]
+        return results, len(chunks), errors
+
+    def _collect_all(
+        self,
+        path: str,
+        query: dict,
+        items_key: str,
+        project: Callable[[dict], Dict[str, Any]],
+        key: Callable[[dict], Any],
+        max_items: int,
+        cursor: Optional[str] = None,
+    ) -> str:
+        """paginate() の結果を project で縮めながら集め、コンパクトな JSON で返す。
+
+        途中のページで失敗した場合は、それまでの結果と続きの cursor に error を付けて返す。
+        """
+        max_items = max(1, min(int(max_items), MAX_ALL_ITEMS))
+        pager = self.paginate(path, query, items_key, max_items, key=key, cursor=cursor)
+        items = []
+        error = None
+        try:
+            for item in pager:
+                items.append(project(item))
+        except Exception as e:
+            error = str(e)
+        out: Dict[str, Any] = pager.stats()
+        if error:
+            out["error"] = error
+        out["items"] = items
+        return json.dumps(out, ensure_ascii=False, separators=(",", ":"))
+
     # -------------------------
     # Auth
     # -------------------------
+    def _login_pds(self, identifier: str) -> str:
+        """createSession の送り先。ハンドル・DID から PDS が分かればそこ、分からなければエントリウェイ。"""
+        identifier = identifier.lstrip("@")
+        # メールアドレスでのログインは PDS を引けない
+        if self.resolver is None or "@" in identifier:
+            return ENTRYWAY
+        try:
+            if identifier.startswith("did:"):
+                pds_url = self.resolver.pds_for_did(identifier)
+            else:
+                pds_url = self.resolver.pds_for_handle(identifier)
+        except Exception as e:
+            print(f"PDS resolution failed for {identifier}: {e}", file=sys.stderr)
+            pds_url = None
+        return pds_url or ENTRYWAY
+
     def login(self, handle: str, password: str) -> str:
         if not handle or not password:
             return "Error: Handle and password are required."
@@ -100,16 +435,19 @@ class BlueskyAPI:
             return f"Already logged in as {handle}."
 
         try:
+            pds_url = self._login_pds(handle)
             result = self.http_post_json(
                 "/xrpc/com.atproto.server.createSession",
                 {"identifier": handle, "password": password},
-                base_url="https://bsky.social",
+                base_url=pds_url,
             )
 
             self.session.accessJwt = result.get("accessJwt")
             self.session.refreshJwt = result.get("refreshJwt")
             self.session.did = result.get("did")
             self.session.handle = result.get("handle")
+            self.session.pds_url = pds_url
+            self._update_pds(result.get("didDoc"))
 
             return f"Login successful as {self.session.handle} (DID: {self.session.did})"
         except Exception as e:
@@ -120,18 +458,8 @@ class BlueskyAPI:
             return "Error: No refresh token available. Please login first."
 
         try:
-            result = self.http_post_json(
-                "/xrpc/com.atproto.server.refreshSession",
-                {},
-                extra_headers={"Authorization": f"Bearer {self.session.refreshJwt}"},
-                base_url=self.session.pds_url,
-            )
-
-            self.session.accessJwt = result.get("accessJwt")
-            self.session.refreshJwt = result.get("refreshJwt")
-            self.session.did = result.get("did")
-            self.session.handle = result.get("handle")
-
+            with self._refresh_lock:
+                self._refresh_tokens()
             return f"Session refreshed successfully for {self.session.handle}"
         except Exception as e:
             return f"Refresh failed: {str(e)}"
@@ -139,31 +467,91 @@ class BlueskyAPI:
     # -------------------------
     # Read APIs
     # -------------------------
-    def get_profile(self, handle: str) -> str:
+    def get_profile(
+        self, handle: str, view: Optional[str] = None, fields: Optional[List[str]] = None
+    ) -> str:
         params = self.auth_params()
         result = self.http_get_json(
             "/xrpc/app.bsky.actor.getProfile", {"actor": handle}, **params
         )
-        return json.dumps(result, ensure_ascii=False, indent=2)
+        return self._render(result, {"": "profile"}, view, fields)
+
+    def get_profiles(
+        self, actors: List[str], view: Optional[str] = None, fields: Optional[List[str]] = None
+    ) -> str:
+        """複数アカウントのプロフィールを getProfiles でまとめて取得する（順序は actors と同じ）。"""
+        profiles, requests, errors = self._hydrate(
+            "/xrpc/app.bsky.actor.getProfiles",
+            "actors",
+            actors,
+            "profiles",
+            lambda p: (p.get("did"), (p.get("handle") or "").lower()),
+        )
+        out: Dict[str, Any] = {
+            "profiles": profiles,
+            "missing": [a for a, p in zip(actors, profiles) if p is None],
+            "requests": requests,
+        }
+        if errors:
+            out["errors"] = errors
+        return self._render(out, {"profiles": "profile"}, view, fields)
+
+    def get_posts(
+        self, uris: List[str], view: Optional[str] = None, fields: Optional[List[str]] = None
+    ) -> str:
+        """複数の投稿を getPosts でまとめて取得する（順序は uris と同じ）。"""
+
+        def keys_of(pv: dict) -> tuple:
+            # at://handle/... で指定された URI にも一致させる（応答の uri は DID 形式）
+            uri = pv.get("uri") or ""
+            handle = ((pv.get("author") or {}).get("handle") or "").lower()
+            parts = uri.split("/", 3)
+            alias = f"at://{handle}/{parts[3]}" if handle and len(parts) == 4 else None
+            return (uri, alias)
+
+        posts, requests, errors = self._hydrate(
+            "/xrpc/app.bsky.feed.getPosts", "uris", uris, "posts", keys_of
+        )
+        out: Dict[str, Any] = {
+            "posts": posts,
+            "missing": [u for u, p in zip(uris, posts) if p is None],
+            "requests": requests,
+        }
+        if errors:
+            out["errors"] = errors
+        return self._render(out, {"posts": "post"}, view, fields)
 
     def get_author_feed(
-        self, handle: str, limit: int = 10, cursor: Optional[str] = None
+        self,
+        handle: str,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        view: Optional[str] = None,
+        fields: Optional[List[str]] = None,
     ) -> str:
         params = self.auth_params()
         query = {"actor": handle, "limit": limit}
         if cursor:
             query["cursor"] = cursor
         result = self.http_get_json("/xrpc/app.bsky.feed.getAuthorFeed", query, **params)
-        return json.dumps(result, ensure_ascii=False, indent=2)
+        return self._render(result, {"feed": "feed_item"}, view, fields)
 
-    def get_actor_feeds(self, handle: str) -> str:
+    def get_actor_feeds(
+        self, handle: str, view: Optional[str] = None, fields: Optional[List[str]] = None
+    ) -> str:
         params = self.auth_params()
         result = self.http_get_json(
             "/xrpc/app.bsky.feed.getActorFeeds", {"actor": handle}, **params
         )
-        return json.dumps(result, ensure_ascii=False, indent=2)
+        return self._render(result, {"feeds": "generator"}, view, fields)
 
-    def get_timeline(self, limit: int = 20, cursor: Optional[str] = None) -> str:
+    def get_timeline(
+        self,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        view: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+    ) -> str:
         err = self.require_auth()
         if err:
             return err
@@ -172,7 +560,7 @@ class BlueskyAPI:
         if cursor:
             query["cursor"] = cursor
         result = self.http_get_json("/xrpc/app.bsky.feed.getTimeline", query, **params)
-        return json.dumps(result, ensure_ascii=False, indent=2)
+        return self._render(result, {"feed": "feed_item"}, view, fields)
 
     def get_timeline_page(
         self,
@@ -193,45 +581,17 @@ class BlueskyAPI:
         result = self.http_get_json("/xrpc/app.bsky.feed.getTimeline", query, **params)
 
         if not summary:
-            return json.dumps(result, ensure_ascii=False, indent=2)
+            return dumps(result)
 
         feed = result.get("feed", [])
         next_cursor = result.get("cursor")
 
-        def _pick_post_view(pv: dict) -> dict:
-            author = pv.get("author") or {}
-            record = pv.get("record") or {}
-            text = record.get("text")
-            if (
-                isinstance(text, str)
-                and text_max_len is not None
-                and text_max_len > 0
-                and len(text) > text_max_len
-            ):
-                text = text[:text_max_len] + "…"
-
-            return {
-                "uri": pv.get("uri"),
-                "cid": pv.get("cid"),
-                "createdAt": record.get("createdAt"),
-                "author": {
-                    "did": author.get("did"),
-                    "handle": author.get("handle"),
-                    "displayName": author.get("displayName"),
-                },
-                "text": text,
-                "likeCount": pv.get("likeCount"),
-                "replyCount": pv.get("replyCount"),
-                "repostCount": pv.get("repostCount"),
-                "quoteCount": pv.get("quoteCount"),
-            }
-
         out_items = []
         for item in feed:
             post = item.get("post")
             if isinstance(post, dict):
                 out_items.append(
-                    {"post": _pick_post_view(post), "reason": item.get("reason")}
+                    {"post": _compact_post(post, text_max_len), "reason": item.get("reason")}
                 )
             else:
                 out_items.append({"post": None, "reason": item.get("reason")})
@@ -243,37 +603,69 @@ class BlueskyAPI:
             "items": out_items,
         }
 
-        return json.dumps(out, ensure_ascii=False, indent=2)
+        return dumps(out)
 
-    def get_post_thread(self, uri: str, depth: int = 6) -> str:
+    def get_post_thread(
+        self, uri: str, depth: int = 6, view: Optional[str] = None, fields: Optional[List[str]] = None
+    ) -> str:
         params = self.auth_params()
         result = self.http_get_json(
             "/xrpc/app.bsky.feed.getPostThread", {"uri": uri, "depth": depth}, **params
         )
-        return json.dumps(result, ensure_ascii=False, indent=2)
+        return self._render(result, {"thread": "thread"}, view, fields)
 
     def get_follows(
-        self, handle: str, limit: int = 50, cursor: Optional[str] = None
+        self,
+        handle: str,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        view: Optional[str] = None,
+        fields: Optional[List[str]] = None,
     ) -> str:
         params = self.auth_params()
         query = {"actor": handle, "limit": limit}
         if cursor:
             query["cursor"] = cursor
         result = self.http_get_json("/xrpc/app.bsky.graph.getFollows", query, **params)
-        return json.dumps(result, ensure_ascii=False, indent=2)
+        return self._render(result, {"subject": "profile", "follows": "profile"}, view, fields)
 
     def get_followers(
-        self, handle: str, limit: int = 50, cursor: Optional[str] = None
+        self,
+        handle: str,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        view: Optional[str] = None,
+        fields: Optional[List[str]] = None,
     ) -> str:
         params = self.auth_params()
         query = {"actor": handle, "limit": limit}
         if cursor:
             query["cursor"] = cursor
         result = self.http_get_json("/xrpc/app.bsky.graph.getFollowers", query, **params)
-        return json.dumps(result, ensure_ascii=False, indent=2)
+        return self._render(result, {"subject": "profile", "followers": "profile"}, view, fields)
+
+    def get_follows_all(
+        self, handle: str, max_items: int = 1000, cursor: Optional[str] = None
+    ) -> str:
+        return self._collect_all(
+            "/xrpc/app.bsky.graph.getFollows", {"actor": handle}, "follows",
+            _compact_actor, lambda a: a.get("did"), max_items, cursor,
+        )
+
+    def get_followers_all(
+        self, handle: str, max_items: int = 1000, cursor: Optional[str] = None
+    ) -> str:
+        return self._collect_all(
+            "/xrpc/app.bsky.graph.getFollowers", {"actor": handle}, "followers",
+            _compact_actor, lambda a: a.get("did"), max_items, cursor,
+        )
 
     def get_notifications(
-        self, limit: int = 20, cursor: Optional[str] = None
+        self,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        view: Optional[str] = None,
+        fields: Optional[List[str]] = None,
     ) -> str:
         err = self.require_auth()
         if err:
@@ -285,14 +677,14 @@ class BlueskyAPI:
         result = self.http_get_json(
             "/xrpc/app.bsky.notification.listNotifications", query, **params
         )
-        return json.dumps(result, ensure_ascii=False, indent=2)
+        return self._render(result, {"notifications": "notification"}, view, fields)
 
     def resolve_handle(self, handle: str) -> str:
         params = self.auth_params()
         result = self.http_get_json(
             "/xrpc/com.atproto.identity.resolveHandle", {"handle": handle}, **params
         )
-        return json.dumps(result, ensure_ascii=False, indent=2)
+        return dumps(result)
 
     # -------------------------
     # Write APIs
@@ -339,8 +731,7 @@ class BlueskyAPI:
         if facets:
             data["record"]["facets"] = facets
 
-        result = self.http_post_json("/xrpc/com.atproto.repo.createRecord", data, **params)
-        return json.dumps(result, ensure_ascii=False, indent=2)
+        return self._create_record(data, params)
 
     def reply(
         self,
@@ -378,8 +769,7 @@ class BlueskyAPI:
         if facets:
             data["record"]["facets"] = facets
 
-        result = self.http_post_json("/xrpc/com.atproto.repo.createRecord", data, **params)
-        return json.dumps(result, ensure_ascii=False, indent=2)
+        return self._create_record(data, params)
 
     def like(self, uri: str, cid: str) -> str:
         err = self.require_auth()
@@ -396,8 +786,7 @@ class BlueskyAPI:
                 "createdAt": now,
             },
         }
-        result = self.http_post_json("/xrpc/com.atproto.repo.createRecord", data, **params)
-        return json.dumps(result, ensure_ascii=False, indent=2)
+        return self._create_record(data, params)
 
     def repost(self, uri: str, cid: str) -> str:
         err = self.require_auth()
@@ -414,43 +803,88 @@ class BlueskyAPI:
                 "createdAt": now,
             },
         }
-        result = self.http_post_json("/xrpc/com.atproto.repo.createRecord", data, **params)
-        return json.dumps(result, ensure_ascii=False, indent=2)
+        return self._create_record(data, params)
 
     def search_posts(
-        self, query: str, limit: int = 10, cursor: Optional[str] = None
+        self,
+        query: str,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        view: Optional[str] = None,
+        fields: Optional[List[str]] = None,
     ) -> str:
         params = self.auth_params()
         q_params = {"q": query, "limit": limit}
         if cursor:
             q_params["cursor"] = cursor
         result = self.http_get_json("/xrpc/app.bsky.feed.searchPosts", q_params, **params)
-        return json.dumps(result, ensure_ascii=False, indent=2)
+        return self._render(result, {"posts": "post"}, view, fields)
+
+    def search_posts_all(
+        self,
+        query: str,
+        max_items: int = 1000,
+        cursor: Optional[str] = None,
+        text_max_len: int = 120,
+    ) -> str:
+        return self._collect_all(
+            "/xrpc/app.bsky.feed.searchPosts", {"q": query}, "posts",
+            lambda pv: _compact_post(pv, text_max_len), lambda pv: pv.get("uri"), max_items, cursor,
+        )
 
-    def get_likes(self, uri: str) -> str:
+    def get_likes(
+        self, uri: str, view: Optional[str] = None, fields: Optional[List[str]] = None
+    ) -> str:
         params = self.auth_params()
         result = self.http_get_json("/xrpc/app.bsky.feed.getLikes", {"uri": uri}, **params)
-        return json.dumps(result, ensure_ascii=False, indent=2)
+        return self._render(result, {"likes": "like"}, view, fields)
 
     def get_lists(
-        self, handle: str, limit: int = 50, cursor: Optional[str] = None
+        self,
+        handle: str,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        view: Optional[str] = None,
+        fields: Optional[List[str]] = None,
     ) -> str:
         params = self.auth_params()
         query = {"actor": handle, "limit": limit}
         if cursor:
             query["cursor"] = cursor
         result = self.http_get_json("/xrpc/app.bsky.graph.getLists", query, **params)
-        return json.dumps(result, ensure_ascii=False, indent=2)
+        return self._render(result, {"lists": "list"}, view, fields)
 
     def get_list(
-        self, list_uri: str, limit: int = 50, cursor: Optional[str] = None
+        self,
+        list_uri: str,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        view: Optional[str] = None,
+        fields: Optional[List[str]] = None,
     ) -> str:
         params = self.auth_params()
         query = {"list": list_uri, "limit": limit}
         if cursor:
             query["cursor"] = cursor
         result = self.http_get_json("/xrpc/app.bsky.graph.getList", query, **params)
-        return json.dumps(result, ensure_ascii=False, indent=2)
+        return self._render(result, {"list": "list", "items": "list_item"}, view, fields)
+
+    def get_lists_all(
+        self, handle: str, max_items: int = 1000, cursor: Optional[str] = None
+    ) -> str:
+        return self._collect_all(
+            "/xrpc/app.bsky.graph.getLists", {"actor": handle}, "lists",
+            _compact_list, lambda lv: lv.get("uri"), max_items, cursor,
+        )
+
+    def get_list_all(
+        self, list_uri: str, max_items: int = 1000, cursor: Optional[str] = None
+    ) -> str:
+        """リストのメンバーを全ページ分取得する（リスト自体の情報は含まない）。"""
+        return self._collect_all(
+            "/xrpc/app.bsky.graph.getList", {"list": list_uri}, "items",
+            _compact_list_item, lambda it: it.get("uri"), max_items, cursor,
+        )
 
     def delete_post(self, post_uri: str) -> str:
         err = self.require_auth()
@@ -485,8 +919,7 @@ class BlueskyAPI:
                 "createdAt": now,
             },
         }
-        result = self.http_post_json("/xrpc/com.atproto.repo.createRecord", data, **params)
-        return json.dumps(result, ensure_ascii=False, indent=2)
+        return self._create_record(data, params)
 
     def unfollow(self, follow_uri: str) -> str:
         err = self.require_auth()
@@ -521,8 +954,7 @@ class BlueskyAPI:
                 "createdAt": now,
             },
         }
-        result = self.http_post_json("/xrpc/com.atproto.repo.createRecord", data, **params)
-        return json.dumps(result, ensure_ascii=False, indent=2)
+        return self._create_record(data, params)
 
     def unblock(self, block_uri: str) -> str:
         err = self.require_auth()
@@ -564,8 +996,7 @@ class BlueskyAPI:
                 "createdAt": now,
             },
         }
-        result = self.http_post_json("/xrpc/com.atproto.repo.createRecord", data, **params)
-        return json.dumps(result, ensure_ascii=False, indent=2)
+        return self._create_record(data, params)
 
     def delete_list(self, list_uri: str) -> str:
         err = self.require_auth()
@@ -597,8 +1028,7 @@ class BlueskyAPI:
                 "createdAt": now,
             },
         }
-        result = self.http_post_json("/xrpc/com.atproto.repo.createRecord", data, **params)
-        return json.dumps(result, ensure_ascii=False, indent=2)
+        return self._create_record(data, params)
 
     def remove_from_list(self, listitem_uri: str) -> str:
         err = self.require_auth()
@@ -615,14 +1045,27 @@ class BlueskyAPI:
         return json.dumps(result, ensure_ascii=False, indent=2)
 
     def search_users(
-        self, term: str, limit: int = 10, cursor: Optional[str] = None
+        self,
+        term: str,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        view: Optional[str] = None,
+        fields: Optional[List[str]] = None,
     ) -> str:
         params = self.auth_params()
         query = {"q": term, "limit": limit}
         if cursor:
             query["cursor"] = cursor
         result = self.http_get_json("/xrpc/app.bsky.actor.searchActors", query, **params)
-        return json.dumps(result, ensure_ascii=False, indent=2)
+        return self._render(result, {"actors": "profile"}, view, fields)
+
+    def search_users_all(
+        self, term: str, max_items: int = 1000, cursor: Optional[str] = None
+    ) -> str:
+        return self._collect_all(
+            "/xrpc/app.bsky.actor.searchActors", {"q": term}, "actors",
+            _compact_actor, lambda a: a.get("did"), max_items, cursor,
+        )
 
     def mute(self, handle: str) -> str:
         err = self.require_auth()
@@ -652,8 +1095,9 @@ class BlueskyAPI:
             return err
         params = self.auth_params()
 
+        # 既存値を上書きしないよう、キャッシュを通さず最新のプロフィールを取得する
         current = self.http_get_json(
-            "/xrpc/app.bsky.actor.getProfile", {"actor": self.session.did}, **params
+            "/xrpc/app.bsky.actor.getProfile", {"actor": self.session.did}, cache=False, **params
         )
 
         data = {
@@ -705,3 +1149,165 @@ class BlueskyAPI:
         }
         result = self.http_post_json("/xrpc/com.atproto.repo.putRecord", data, **params)
         return json.dumps(result, ensure_ascii=False, indent=2)
+
+    # -------------------------
+    # Batch writes
+    # -------------------------
+    def _prepare_write(self, op: dict) -> Tuple[dict, str]:
+        """batch_write の 1 操作を applyWrites の write と対象の URI に変換する。不正なら ValueError。
+
+        作成するレコードのキーはここで TID を振る。再送しても同じキーなので二重に作られない。
+        """
+        if not isinstance(op, dict):
+            raise ValueError("operation must be an object")
+        action = op.get("action")
+        now = self._now_iso_z()
+        if action == "delete":
+            uri = str(op.get("uri") or "")
+            parts = uri.replace("at://", "").split("/")
+            if len(parts) < 3 or not parts[2]:
+                raise ValueError(f"Invalid record URI format: {uri}")
+            if parts[0] not in (self.session.did, self.session.handle):
+                raise ValueError(f"Record is not in the acting account's repo: {uri}")
+            write = {"$type": "com.atproto.repo.applyWrites#delete", "collection": parts[1], "rkey": parts[2]}
+            return write, f"at://{self.session.did}/{parts[1]}/{parts[2]}"
+
+        if action == "post":
+            text = op.get("text") or ""
+            v_err = self.validate_post_text(text)
+            if v_err:
+                raise ValueError(v_err[len("Error: "):] if v_err.startswith("Error: ") else v_err)
+            collection = "app.bsky.feed.post"
+            record = {"text": text, "createdAt": now}
+            facets = self.parse_facets(text)
+            if facets:
+                record["facets"] = facets
+        elif action in ("follow", "block"):
+            if not op.get("subject"):
+                raise ValueError(f"'{action}' requires 'subject' (DID)")
+            collection = f"app.bsky.graph.{action}"
+            record = {"subject": op["subject"], "createdAt": now}
+        elif action in ("like", "repost"):
+            if not op.get("uri") or not op.get("cid"):
+                raise ValueError(f"'{action}' requires 'uri' and 'cid'")
+            collection = f"app.bsky.feed.{action}"
+            record = {"subject": {"uri": op["uri"], "cid": op["cid"]}, "createdAt": now}
+        elif action == "list_item":
+            if not op.get("subject") or not op.get("list"):
+                raise ValueError("'list_item' requires 'subject' (DID) and 'list' (list URI)")
+            collection = "app.bsky.graph.listitem"
+            record = {"subject": op["subject"], "list": op["list"], "createdAt": now}
+        elif action == "create":
+            collection = op.get("collection")
+            record = op.get("record")
+            if not collection or not isinstance(record, dict):
+                raise ValueError("'create' requires 'collection' and 'record'")
+            record = dict(record)
+            record.setdefault("createdAt", now)
+        else:
+            raise ValueError(f"Unknown action: {action}")
+
+        record = {"$type": collection, **record}
+        rkey = op.get("rkey") if action == "create" and op.get("rkey") else next_tid()
+        write = {"$type": "com.atproto.repo.applyWrites#create", "collection": collection, "rkey": rkey, "value": record}
+        return write, f"at://{self.session.did}/{collection}/{rkey}"
+
+    def _chunk_applied(self, chunk: List[Tuple[int, dict, str]]) -> bool:
+        """失敗扱いになった applyWrites が実は反映済みかを、最初に作成したはずのレコードの有無で確かめる。
+
+        applyWrites は 1 回の呼び出し全体が 1 コミットなので、1 件あれば全件反映済み。
+        作成を含まないチャンクは確かめられないので False。
+        """
+        for _, write, _ in chunk:
+            if write["$type"].endswith("#create"):
+                try:
+                    self.http_get_json(
+                        "/xrpc/com.atproto.repo.getRecord",
+                        {"repo": self.session.did, "collection": write["collection"], "rkey": write["rkey"]},
+                        cache=False,
+                        **self.auth_params(),
+                    )
+                    return True
+                except Exception:
+                    return False
+        return False
+
+    def _apply_chunk(self, chunk: List[Tuple[int, dict, str]]) -> Tuple[List[Tuple[int, dict]], int]:
+        """1 回の applyWrites でチャンクを書き込み、((操作の位置, 結果), リクエスト数) を返す。
+
+        400 で拒否されたら半分に分けて送り直し、不正な操作だけを失敗にする。
+        """
+        requests = 1
+        try:
+            resp = self.http_post_json(
+                "/xrpc/com.atproto.repo.applyWrites",
+                {"repo": self.session.did, "writes": [w for _, w, _ in chunk]},
+                **self.auth_params(),
+            )
+        except Exception as e:
+            if any(w["$type"].endswith("#create") for _, w, _ in chunk):
+                requests += 1
+            if self._chunk_applied(chunk):
+                return [(i, {"uri": uri, "status": "ok"}) for i, _, uri in chunk], requests
+            if len(chunk) > 1 and getattr(e, "code", None) == 400:
+                mid = len(chunk) // 2
+                left, n_left = self._apply_chunk(chunk[:mid])
+                right, n_right = self._apply_chunk(chunk[mid:])
+                return left + right, requests + n_left + n_right
+            return [(i, {"uri": uri, "status": "error", "error": str(e)}) for i, _, uri in chunk], requests
+
+        results = resp.get("results") or []
+        out = []
+        for k, (i, _, uri) in enumerate(chunk):
+            r = results[k] if k < len(results) and isinstance(results[k], dict) else {}
+            item = {"uri": r.get("uri") or uri, "status": "ok"}
+            if r.get("cid"):
+                item["cid"] = r["cid"]
+            out.append((i, item))
+        return out, requests
+
+    def batch_write(self, operations: List[dict], concurrency: int = APPLY_WRITES_CONCURRENCY) -> str:
+        """作成・削除の混在した操作を applyWrites でまとめて書き込み、操作ごとの結果を返す。
+
+        APPLY_WRITES_MAX 件ずつのチャンクに分け、最大 concurrency 個を並行に送る。
+        """
+        err = self.require_auth()
+        if err:
+            return err
+        if not operations:
+            return "Error: operations is empty."
+
+        results: List[Optional[dict]] = [None] * len(operations)
+        prepared: List[Tuple[int, dict, str]] = []
+        for i, op in enumerate(operations):
+            try:
+                write, uri = self._prepare_write(op)
+            except ValueError as e:
+                results[i] = {"status": "error", "error": str(e)}
+                continue
+            prepared.append((i, write, uri))
+
+        chunks = [prepared[k : k + APPLY_WRITES_MAX] for k in range(0, len(prepared), APPLY_WRITES_MAX)]
+        requests = 0
+        if chunks:
+            workers = max(1, min(int(concurrency), len(chunks)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bsky-apply-writes") as ex:
+                for items, n in ex.map(self._apply_chunk, chunks):
+                    requests += n
+                    for i, item in items:
+                        results[i] = item
+
+        out_items = []
+        for i, (op, item) in enumerate(zip(operations, results)):
+            action = op.get("action") if isinstance(op, dict) else None
+            out_items.append({"index": i, "action": action, **(item or {})})
+        failed = sum(1 for r in out_items if r.get("status") != "ok")
+        return dumps(
+            {
+                "count": len(operations),
+                "succeeded": len(operations) - failed,
+                "failed": failed,
+                "requests": requests,
+                "results": out_items,
+            }
+        )
@@ -1,8 +1,669 @@
+import os
 import sqlite3
 import re
+import sys
+import json
+import base64
 import time
+import queue
+import atexit
+import threading
+import urllib.request
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+POST_COLLECTION = "app.bsky.feed.post"
+# IN (?, ...) 1 回あたりの値の数（古い SQLite のプレースホルダ上限 999 より小さく）
+_IN_CHUNK_SIZE = 500
+
+# 投稿は (actor_id, rkey) で保存し、URI・DID は actors テーブルと組み合わせて復元する
+_UPSERT_ACTOR_SQL = """
+    INSERT INTO actors (did, handle) VALUES (?, ?)
+    ON CONFLICT(did) DO UPDATE SET handle = excluded.handle WHERE excluded.handle IS NOT NULL
+"""
+_ACTOR_ID = "(SELECT id FROM actors WHERE did = ?)"
+_INSERT_POST_SQL = f"""
+    INSERT OR IGNORE INTO posts (
+        actor_id, rkey, cid, text, created_us,
+        parent_actor_id, parent_rkey, root_actor_id, root_rkey, indexed_at
+    ) VALUES ({_ACTOR_ID}, ?, ?, ?, ?, {_ACTOR_ID}, ?, {_ACTOR_ID}, ?, ?)
+"""
+# URI と created_at（ミリ秒・UTC の ISO 8601）は SQL 側で従来の形に組み立てる（NULL は NULL のまま）
+_SELECT_POSTS_SQL = f"""
+    SELECT 'at://' || a.did || '/{POST_COLLECTION}/' || p.rkey AS uri,
+           p.cid, a.did AS author_did, a.handle AS author_handle, p.text,
+           strftime('%Y-%m-%dT%H:%M:%S', p.created_us / 1000000, 'unixepoch')
+               || printf('.%03dZ', p.created_us / 1000 % 1000) AS created_at,
+           'at://' || pa.did || '/{POST_COLLECTION}/' || p.parent_rkey AS reply_parent,
+           'at://' || ra.did || '/{POST_COLLECTION}/' || p.root_rkey AS reply_root,
+           p.indexed_at, p.created_us, p.id
+    FROM {{source}}
+    JOIN actors a ON a.id = p.actor_id
+    LEFT JOIN actors pa ON pa.id = p.parent_actor_id
+    LEFT JOIN actors ra ON ra.id = p.root_actor_id
+"""
+_POST_KEYS = (
+    "uri", "cid", "author_did", "author_handle", "text",
+    "created_at", "reply_parent", "reply_root", "indexed_at",
+)
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_ISO_RE = re.compile(
+    r"(\d{4})-(\d{2})-(\d{2})"
+    r"(?:[T ](\d{2}):(\d{2})(?::(\d{2})(?:[.,](\d+))?)?)?"
+    r"\s*(Z|[+-]\d{2}:?\d{2})?$",
+    re.IGNORECASE,
+)
+
+# ひらがな・カタカナ
+_KANA_RE = re.compile(r"[\u3040-\u309F\u30A0-\u30FF]")
+
+_SET_STATE_SQL = "INSERT OR REPLACE INTO jetstream_state (key, value) VALUES (?, ?)"
+
+# いいね・リポスト・フォローを保存するテーブル（コレクション -> (テーブル, 対象カラム)）
+ENGAGEMENT_TABLES: Dict[str, Tuple[str, str]] = {
+    "app.bsky.feed.like": ("likes", "subject_uri"),
+    "app.bsky.feed.repost": ("reposts", "subject_uri"),
+    "app.bsky.graph.follow": ("follows", "subject_did"),
+}
+
+
+def _iso_from_time_us(time_us: Optional[int]) -> Optional[str]:
+    """エポックマイクロ秒を createdAt と同じ形式（ミリ秒・UTC）の文字列にする。"""
+    if time_us is None:
+        return None
+    dt = _EPOCH + timedelta(microseconds=time_us)
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.") + f"{dt.microsecond // 1000:03d}Z"
+
+
+def _iso_to_us(value: Optional[str]) -> Optional[int]:
+    """ISO 8601 文字列（日付のみ・タイムゾーンなしは UTC とみなす）をエポックマイクロ秒にする。"""
+    m = _ISO_RE.match(value.strip()) if isinstance(value, str) else None
+    if not m:
+        return None
+    y, mo, d, h, mi, s, frac, tz = m.groups()
+    try:
+        dt = datetime(int(y), int(mo), int(d), int(h or 0), int(mi or 0), int(s or 0), tzinfo=timezone.utc)
+    except ValueError:
+        return None
+    us = (dt - _EPOCH) // timedelta(microseconds=1) + int((frac or "").ljust(6, "0")[:6] or 0)
+    if tz and tz.upper() != "Z":
+        sign = -1 if tz[0] == "-" else 1
+        hh, mm = tz[1:3], tz[-2:]
+        us -= sign * (int(hh) * 3600 + int(mm) * 60) * 1_000_000
+    return us
+
+
+def split_post_uri(uri: Optional[str]) -> Optional[Tuple[str, str]]:
+    """at://did/app.bsky.feed.post/rkey を (did, rkey) に分解する（投稿 URI でなければ None）。"""
+    if not uri or not uri.startswith("at://"):
+        return None
+    parts = uri[5:].split("/")
+    if len(parts) != 3 or parts[1] != POST_COLLECTION or not parts[0] or not parts[2]:
+        return None
+    return parts[0], parts[2]
+
+
+def _engagement_op(
+    collection: str,
+    operation: str,
+    did: str,
+    rkey: str,
+    record: Optional[Dict[str, Any]],
+    time_us: Optional[int],
+    local_only: bool,
+) -> Optional[Tuple[str, tuple]]:
+    """いいね・リポスト・フォローの作成／削除イベントを (SQL, パラメータ) にする。"""
+    table, subject_col = ENGAGEMENT_TABLES[collection]
+    uri = f"at://{did}/{collection}/{rkey}"
+    if operation == "delete":
+        # フォローは解除日時を残してフォロワー増減の集計に使う。いいね・リポストは行を消す。
+        if table == "follows":
+            return (
+                "UPDATE follows SET deleted_at = ? WHERE uri = ? AND deleted_at IS NULL",
+                (_iso_from_time_us(time_us), uri),
+            )
+        return (f"DELETE FROM {table} WHERE uri = ?", (uri,))
+    if operation != "create" or not record:
+        return None
+
+    subject = record.get("subject")
+    if isinstance(subject, dict):
+        subject = subject.get("uri")
+    if not isinstance(subject, str):
+        return None
+    row = (uri, did, subject, record.get("createdAt") or _iso_from_time_us(time_us), time.time())
+    sql = (
+        f"INSERT OR IGNORE INTO {table} (uri, actor_did, {subject_col}, created_at, indexed_at) "
+        "SELECT ?, ?, ?, ?, ?"
+    )
+    # local_only: ローカル DB にある投稿へのいいね・リポストだけを保存する
+    if local_only and subject_col == "subject_uri":
+        ref = split_post_uri(subject)
+        if ref is None:
+            return None
+        return (
+            sql + f" WHERE EXISTS (SELECT 1 FROM posts WHERE actor_id = {_ACTOR_ID} AND rkey = ?)",
+            row + ref,
+        )
+    return (sql, row)
+
+
+def _insert_posts(conn: sqlite3.Connection, posts: List[Dict[str, Any]], indexed_at: float) -> int:
+    """insert_post 形式の dict を actors / posts に保存し、追加した投稿数を返す。
+
+    uri が投稿 URI でないものは保存しない。createdAt が解釈できない投稿は取り込み時刻で代用する。
+    """
+    actors: Dict[str, Optional[str]] = {}
+    rows = []
+    for post in posts:
+        ref = split_post_uri(post.get("uri"))
+        if ref is None:
+            continue
+        did, rkey = ref
+        actors[did] = post.get("author_handle") or actors.get(did)
+        parent = split_post_uri(post.get("reply_parent")) or (None, None)
+        root = split_post_uri(post.get("reply_root")) or (None, None)
+        for ref_did in (parent[0], root[0]):
+            if ref_did:
+                actors.setdefault(ref_did, None)
+        created_us = _iso_to_us(post.get("created_at"))
+        if created_us is None:
+            created_us = int(indexed_at * 1_000_000)
+        rows.append(
+            (did, rkey, post.get("cid"), post.get("text"), created_us, *parent, *root, indexed_at)
+        )
+    if not rows:
+        return 0
+    conn.executemany(_UPSERT_ACTOR_SQL, list(actors.items()))
+    # rowcount はトリガ（FTS 索引）による変更を含まない、文そのものの変更件数
+    return conn.executemany(_INSERT_POST_SQL, rows).rowcount
+
+
+def _post_dict(row: tuple) -> Dict[str, Any]:
+    """_SELECT_POSTS_SQL の 1 行を従来の posts テーブルと同じ形の dict にする。"""
+    return dict(zip(_POST_KEYS, row))
+
+
+# posts_fts（FTS5）を posts と同期させるトリガ
+_FTS_TRIGGERS = (
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_fts_ai AFTER INSERT ON posts BEGIN
+        INSERT INTO posts_fts(rowid, text) VALUES (new.rowid, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_fts_ad AFTER DELETE ON posts BEGIN
+        INSERT INTO posts_fts(posts_fts, rowid, text)
+        VALUES ('delete', old.rowid, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_fts_au AFTER UPDATE OF text ON posts BEGIN
+        INSERT INTO posts_fts(posts_fts, rowid, text)
+        VALUES ('delete', old.rowid, old.text);
+        INSERT INTO posts_fts(rowid, text) VALUES (new.rowid, new.text);
+    END
+    """,
+)
+
+# v6 移行（posts を正規化した形式に作り直す）。1 トランザクションで順に実行する
+_V6_COMPACT_STATEMENTS = (
+    "DROP TRIGGER IF EXISTS posts_fts_ai",
+    "DROP TRIGGER IF EXISTS posts_fts_ad",
+    "DROP TRIGGER IF EXISTS posts_fts_au",
+    """
+    CREATE TABLE actors (
+        id INTEGER PRIMARY KEY,
+        did TEXT NOT NULL UNIQUE,
+        handle TEXT
+    )
+    """,
+    """
+    CREATE TABLE posts_compact (
+        id INTEGER PRIMARY KEY,
+        actor_id INTEGER NOT NULL,
+        rkey TEXT NOT NULL,
+        cid TEXT,
+        text TEXT,
+        created_us INTEGER NOT NULL,
+        parent_actor_id INTEGER,
+        parent_rkey TEXT,
+        root_actor_id INTEGER,
+        root_rkey TEXT,
+        indexed_at REAL,
+        UNIQUE (actor_id, rkey)
+    )
+    """,
+    """
+    INSERT OR IGNORE INTO actors (did)
+        SELECT uri_did(uri) FROM posts WHERE uri_did(uri) IS NOT NULL
+        UNION SELECT uri_did(reply_parent) FROM posts WHERE uri_did(reply_parent) IS NOT NULL
+        UNION SELECT uri_did(reply_root) FROM posts WHERE uri_did(reply_root) IS NOT NULL
+    """,
+    """
+    UPDATE actors SET handle = (
+        SELECT author_handle FROM posts
+        WHERE author_did = actors.did AND author_handle IS NOT NULL LIMIT 1
+    )
+    """,
+    """
+    INSERT OR IGNORE INTO posts_compact (
+        id, actor_id, rkey, cid, text, created_us,
+        parent_actor_id, parent_rkey, root_actor_id, root_rkey, indexed_at
+    )
+    SELECT p.rowid, a.id, uri_rkey(p.uri), p.cid, p.text,
+           COALESCE(iso_to_us(p.created_at), CAST(p.indexed_at * 1000000 AS INTEGER), 0),
+           pa.id, CASE WHEN pa.id IS NOT NULL THEN uri_rkey(p.reply_parent) END,
+           ra.id, CASE WHEN ra.id IS NOT NULL THEN uri_rkey(p.reply_root) END,
+           p.indexed_at
+    FROM posts p
+    JOIN actors a ON a.did = uri_did(p.uri)
+    LEFT JOIN actors pa ON pa.did = uri_did(p.reply_parent)
+    LEFT JOIN actors ra ON ra.did = uri_did(p.reply_root)
+    ORDER BY p.rowid
+    """,
+    "DROP TABLE posts",
+    "ALTER TABLE posts_compact RENAME TO posts",
+    # rowid（id）は索引の末尾に暗黙に含まれるため、(created_us, id) 順の走査に使える
+    "CREATE INDEX idx_posts_created ON posts(created_us)",
+    "CREATE INDEX idx_posts_actor ON posts(actor_id, created_us)",
+    """
+    CREATE INDEX idx_posts_root ON posts(root_actor_id, root_rkey, created_us)
+        WHERE root_rkey IS NOT NULL
+    """,
+    "CREATE INDEX idx_posts_indexed_at ON posts(indexed_at)",
+)
+
+
+class PostWriter:
+    """Jetstream 取り込み用のバッチ書き込みスレッド。
+
+    - 専用スレッドが 1 本の接続を持ち続け、キューに溜まった投稿を executemany でまとめて保存する。
+    - batch_size 件溜まるか、最初の 1 件から flush_interval 秒経つとコミットする。
+    - キューが満杯のときは submit() が待つ（取り込み側へのバックプレッシャー）。
+    - close() はキューに残った投稿を書き切ってから接続を閉じる。
+    - submit_cursor() で渡した Jetstream カーソル（time_us）は、それ以前に submit された投稿と
+      同じトランザクションで jetstream_state に保存される（再接続時の再開位置）。
+    - submit_op() で渡したいいね・リポスト・フォローの SQL は、同じバッチの投稿の後に受信順で実行する。
+      行を変更しなかったもの（local_only で対象の投稿がない・重複・削除対象なし）は records_skipped に数える。
+    """
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        db_path: str,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        queue_size: int = 50000,
+    ):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue: "queue.Queue[Any]" = queue.Queue(maxsize=queue_size)
+        self.inserted = 0
+        self.received = 0
+        self.records_received = 0
+        self.records_applied = 0
+        self.records_skipped = 0
+        self.batches = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name="bsky-db-writer", daemon=True)
+        self._closed = False
+
+    def start(self) -> "PostWriter":
+        self._thread.start()
+        atexit.register(self.close)
+        return self
+
+    def submit(self, post_data: Dict[str, Any]) -> None:
+        self.queue.put(post_data)
+
+    def submit_cursor(self, time_us: int) -> None:
+        self.queue.put(("cursor", time_us))
+
+    def submit_op(self, sql: str, params: tuple) -> None:
+        self.queue.put(("op", sql, params))
+
+    def close(self, timeout: float = 10.0) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread.is_alive():
+            self.queue.put(self._STOP)
+            self._thread.join(timeout)
+
+    def _flush(
+        self,
+        conn: sqlite3.Connection,
+        batch: List[Dict[str, Any]],
+        cursor: Optional[int] = None,
+        ops: Optional[List[Tuple[str, tuple]]] = None,
+    ) -> None:
+        if not batch and cursor is None and not ops:
+            return
+        t0 = time.perf_counter()
+        now = time.time()
+        try:
+            with conn:
+                inserted = _insert_posts(conn, batch, now)
+                # 同じ SQL が続く区間ごとに executemany する（受信順は保つ）
+                applied = 0
+                i = 0
+                ops = ops or []
+                while i < len(ops):
+                    j = i
+                    while j < len(ops) and ops[j][0] == ops[i][0]:
+                        j += 1
+                    applied += conn.executemany(ops[i][0], [params for _, params in ops[i:j]]).rowcount
+                    i = j
+                if cursor is not None:
+                    conn.execute(_SET_STATE_SQL, ("cursor", str(cursor)))
+            self.inserted += inserted
+            self.records_applied += applied
+            self.records_skipped += len(ops) - applied
+            self.batches += 1
+        except Exception as e:
+            self.errors += 1
+            print(f"DB Batch Insert Error: {e}", file=sys.stderr)
+        self.busy_seconds += time.perf_counter() - t0
+
+    def _run(self) -> None:
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        batch: List[Dict[str, Any]] = []
+        ops: List[Tuple[str, tuple]] = []
+        cursor: Optional[int] = None
+        deadline = None
+        try:
+            while True:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    item = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = None
+
+                if item is self._STOP:
+                    break
+                if item is not None:
+                    cursor = self._collect(item, batch, ops, cursor)
+                    if deadline is None:
+                        deadline = time.monotonic() + self.flush_interval
+
+                if len(batch) + len(ops) >= self.batch_size or (
+                    deadline is not None and time.monotonic() >= deadline
+                ):
+                    self._flush(conn, batch, cursor, ops)
+                    batch = []
+                    ops = []
+                    cursor = None
+                    deadline = None
+
+            # 停止要求後もキューに残っている分を書き切る
+            while True:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not self._STOP:
+                    cursor = self._collect(item, batch, ops, cursor)
+            self._flush(conn, batch, cursor, ops)
+        finally:
+            conn.close()
+
+    def _collect(
+        self,
+        item: Any,
+        batch: List[Dict[str, Any]],
+        ops: List[Tuple[str, tuple]],
+        cursor: Optional[int],
+    ) -> Optional[int]:
+        """キューから取り出した 1 件をバッチに振り分け、更新後のカーソルを返す。"""
+        if isinstance(item, tuple):
+            if item[0] == "cursor":
+                return item[1] if cursor is None else max(cursor, item[1])
+            ops.append((item[1], item[2]))
+            self.records_received += 1
+        else:
+            batch.append(item)
+            self.received += 1
+        return cursor
+
+    def stats(self) -> Dict[str, Any]:
+        elapsed = max(1e-9, time.time() - self.started_at)
+        return {
+            "received": self.received,
+            "inserted": self.inserted,
+            "records_received": self.records_received,
+            "records_applied": self.records_applied,
+            "records_skipped": self.records_skipped,
+            "batches": self.batches,
+            "errors": self.errors,
+            "queued": self.queue.qsize(),
+            "inserts_per_sec": round(self.inserted / elapsed, 1),
+            "max_inserts_per_sec": round(self.inserted / self.busy_seconds, 1)
+            if self.busy_seconds
+            else None,
+        }
+
+
+class DBMaintainer:
+    """保持期間・最大件数を超えた行を少しずつ削除し、空きページを返却するバックグラウンドスレッド。
+
+    - 保持期間（retention_seconds）は posts といいね・リポスト・フォローの indexed_at で判定する。
+      最大件数（max_posts）は posts のみで、取り込みの古いものから削除する。
+    - 削除は batch_size 行ずつの短いトランザクションで行い、間に pause 秒休む。
+      取り込み（PostWriter）は WAL の書き込みロックを一瞬待つだけで止まらない。
+    - 削除後は PRAGMA incremental_vacuum で空きページを vacuum_pages ずつファイルから切り詰める
+      （auto_vacuum=INCREMENTAL の DB のみ）。
+    """
+
+    RETENTION_TABLES = ("posts", "likes", "reposts", "follows")
+
+    def __init__(
+        self,
+        db_path: str,
+        retention_seconds: Optional[float] = None,
+        max_posts: Optional[int] = None,
+        interval: float = 300.0,
+        batch_size: int = 500,
+        pause: float = 0.05,
+        vacuum_pages: int = 256,
+    ):
+        self.db_path = db_path
+        self.retention_seconds = retention_seconds
+        self.max_posts = max_posts
+        self.interval = interval
+        self.batch_size = batch_size
+        self.pause = pause
+        self.vacuum_pages = vacuum_pages
+        self.deleted: Dict[str, int] = {}
+        self.vacuumed_pages = 0
+        self.runs = 0
+        self.errors = 0
+        self.last_run: Optional[float] = None
+        self.last_run_seconds: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="bsky-db-maintenance", daemon=True)
+
+    def start(self) -> "DBMaintainer":
+        self._thread.start()
+        atexit.register(self.close)
+        return self
+
+    def close(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def _delete_batches(self, conn: sqlite3.Connection, table: str, where: str, params: tuple) -> int:
+        total = 0
+        sql = (
+            f"DELETE FROM {table} WHERE rowid IN "
+            f"(SELECT rowid FROM {table} WHERE {where} LIMIT ?)"
+        )
+        while not self._stop.is_set():
+            with conn:
+                n = conn.execute(sql, params + (self.batch_size,)).rowcount
+            total += n
+            if n < self.batch_size:
+                break
+            time.sleep(self.pause)
+        if total:
+            self.deleted[table] = self.deleted.get(table, 0) + total
+        return total
+
+    def run_once(self) -> Dict[str, int]:
+        """保持ポリシーを 1 回適用し、テーブルごとの削除件数を返す。"""
+        t0 = time.perf_counter()
+        deleted: Dict[str, int] = {}
+        conn = sqlite3.connect(self.db_path, timeout=30.0)
+        try:
+            if self.retention_seconds:
+                cutoff = time.time() - self.retention_seconds
+                for table in self.RETENTION_TABLES:
+                    if BlueskyDB._has_table(conn, table):
+                        deleted[table] = self._delete_batches(
+                            conn, table, "indexed_at < ?", (cutoff,)
+                        )
+            if self.max_posts:
+                # id は取り込み順に増えるため、新しい方から max_posts 件を残して境界より前を削除する
+                # （同じバッチの投稿は indexed_at が同じなので、indexed_at では境界が定まらない）
+                row = conn.execute(
+                    "SELECT id FROM posts ORDER BY id DESC LIMIT 1 OFFSET ?",
+                    (self.max_posts,),
+                ).fetchone()
+                if row is not None:
+                    n = self._delete_batches(conn, "posts", "id <= ?", (row[0],))
+                    deleted["posts"] = deleted.get("posts", 0) + n
+            self._incremental_vacuum(conn)
+        finally:
+            conn.close()
+        self.runs += 1
+        self.last_run = time.time()
+        self.last_run_seconds = round(time.perf_counter() - t0, 3)
+        return deleted
+
+    def _incremental_vacuum(self, conn: sqlite3.Connection) -> None:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            return
+        while not self._stop.is_set():
+            free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if free <= 0:
+                break
+            # execute() だと 1 ステップ（1 ページ）しか進まないため、最後まで実行する executescript を使う
+            conn.executescript(f"PRAGMA incremental_vacuum({min(free, self.vacuum_pages)})")
+            self.vacuumed_pages += free - conn.execute("PRAGMA freelist_count").fetchone()[0]
+            time.sleep(self.pause)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                self.errors += 1
+                print(f"DB Maintenance Error: {e}", file=sys.stderr)
+            self._stop.wait(self.interval)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "retention_seconds": self.retention_seconds,
+            "max_posts": self.max_posts,
+            "runs": self.runs,
+            "errors": self.errors,
+            "deleted": dict(self.deleted),
+            "vacuumed_pages": self.vacuumed_pages,
+            "last_run": self.last_run,
+            "last_run_seconds": self.last_run_seconds,
+        }
+
+
+class ReadPool:
+    """検索用の読み取り専用接続プール。
+
+    - 接続は mode=ro（query_only）で開く。WAL なので取り込み中の書き込みと互いにブロックしない。
+    - 接続を使い回すため、ページキャッシュとスキーマの解析結果がクエリ間で残る。
+    - 同時に使える接続は size 本まで（超えた分は空くのを待つ）。
+    - timeout 秒を超えたクエリは progress handler で中断し、TimeoutError を送出する。
+    """
+
+    # progress handler を呼ぶ間隔（SQLite VM 命令数）
+    PROGRESS_STEPS = 10000
+
+    def __init__(self, db_path: str, size: int = 4, timeout: Optional[float] = 5.0):
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self.queries = 0
+        self.timeouts = 0
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._opened = 0
+        self._closed = False
+
+    def _connect(self) -> sqlite3.Connection:
+        uri = "file:" + urllib.request.pathname2url(self.db_path) + "?mode=ro"
+        # 実行スレッド（run_blocking のワーカー）は毎回変わりうるが、同時に使うのは 1 スレッドだけ
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        conn.execute("PRAGMA query_only=1")
+        self._opened += 1
+        return conn
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        """接続を 1 本借りる。ブロック内のクエリは timeout（省略時はプールの既定値）秒で中断される。"""
+        timeout = self.timeout if timeout is None else timeout
+        self._slots.acquire()
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+            if timeout:
+                deadline = time.monotonic() + timeout
+                conn.set_progress_handler(
+                    lambda: 1 if time.monotonic() > deadline else 0, self.PROGRESS_STEPS
+                )
+            self.queries += 1
+            try:
+                yield conn
+            except sqlite3.OperationalError as e:
+                if "interrupted" not in str(e):
+                    raise
+                self.timeouts += 1
+                raise TimeoutError(f"Query timed out after {timeout} seconds") from e
+            finally:
+                conn.set_progress_handler(None, 0)
+                if self._closed:
+                    conn.close()
+                else:
+                    self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": self.size,
+            "timeout": self.timeout,
+            "opened": self._opened,
+            "idle": self._idle.qsize(),
+            "queries": self.queries,
+            "timeouts": self.timeouts,
+        }
 
 
 class BlueskyDB:
@@ -11,18 +672,25 @@ class BlueskyDB:
     def __init__(self, db_path: str = "~/.mcpbluesky/bluesky_posts.db"):
         self.db_path = self._expand_db_path(db_path)
         Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.writer: Optional[PostWriter] = None
+        self.maintainer: Optional[DBMaintainer] = None
+        self.fts_enabled = False
         self.init_db()
+        self.reader = ReadPool(self.db_path)
 
     def _expand_db_path(self, path: str) -> str:
-        import os
-
         return os.path.expandvars(os.path.expanduser(path))
 
     def init_db(self) -> None:
         """データベースとテーブルの初期化"""
         conn = sqlite3.connect(self.db_path)
+        # 新規 DB はテーブル作成前に設定する必要がある（既存 DB は v5 マイグレーションで変換）
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        # WAL にすると取り込み（書き込み）中でも検索（読み取り）がブロックされない
+        conn.execute("PRAGMA journal_mode=WAL")
         cursor = conn.cursor()
 
+        # 初期（v0）の形式。v6 マイグレーションで正規化した形式に移行される
         cursor.execute(
             """
             CREATE TABLE IF NOT EXISTS posts (
@@ -40,8 +708,212 @@ class BlueskyDB:
         )
 
         conn.commit()
+        self._migrate(conn)
+        self.fts_enabled = self._has_table(conn, "posts_fts")
         conn.close()
 
+    @staticmethod
+    def _has_table(conn: sqlite3.Connection, name: str) -> bool:
+        row = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+        ).fetchone()
+        return row is not None
+
+    def _migrate(self, conn: sqlite3.Connection) -> None:
+        """PRAGMA user_version によるスキーマのバージョン管理（古い DB は順に移行する）"""
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1:
+            self._migrate_v1_fts(conn)
+        if version < 2:
+            self._migrate_v2_indexes(conn)
+        if version < 3:
+            self._migrate_v3_jetstream_state(conn)
+        if version < 4:
+            self._migrate_v4_engagement(conn)
+        if version < 5:
+            self._migrate_v5_retention(conn)
+        if version < 6:
+            self._migrate_v6_compact(conn)
+
+    def _migrate_v1_fts(self, conn: sqlite3.Connection) -> None:
+        """v1: 本文の全文検索用 FTS5 インデックス（trigram）を作成し、既存行を取り込む。
+
+        trigram トークナイザは空白で区切られない日本語も 3 文字単位で索引するため、
+        LIKE '%kw%' と同じ部分一致をインデックスで引ける。
+        FTS5 が使えない SQLite ではスキップし、検索は LIKE にフォールバックする。
+        """
+        self._create_fts(conn)
+        conn.execute("PRAGMA user_version = 1")
+        conn.commit()
+
+    @staticmethod
+    def _create_fts(conn: sqlite3.Connection, rebuild: bool = True) -> bool:
+        """posts.text の FTS5（trigram）索引と同期用トリガを作り、既存行を取り込む。"""
+        try:
+            with conn:
+                conn.execute(
+                    """
+                    CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(
+                        text, content='posts', content_rowid='rowid', tokenize='trigram'
+                    )
+                    """
+                )
+                for sql in _FTS_TRIGGERS:
+                    conn.execute(sql)
+                # 既存の投稿を索引に取り込む
+                if rebuild:
+                    conn.execute("INSERT INTO posts_fts(posts_fts) VALUES ('rebuild')")
+            return True
+        except sqlite3.OperationalError as e:
+            print(f"FTS5 (trigram) is not available, falling back to LIKE search: {e}", file=sys.stderr)
+            return False
+
+    def _migrate_v2_indexes(self, conn: sqlite3.Connection) -> None:
+        """v2: 新しい順・投稿者・スレッドでの絞り込みとキーセットページング用のインデックス。"""
+        with conn:
+            conn.executescript(
+                """
+                CREATE INDEX IF NOT EXISTS idx_posts_created_at ON posts(created_at, uri);
+                CREATE INDEX IF NOT EXISTS idx_posts_author ON posts(author_did, created_at, uri);
+                CREATE INDEX IF NOT EXISTS idx_posts_reply_root ON posts(reply_root, created_at, uri);
+                PRAGMA user_version = 2;
+                """
+            )
+
+    def _migrate_v3_jetstream_state(self, conn: sqlite3.Connection) -> None:
+        """v3: Jetstream の再開カーソルなどを保存する key-value テーブル。"""
+        with conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS jetstream_state (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                );
+                PRAGMA user_version = 3;
+                """
+            )
+
+    def _migrate_v4_engagement(self, conn: sqlite3.Connection) -> None:
+        """v4: Jetstream から取り込むいいね・リポスト・フォローのテーブル。
+
+        レコード本体は保存せず、集計に必要な (uri, 実行者, 対象, 日時) だけを持つ。
+        """
+        with conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS likes (
+                    uri TEXT PRIMARY KEY,
+                    actor_did TEXT NOT NULL,
+                    subject_uri TEXT NOT NULL,
+                    created_at TEXT,
+                    indexed_at REAL
+                );
+                CREATE INDEX IF NOT EXISTS idx_likes_subject ON likes(subject_uri);
+                CREATE INDEX IF NOT EXISTS idx_likes_actor ON likes(actor_did, created_at);
+
+                CREATE TABLE IF NOT EXISTS reposts (
+                    uri TEXT PRIMARY KEY,
+                    actor_did TEXT NOT NULL,
+                    subject_uri TEXT NOT NULL,
+                    created_at TEXT,
+                    indexed_at REAL
+                );
+                CREATE INDEX IF NOT EXISTS idx_reposts_subject ON reposts(subject_uri);
+                CREATE INDEX IF NOT EXISTS idx_reposts_actor ON reposts(actor_did, created_at);
+
+                CREATE TABLE IF NOT EXISTS follows (
+                    uri TEXT PRIMARY KEY,
+                    actor_did TEXT NOT NULL,
+                    subject_did TEXT NOT NULL,
+                    created_at TEXT,
+                    indexed_at REAL,
+                    deleted_at TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_follows_subject ON follows(subject_did, created_at);
+                CREATE INDEX IF NOT EXISTS idx_follows_subject_deleted
+                    ON follows(subject_did, deleted_at) WHERE deleted_at IS NOT NULL;
+                CREATE INDEX IF NOT EXISTS idx_follows_actor ON follows(actor_did);
+                PRAGMA user_version = 4;
+                """
+            )
+
+    def _migrate_v5_retention(self, conn: sqlite3.Connection) -> None:
+        """v5: 保持期間による削除用の indexed_at インデックスと、auto_vacuum=INCREMENTAL への変換。
+
+        既存 DB の auto_vacuum 変更には VACUUM（DB の作り直し）が必要なため、初回のみ時間がかかる。
+        """
+        with conn:
+            conn.executescript(
+                """
+                CREATE INDEX IF NOT EXISTS idx_posts_indexed_at ON posts(indexed_at);
+                CREATE INDEX IF NOT EXISTS idx_likes_indexed_at ON likes(indexed_at);
+                CREATE INDEX IF NOT EXISTS idx_reposts_indexed_at ON reposts(indexed_at);
+                CREATE INDEX IF NOT EXISTS idx_follows_indexed_at ON follows(indexed_at);
+                """
+            )
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            print("Converting database to auto_vacuum=INCREMENTAL (one-time VACUUM)...", file=sys.stderr)
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("VACUUM")
+        conn.execute("PRAGMA user_version = 5")
+        conn.commit()
+
+    def _migrate_v6_compact(self, conn: sqlite3.Connection) -> None:
+        """v6: posts を正規化した省サイズの形式に作り直す。
+
+        - DID は actors テーブル（整数 id）に 1 回だけ保存し、投稿・返信先・スレッド root は
+          (actor_id, rkey) で持つ（URI は at://did/app.bsky.feed.post/rkey として復元できる）
+        - created_at は整数のエポックマイクロ秒（created_us）。解釈できない値は取り込み時刻で代用する
+        - uri が投稿 URI でない行は移行しない
+        - rowid は引き継ぐため、FTS 索引は（移行しなかった行がなければ）作り直さずにそのまま使う
+        """
+        conn.create_function("uri_did", 1, lambda u: (split_post_uri(u) or (None, None))[0], deterministic=True)
+        conn.create_function("uri_rkey", 1, lambda u: (split_post_uri(u) or (None, None))[1], deterministic=True)
+        conn.create_function("iso_to_us", 1, _iso_to_us, deterministic=True)
+        had_fts = self._has_table(conn, "posts_fts")
+        total = conn.execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+        if total:
+            print("Migrating posts to the compact schema (one-time)...", file=sys.stderr)
+        # executescript は文ごとにコミットしてしまうので、1 文ずつ実行して全体を 1 トランザクションにする。
+        # 途中で失敗すれば user_version = 5 の元の状態に戻り、次回の起動で最初からやり直せる。
+        conn.execute("BEGIN")
+        try:
+            for sql in _V6_COMPACT_STATEMENTS:
+                conn.execute(sql)
+            if had_fts:
+                # FTS 表は content='posts' を名前で参照するので、新しい posts にトリガを張り直すだけでよい
+                for sql in _FTS_TRIGGERS:
+                    conn.execute(sql)
+                if conn.execute("SELECT COUNT(*) FROM posts").fetchone()[0] != total:
+                    conn.execute("INSERT INTO posts_fts(posts_fts) VALUES ('rebuild')")
+            conn.execute("PRAGMA user_version = 6")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        # 作り直しで空いたページを返却する
+        conn.execute("VACUUM")
+
+    def get_jetstream_cursor(self) -> Optional[int]:
+        """保存済みの Jetstream カーソル（最後に取り込んだイベントの time_us）を返す。"""
+        with self.reader.connection() as conn:
+            row = conn.execute(
+                "SELECT value FROM jetstream_state WHERE key = 'cursor'"
+            ).fetchone()
+        return int(row[0]) if row and row[0] else None
+
+    def save_jetstream_cursor(self, time_us: int) -> None:
+        """Jetstream カーソルを保存する（writer が動いていれば投稿と同じトランザクションで保存）。"""
+        if self.writer is not None:
+            self.writer.submit_cursor(time_us)
+            return
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                conn.execute(_SET_STATE_SQL, ("cursor", str(time_us)))
+        finally:
+            conn.close()
+
     def is_japanese(self, text: str, langs: Optional[List[str]] = None) -> bool:
         """投稿が日本語かどうかを判定する。
 
@@ -55,65 +927,337 @@ class BlueskyDB:
         if not text:
             return False
 
-        japanese_pattern = re.compile(r"[\u3040-\u309F\u30A0-\u30FF]")
-        if japanese_pattern.search(text):
+        if _KANA_RE.search(text):
             return True
 
         return False
 
+    def start_writer(self, batch_size: int = 500, flush_interval: float = 1.0) -> PostWriter:
+        """Jetstream 取り込み用のバッチ書き込みスレッドを開始する。"""
+        if self.writer is None:
+            self.writer = PostWriter(
+                self.db_path, batch_size=batch_size, flush_interval=flush_interval
+            ).start()
+        return self.writer
+
+    def start_maintainer(
+        self,
+        retention_seconds: Optional[float] = None,
+        max_posts: Optional[int] = None,
+        interval: float = 300.0,
+    ) -> DBMaintainer:
+        """保持期間・最大件数による削除と incremental_vacuum を行うスレッドを開始する。"""
+        if self.maintainer is None:
+            self.maintainer = DBMaintainer(
+                self.db_path,
+                retention_seconds=retention_seconds,
+                max_posts=max_posts,
+                interval=interval,
+            ).start()
+        return self.maintainer
+
+    def configure_reader(self, size: int = 4, timeout: Optional[float] = 5.0) -> ReadPool:
+        """検索用の読み取り専用接続プールの本数とクエリのタイムアウト（秒、0 で無制限）を設定する。"""
+        old = self.reader
+        self.reader = ReadPool(self.db_path, size=size, timeout=timeout)
+        old.close()
+        return self.reader
+
+    def close(self) -> None:
+        """バッチ書き込みスレッドを止め、溜まっている投稿を書き切る。"""
+        if self.maintainer is not None:
+            self.maintainer.close()
+        if self.writer is not None:
+            self.writer.close()
+        self.reader.close()
+
+    def db_stats(self) -> Dict[str, Any]:
+        """DB ファイルのサイズ・ページ使用状況・テーブルごとの行数を返す。"""
+        sizes = {}
+        for suffix in ("", "-wal"):
+            path = self.db_path + suffix
+            sizes["file_bytes" if not suffix else "wal_bytes"] = (
+                os.path.getsize(path) if os.path.exists(path) else 0
+            )
+        with self.reader.connection() as conn:
+            pragmas = {
+                name: conn.execute(f"PRAGMA {name}").fetchone()[0]
+                for name in ("page_size", "page_count", "freelist_count", "auto_vacuum", "user_version")
+            }
+            rows = {}
+            for table in ("actors",) + DBMaintainer.RETENTION_TABLES:
+                if self._has_table(conn, table):
+                    rows[table] = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            oldest, newest = conn.execute("SELECT MIN(indexed_at), MAX(indexed_at) FROM posts").fetchone()
+        pragmas["auto_vacuum"] = {0: "none", 1: "full", 2: "incremental"}.get(
+            pragmas["auto_vacuum"], pragmas["auto_vacuum"]
+        )
+        stats: Dict[str, Any] = {"path": self.db_path, **sizes, **pragmas, "rows": rows}
+        stats["free_bytes"] = pragmas["freelist_count"] * pragmas["page_size"]
+        stats["posts_indexed_at"] = {"oldest": oldest, "newest": newest}
+        if self.maintainer is not None:
+            stats["maintenance"] = self.maintainer.stats()
+        stats["read_pool"] = self.reader.stats()
+        return stats
+
     def insert_post(self, post_data: Dict[str, Any]) -> None:
-        """投稿データをDBに保存する"""
+        """投稿データをDBに保存する（writer が動いていればキューに積む）"""
+        if self.writer is not None:
+            self.writer.submit(post_data)
+            return
+
         conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
 
         try:
-            cursor.execute(
-                """
-                INSERT OR IGNORE INTO posts (
-                    uri, cid, author_did, author_handle, text,
-                    created_at, reply_parent, reply_root, indexed_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    post_data.get("uri"),
-                    post_data.get("cid"),
-                    post_data.get("author_did"),
-                    post_data.get("author_handle"),
-                    post_data.get("text"),
-                    post_data.get("created_at"),
-                    post_data.get("reply_parent"),
-                    post_data.get("reply_root"),
-                    time.time(),
-                ),
-            )
-            conn.commit()
+            with conn:
+                _insert_posts(conn, [post_data], time.time())
         except Exception as e:
-            print(f"DB Insert Error: {e}")
+            print(f"DB Insert Error: {e}", file=sys.stderr)
         finally:
             conn.close()
 
-    def search_posts(self, keyword: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
-        """保存された投稿を検索する"""
+    def apply_record_event(
+        self,
+        collection: str,
+        operation: str,
+        did: str,
+        rkey: str,
+        record: Optional[Dict[str, Any]] = None,
+        time_us: Optional[int] = None,
+        local_only: bool = True,
+    ) -> bool:
+        """いいね・リポスト・フォローの作成／削除を保存する（writer が動いていればキューに積む）。
+
+        local_only=True のとき、いいね・リポストはローカル DB にある投稿が対象のものだけ保存する。
+        対象外のコレクションや不正なレコード、行を変更しなかった場合（local_only で対象の投稿がないなど）は
+        False を返す。writer が動いていれば積んだ時点で True を返し、変更しなかった件数は
+        writer の records_skipped に数える。
+        """
+        if collection not in ENGAGEMENT_TABLES:
+            return False
+        op = _engagement_op(collection, operation, did, rkey, record, time_us, local_only)
+        if op is None:
+            return False
+        if self.writer is not None:
+            self.writer.submit_op(*op)
+            return True
+
         conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        try:
+            with conn:
+                return conn.execute(*op).rowcount > 0
+        except Exception as e:
+            print(f"DB Insert Error: {e}", file=sys.stderr)
+            return False
+        finally:
+            conn.close()
 
-        query = "SELECT * FROM posts"
-        params: list[Any] = []
+    def engagement_counts(self, uris: List[str]) -> Dict[str, Dict[str, int]]:
+        """投稿 URI ごとのいいね数・リポスト数（ローカルに取り込んだ分）を返す。"""
+        counts = {uri: {"likes": 0, "reposts": 0} for uri in uris}
+        if not uris:
+            return counts
+        unique = list(counts)
+        with self.reader.connection() as conn:
+            # SQLite のプレースホルダ数の上限に掛からないよう、IN 句は _IN_CHUNK_SIZE 件ずつに分ける
+            for i in range(0, len(unique), _IN_CHUNK_SIZE):
+                chunk = unique[i : i + _IN_CHUNK_SIZE]
+                marks = ",".join("?" * len(chunk))
+                for table, key in (("likes", "likes"), ("reposts", "reposts")):
+                    rows = conn.execute(
+                        f"SELECT subject_uri, COUNT(*) FROM {table} "
+                        f"WHERE subject_uri IN ({marks}) GROUP BY subject_uri",
+                        tuple(chunk),
+                    ).fetchall()
+                    for uri, n in rows:
+                        counts[uri][key] = n
+        return counts
 
-        if keyword:
-            query += " WHERE text LIKE ?"
-            params.append(f"%{keyword}%")
+    def top_posts(
+        self, metric: str = "likes", since: Optional[str] = None, limit: int = 20
+    ) -> List[Dict[str, Any]]:
+        """いいね（metric="likes"）またはリポスト（"reposts"）の多い投稿を返す。
 
-        query += " ORDER BY created_at DESC LIMIT ?"
+        since を指定すると、その日時（ISO 8601）以降のいいね・リポストだけを数える。
+        """
+        if metric not in ("likes", "reposts"):
+            raise ValueError(f"Invalid metric: {metric} (use 'likes' or 'reposts')")
+        query = f"SELECT subject_uri, COUNT(*) AS n FROM {metric}"
+        params: list[Any] = []
+        if since:
+            query += " WHERE created_at >= ?"
+            params.append(since)
+        query += " GROUP BY subject_uri ORDER BY n DESC LIMIT ?"
         params.append(limit)
 
-        cursor.execute(query, tuple(params))
-        rows = cursor.fetchall()
+        with self.reader.connection() as conn:
+            rows = conn.execute(query, tuple(params)).fetchall()
+            results = []
+            post_sql = (
+                _SELECT_POSTS_SQL.format(source="posts p")
+                + f" WHERE p.actor_id = {_ACTOR_ID} AND p.rkey = ?"
+            )
+            for subject_uri, n in rows:
+                item = {"uri": subject_uri, metric: n}
+                ref = split_post_uri(subject_uri)
+                post = conn.execute(post_sql, ref).fetchone() if ref else None
+                if post is not None:
+                    post = _post_dict(post)
+                    item.update({k: post[k] for k in ("author_did", "text", "created_at")})
+                results.append(item)
+        return results
+
+    def follower_delta(
+        self, did: str, since: Optional[str] = None, until: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """DID のフォロワー増減（取り込んだフォロー／解除イベントから集計）を返す。
 
-        results: list[dict[str, Any]] = []
-        for row in rows:
-            results.append(dict(row))
+        フォロー作成を取り込んでいない相手の解除は、対象が分からないため数えられない。
+        """
+        def window(column: str) -> Tuple[str, list]:
+            cond, params = f"subject_did = ? AND {column} IS NOT NULL", [did]
+            if since:
+                cond += f" AND {column} >= ?"
+                params.append(since)
+            if until:
+                cond += f" AND {column} < ?"
+                params.append(until)
+            return cond, params
 
-        conn.close()
-        return results
+        with self.reader.connection() as conn:
+            cond, params = window("created_at")
+            gained = conn.execute(f"SELECT COUNT(*) FROM follows WHERE {cond}", params).fetchone()[0]
+            cond, params = window("deleted_at")
+            lost = conn.execute(f"SELECT COUNT(*) FROM follows WHERE {cond}", params).fetchone()[0]
+            active = conn.execute(
+                "SELECT COUNT(*) FROM follows WHERE subject_did = ? AND deleted_at IS NULL", (did,)
+            ).fetchone()[0]
+        return {
+            "did": did,
+            "since": since,
+            "until": until,
+            "gained": gained,
+            "lost": lost,
+            "net": gained - lost,
+            "followers_seen": active,
+        }
+
+    @staticmethod
+    def encode_cursor(created_us: int, post_id: int) -> str:
+        raw = json.dumps([created_us, post_id]).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[int, int]:
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            created_us, post_id = json.loads(raw)
+            if not isinstance(created_us, int) or not isinstance(post_id, int):
+                raise ValueError
+            return created_us, post_id
+        except Exception:
+            raise ValueError(f"Invalid cursor: {cursor}")
+
+    def search_posts(
+        self,
+        keyword: Optional[str] = None,
+        limit: int = 50,
+        order: str = "recent",
+        author_did: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        reply_root: Optional[str] = None,
+        cursor: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """保存された投稿を検索する（引数は search_posts_page と同じ）"""
+        return self.search_posts_page(
+            keyword=keyword,
+            limit=limit,
+            order=order,
+            author_did=author_did,
+            since=since,
+            until=until,
+            reply_root=reply_root,
+            cursor=cursor,
+        )["posts"]
+
+    def search_posts_page(
+        self,
+        keyword: Optional[str] = None,
+        limit: int = 50,
+        order: str = "recent",
+        author_did: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        reply_root: Optional[str] = None,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """保存された投稿を検索し、{"posts": [...], "cursor": 次ページのカーソル} を返す。
+
+        order:
+          - "recent": 新しい順（created_us, id の降順）。cursor によるキーセットページングに対応
+          - "rank": キーワードとの関連度順（FTS5 の bm25）。キーワード未指定時は recent と同じ。
+            ページングは行わない（cursor は常に None）
+        author_did / reply_root: 投稿者・スレッドの root URI で絞り込む
+        since / until: created_at（ISO 8601 文字列）の範囲 [since, until) で絞り込む
+        cursor: 前回の結果の cursor。OFFSET を使わないため深いページでも 1 ページ分のコストで済む
+        """
+        use_fts = bool(keyword and self.fts_enabled and len(keyword) >= 3)
+        ranked = order == "rank" and use_fts
+
+        where: list[str] = []
+        params: list[Any] = []
+
+        # trigram 索引は 3 文字以上のキーワードでのみ使える。それ未満は LIKE で走査する。
+        if use_fts:
+            query = _SELECT_POSTS_SQL.format(source="posts_fts JOIN posts p ON p.id = posts_fts.rowid")
+            where.append("posts_fts MATCH ?")
+            params.append('"' + keyword.replace('"', '""') + '"')
+        else:
+            query = _SELECT_POSTS_SQL.format(source="posts p")
+            if keyword:
+                where.append("p.text LIKE ?")
+                params.append(f"%{keyword}%")
+
+        if author_did:
+            where.append(f"p.actor_id = {_ACTOR_ID}")
+            params.append(author_did)
+        if reply_root:
+            root = split_post_uri(reply_root)
+            if root is None:
+                return {"posts": [], "cursor": None}
+            where.append(f"p.root_actor_id = {_ACTOR_ID} AND p.root_rkey = ?")
+            params.extend(root)
+        for name, value, op in (("since", since, ">="), ("until", until, "<")):
+            if value:
+                us = _iso_to_us(value)
+                if us is None:
+                    raise ValueError(f"Invalid {name}: {value} (use ISO 8601)")
+                where.append(f"p.created_us {op} ?")
+                params.append(us)
+        if cursor and not ranked:
+            where.append("(p.created_us, p.id) < (?, ?)")
+            params.extend(self.decode_cursor(cursor))
+
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        if ranked:
+            query += " ORDER BY bm25(posts_fts)"
+        else:
+            query += " ORDER BY p.created_us DESC, p.id DESC"
+
+        # 1 件多く取得して次ページの有無を判定する
+        query += " LIMIT ?"
+        params.append(limit + 1)
+
+        with self.reader.connection() as conn:
+            rows = conn.execute(query, tuple(params)).fetchall()
+
+        results: list[dict[str, Any]] = [_post_dict(row) for row in rows[:limit]]
+
+        next_cursor = None
+        if not ranked and len(rows) > limit and results:
+            last = rows[limit - 1]
+            next_cursor = self.encode_cursor(last[-2], last[-1])
+
+        return {"posts": results, "cursor": next_cursor}
@@ -1,32 +1,318 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
+import io
 import ssl
+import sys
 import json
 import time
+import base64
 import threading
+import http.client
+import urllib.error
 import urllib.parse
 import urllib.request
 from html.parser import HTMLParser
 
+from .http_cache import ResponseCache
+from .ratelimit import RateLimiter
+from .singleflight import SingleFlight
+
 ssl._create_default_https_context = ssl._create_unverified_context
 
 APPVIEW = "https://public.api.bsky.app"
 UA = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127 Safari/537.36"
 
-_RATE_LOCK = threading.Lock()
-_LAST_REQUEST_TS = 0.0
-_MIN_INTERVAL = 0.2
+RATE_LIMITER = RateLimiter()
+RESPONSE_CACHE = ResponseCache()
+# 同じ GET（base_url, path, params, 実行アカウント）が同時に来たら 1 回の送信にまとめる
+SINGLE_FLIGHT = SingleFlight()
+
+
+def jwt_claims(token: str | None) -> dict:
+    """JWT のペイロード（sub / exp など）を署名検証せずに取り出す。読めなければ空の dict。"""
+    try:
+        payload = (token or "").split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+        return claims if isinstance(claims, dict) else {}
+    except Exception:
+        return {}
+
+
+def identity_from_headers(headers: dict | None) -> str:
+    """Authorization ヘッダの JWT（sub）から実行アカウントの DID を取り出す。未認証なら "anon"。"""
+    auth = (headers or {}).get("Authorization", "")
+    if not auth.startswith("Bearer "):
+        return "anon"
+    return jwt_claims(auth[len("Bearer "):]).get("sub") or "anon"
+
+
+class XrpcError(urllib.error.HTTPError):
+    """XRPC のエラー応答（{"error": ..., "message": ...}）。error に ExpiredToken などが入る。"""
+
+    def __init__(self, url: str, code: int, reason: str, headers, body: str):
+        super().__init__(url, code, reason, headers, io.BytesIO(body.encode("utf-8")))
+        self.body = body
+        self.error: str | None = None
+        self.message: str | None = None
+        try:
+            data = json.loads(body)
+            if isinstance(data, dict):
+                self.error = data.get("error")
+                self.message = data.get("message")
+        except ValueError:
+            pass
+
+    def __str__(self) -> str:
+        if self.error:
+            return f"HTTP Error {self.code}: {self.error}: {self.message or self.reason}"
+        return super().__str__()
 
 
-def _throttle() -> None:
-    global _LAST_REQUEST_TS
-    with _RATE_LOCK:
-        now = time.time()
-        dt = now - _LAST_REQUEST_TS
-        if dt < _MIN_INTERVAL:
-            time.sleep(_MIN_INTERVAL - dt)
-            now = time.time()
-        _LAST_REQUEST_TS = now
+def _retry_after(headers, default: float = 10) -> float:
+    """429 応答から待ち秒数を求める（Retry-After、無ければ RateLimit-Reset）。"""
+    try:
+        value = headers.get("Retry-After")
+        if value is not None:
+            return float(value)
+        reset = headers.get("RateLimit-Reset")
+        if reset is not None:
+            return max(0.0, float(reset) - time.time())
+    except (TypeError, ValueError):
+        pass
+    return default
+
+
+class TransportResponse:
+    """Transport が返すレスポンス（本文は読み切った状態で保持する）。"""
+
+    def __init__(self, status: int, reason: str, headers, body: bytes):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+
+    def read(self) -> bytes:
+        return self.body
+
+
+def _proxy_for(scheme: str, host: str) -> str | None:
+    """環境変数のプロキシ設定（urllib と同じ解釈）から、対象ホスト用のプロキシ URL を返す。"""
+    proxies = urllib.request.getproxies()
+    proxy = proxies.get(scheme)
+    if not proxy or urllib.request.proxy_bypass(host):
+        return None
+    return proxy
+
+
+# 送り直しても結果が変わらないメソッド（RFC 9110 9.2.2）
+_IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+class PooledTransport:
+    """ホスト単位で keep-alive 接続をプールする http.client ベースの transport。
+
+    - (scheme, host, port) ごとに最大 pool_size 本のアイドル接続を保持する。
+    - idle_timeout 秒以上使われなかった接続は破棄する。
+    - 再利用した接続がサーバー側で切られていた場合は、新しい接続で 1 回だけ送り直す。
+      POST など冪等でないメソッドは、リクエストを送り切る前に切れていたときだけ送り直す。
+    """
+
+    def __init__(self, pool_size: int = 4, idle_timeout: float = 60.0, timeout: float = 15.0):
+        self.pool_size = pool_size
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._idle: dict[tuple, list[tuple[float, http.client.HTTPConnection]]] = {}
+
+    def _new_connection(self, scheme: str, host: str, port: int) -> http.client.HTTPConnection:
+        proxy = _proxy_for(scheme, host)
+        if proxy and scheme == "https":
+            p = urllib.parse.urlsplit(proxy)
+            conn = http.client.HTTPSConnection(p.hostname, p.port or 80, timeout=self.timeout)
+            tunnel_headers = {}
+            if p.username:
+                cred = f"{urllib.parse.unquote(p.username)}:{urllib.parse.unquote(p.password or '')}"
+                tunnel_headers["Proxy-Authorization"] = "Basic " + base64.b64encode(cred.encode()).decode()
+            conn.set_tunnel(host, port, headers=tunnel_headers)
+            return conn
+        if proxy:
+            p = urllib.parse.urlsplit(proxy)
+            return http.client.HTTPConnection(p.hostname, p.port or 80, timeout=self.timeout)
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=self.timeout)
+        return http.client.HTTPConnection(host, port, timeout=self.timeout)
+
+    def _acquire(self, key: tuple) -> tuple[http.client.HTTPConnection, bool]:
+        now = time.monotonic()
+        with self._lock:
+            idle = self._idle.get(key)
+            while idle:
+                ts, conn = idle.pop()
+                if now - ts <= self.idle_timeout:
+                    return conn, True
+                conn.close()
+        return self._new_connection(*key), False
+
+    def _release(self, key: tuple, conn: http.client.HTTPConnection) -> None:
+        self.evict_idle()
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.pool_size:
+                idle.append((time.monotonic(), conn))
+                return
+        conn.close()
+
+    def evict_idle(self) -> None:
+        """idle_timeout を超えたアイドル接続を閉じる。"""
+        now = time.monotonic()
+        with self._lock:
+            for key, idle in list(self._idle.items()):
+                alive = []
+                for ts, conn in idle:
+                    if now - ts <= self.idle_timeout:
+                        alive.append((ts, conn))
+                    else:
+                        conn.close()
+                if alive:
+                    self._idle[key] = alive
+                else:
+                    del self._idle[key]
+
+    def request(
+        self, method: str, url: str, body: bytes | None = None, headers: dict | None = None
+    ) -> TransportResponse:
+        parts = urllib.parse.urlsplit(url)
+        scheme = parts.scheme.lower()
+        port = parts.port or (443 if scheme == "https" else 80)
+        key = (scheme, parts.hostname, port)
+
+        if scheme == "http" and _proxy_for(scheme, parts.hostname):
+            target = url
+        else:
+            target = parts.path or "/"
+            if parts.query:
+                target += f"?{parts.query}"
+
+        for attempt in (1, 2):
+            conn, reused = self._acquire(key)
+            sent = False
+            try:
+                conn.request(method, target, body=body, headers=headers or {})
+                sent = True
+                resp = conn.getresponse()
+                data = resp.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conn.close()
+                # 送信後に切れた場合はサーバーが処理済みかもしれないので、冪等なメソッドに限る
+                if reused and attempt == 1 and (not sent or method.upper() in _IDEMPOTENT_METHODS):
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+
+            if resp.will_close:
+                conn.close()
+            else:
+                self._release(key, conn)
+            return TransportResponse(resp.status, resp.reason, resp.headers, data)
+
+        raise RuntimeError("unreachable")
+
+    def close(self) -> None:
+        with self._lock:
+            for idle in self._idle.values():
+                for _, conn in idle:
+                    conn.close()
+            self._idle.clear()
+
+
+class Http2Transport:
+    """httpx（h2）による HTTP/2 多重化 transport。`pip install httpx[http2]` が必要。"""
+
+    def __init__(self, pool_size: int = 4, idle_timeout: float = 60.0, timeout: float = 15.0):
+        import httpx
+
+        self._client = httpx.Client(
+            http2=True,
+            verify=False,
+            timeout=timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_keepalive_connections=pool_size,
+                keepalive_expiry=idle_timeout,
+            ),
+        )
+
+    def request(
+        self, method: str, url: str, body: bytes | None = None, headers: dict | None = None
+    ) -> TransportResponse:
+        r = self._client.request(method, url, content=body, headers=headers)
+        return TransportResponse(r.status_code, r.reason_phrase, r.headers, r.content)
+
+    def close(self) -> None:
+        self._client.close()
+
+
+_TRANSPORT = PooledTransport()
+
+
+def get_transport():
+    return _TRANSPORT
+
+
+def set_transport(transport) -> None:
+    """transport を差し替える（request(method, url, body, headers) を持つオブジェクト）。"""
+    global _TRANSPORT
+    old = _TRANSPORT
+    _TRANSPORT = transport
+    if old is not transport and hasattr(old, "close"):
+        old.close()
+
+
+def configure_transport(pool_size: int = 4, idle_timeout: float = 60.0, http2: bool = False) -> None:
+    """プールサイズ・アイドル破棄時間・HTTP/2 利用有無を指定して transport を作り直す。"""
+    if http2:
+        try:
+            set_transport(Http2Transport(pool_size=pool_size, idle_timeout=idle_timeout))
+            return
+        except ImportError:
+            print("HTTP/2 を使うには httpx[http2] が必要です。HTTP/1.1 keep-alive で続行します。", file=sys.stderr)
+    set_transport(PooledTransport(pool_size=pool_size, idle_timeout=idle_timeout))
+
+
+_REDIRECT_CODES = (301, 302, 303, 307, 308)
+
+
+def _request(
+    method: str,
+    url: str,
+    body: bytes | None = None,
+    headers: dict | None = None,
+    limit_key: tuple | None = None,
+) -> TransportResponse:
+    """transport 経由でリクエストし、4xx/5xx は urllib と同じ HTTPError として送出する。
+
+    limit_key を指定した場合は、送信前にそのキーのレート枠を取得し、
+    応答の RateLimit-* ヘッダでバケットを更新する。
+    """
+    for _ in range(5):
+        if limit_key is not None:
+            RATE_LIMITER.acquire(limit_key)
+        resp = _TRANSPORT.request(method, url, body=body, headers=headers)
+        if limit_key is not None:
+            RATE_LIMITER.update(limit_key, resp.headers)
+        location = resp.headers.get("Location") if resp.status in _REDIRECT_CODES else None
+        if not location:
+            break
+        url = urllib.parse.urljoin(url, location)
+        if resp.status in (301, 302, 303) and method != "GET":
+            method, body = "GET", None
+
+    if resp.status >= 400:
+        raise urllib.error.HTTPError(url, resp.status, resp.reason, resp.headers, io.BytesIO(resp.body))
+    return resp
 
 
 class ZscalerContinueParser(HTMLParser):
@@ -81,26 +367,48 @@ def http_get_json(
     retries: int = 3,
     extra_headers: dict | None = None,
     base_url: str = APPVIEW,
+    cache: bool = True,
 ) -> dict:
     q = urllib.parse.urlencode(params, doseq=True)
     url = f"{base_url}{path}?{q}"
     headers = {"User-Agent": UA}
     if extra_headers:
         headers.update(extra_headers)
-    req = urllib.request.Request(url, headers=headers)
+    identity = identity_from_headers(headers)
+    limit_key = (base_url, identity)
+
+    # cache=False は最新の値が必要な呼び出し（読んでから書き込む等）なので、キャッシュも相乗りもしない
+    if not cache:
+        return _get_json(url, headers, limit_key, retries)
+
+    key = RESPONSE_CACHE.make_key(base_url, path, params, identity)
+    cacheable = RESPONSE_CACHE.is_cacheable(path)
+    if cacheable:
+        hit, value = RESPONSE_CACHE.get(key)
+        if hit:
+            return value
+
+    def fetch() -> dict:
+        result = _get_json(url, headers, limit_key, retries)
+        if cacheable:
+            RESPONSE_CACHE.put(key, result)
+        return result
 
+    return SINGLE_FLIGHT.do(key, fetch)
+
+
+def _get_json(url: str, headers: dict, limit_key: tuple, retries: int) -> dict:
     for attempt in range(1, retries + 1):
         try:
-            _throttle()
-            with urllib.request.urlopen(req, timeout=15) as resp:
-                data = resp.read().decode("utf-8", errors="ignore")
-                if "_sm_ctn" in data:
-                    cont_url = try_zscaler_continue(data)
-                    if cont_url:
-                        _trigger_zscaler_continue(cont_url)
-                        time.sleep(2)
-                        continue
-                return json.loads(data)
+            resp = _request("GET", url, headers=headers, limit_key=limit_key)
+            data = resp.read().decode("utf-8", errors="ignore")
+            if "_sm_ctn" in data:
+                cont_url = try_zscaler_continue(data)
+                if cont_url:
+                    _trigger_zscaler_continue(cont_url)
+                    time.sleep(2)
+                    continue
+            return json.loads(data)
         except urllib.error.HTTPError as e:
             try:
                 body = e.read().decode(errors="ignore")
@@ -114,14 +422,14 @@ def http_get_json(
                 continue
 
             if e.code == 429:
-                wait = int(e.headers.get("Retry-After", 10))
-                time.sleep(wait)
+                # 待機はこのキーのバケットに記録し、次の送信前の acquire で待つ
+                RATE_LIMITER.penalize(limit_key, _retry_after(e.headers))
                 continue
             elif e.code in (403, 500, 502, 503, 504):
                 time.sleep(3)
                 continue
             else:
-                raise
+                raise XrpcError(e.filename or url, e.code, e.reason, e.headers, body) from None
         except Exception:
             time.sleep(2)
 
@@ -144,20 +452,20 @@ def http_post_json(
     }
     if extra_headers:
         headers.update(extra_headers)
+    limit_key = (base_url, identity_from_headers(headers))
 
     for attempt in range(1, retries + 1):
         try:
-            _throttle()
-            req = urllib.request.Request(url, data=body_bytes, headers=headers, method="POST")
-            with urllib.request.urlopen(req, timeout=15) as resp:
-                data = resp.read().decode("utf-8", errors="ignore")
-                if "_sm_ctn" in data:
-                    cont_url = try_zscaler_continue(data)
-                    if cont_url:
-                        _trigger_zscaler_continue(cont_url)
-                        time.sleep(2)
-                        continue
-                return json.loads(data) if data.strip() else {}
+            resp = _request("POST", url, body=body_bytes, headers=headers, limit_key=limit_key)
+            data = resp.read().decode("utf-8", errors="ignore")
+            if "_sm_ctn" in data:
+                cont_url = try_zscaler_continue(data)
+                if cont_url:
+                    _trigger_zscaler_continue(cont_url)
+                    time.sleep(2)
+                    continue
+            RESPONSE_CACHE.invalidate_for_write(path, payload)
+            return json.loads(data) if data.strip() else {}
         except urllib.error.HTTPError as e:
             try:
                 body = e.read().decode(errors="ignore")
@@ -171,14 +479,14 @@ def http_post_json(
                 continue
 
             if e.code == 429:
-                wait = int(e.headers.get("Retry-After", 10))
-                time.sleep(wait)
+                # 待機はこのキーのバケットに記録し、次の送信前の acquire で待つ
+                RATE_LIMITER.penalize(limit_key, _retry_after(e.headers))
                 continue
             elif e.code in (403, 500, 502, 503, 504):
                 time.sleep(3)
                 continue
             else:
-                raise
+                raise XrpcError(e.filename or url, e.code, e.reason, e.headers, body) from None
         except Exception:
             time.sleep(2)
 
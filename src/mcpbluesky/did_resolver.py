@@ -0,0 +1,138 @@
+import sys
+import time
+import threading
+import urllib.parse
+from typing import Any, Dict, Optional, Tuple
+
+from .common_http import APPVIEW
+
+PLC_DIRECTORY = "https://plc.directory"
+# DID ドキュメントを取得し直すまでの秒数（PDS の移行はまれなので長め）
+DID_DOC_TTL = 86400.0
+
+
+def pds_endpoint(doc: Optional[dict]) -> Optional[str]:
+    """DID ドキュメントの #atproto_pds サービスのエンドポイント（末尾の / は除く）。"""
+    if not isinstance(doc, dict):
+        return None
+    for service in doc.get("service") or []:
+        if not isinstance(service, dict):
+            continue
+        sid = str(service.get("id") or "")
+        if sid.split("#")[-1] != "atproto_pds" or service.get("type") != "AtprotoPersonalDataServer":
+            continue
+        endpoint = service.get("serviceEndpoint")
+        if isinstance(endpoint, str) and endpoint.startswith(("https://", "http://")):
+            return endpoint.rstrip("/")
+    return None
+
+
+def handles_of(doc: Optional[dict]) -> list:
+    """DID ドキュメントの alsoKnownAs に書かれたハンドル（at:// を除いて小文字化）。"""
+    if not isinstance(doc, dict):
+        return []
+    return [a[len("at://"):].lower() for a in doc.get("alsoKnownAs") or [] if isinstance(a, str) and a.startswith("at://")]
+
+
+class DidResolver:
+    """DID ドキュメントを取得し、アカウントの PDS を求める。
+
+    - did:plc は plc_url（PLC ディレクトリ）、did:web は https://<ホスト>/.well-known/did.json から取得する。
+    - 取得したドキュメントはメモリと store（SessionStore、省略可）に ttl 秒キャッシュする。
+    - 期限切れ後の取得に失敗した場合は古いドキュメントを使う。
+    """
+
+    def __init__(
+        self,
+        get_json,
+        store=None,
+        ttl: float = DID_DOC_TTL,
+        plc_url: str = PLC_DIRECTORY,
+    ):
+        self.get_json = get_json
+        self.store = store
+        self.ttl = ttl
+        self.plc_url = plc_url.rstrip("/")
+        self._docs: Dict[str, Tuple[dict, float]] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "fetches": 0, "errors": 0, "stale": 0}
+
+    def configure(self, ttl: Optional[float] = None, plc_url: Optional[str] = None) -> None:
+        if ttl is not None:
+            self.ttl = ttl
+        if plc_url:
+            self.plc_url = plc_url.rstrip("/")
+
+    def _doc_location(self, did: str) -> Tuple[str, str]:
+        """DID ドキュメントを取得する (base_url, path)。"""
+        if did.startswith("did:plc:"):
+            return self.plc_url, "/" + did
+        if did.startswith("did:web:"):
+            # did:web:example.com -> https://example.com/.well-known/did.json（ポートは %3A で表記される）
+            parts = [urllib.parse.unquote(p) for p in did[len("did:web:"):].split(":")]
+            if len(parts) == 1:
+                return f"https://{parts[0]}", "/.well-known/did.json"
+            return f"https://{parts[0]}", "/" + "/".join(parts[1:]) + "/did.json"
+        raise ValueError(f"Unsupported DID method: {did}")
+
+    def _cached(self, did: str) -> Optional[Tuple[dict, float]]:
+        with self._lock:
+            entry = self._docs.get(did)
+        if entry is None and self.store is not None:
+            entry = self.store.get_did_doc(did)
+            if entry is not None:
+                with self._lock:
+                    self._docs[did] = entry
+        return entry
+
+    def put(self, did: str, doc: dict, fetched_at: Optional[float] = None) -> None:
+        """取得済みのドキュメント（createSession の didDoc 等）をキャッシュに入れる。"""
+        if not isinstance(doc, dict) or doc.get("id") != did:
+            return
+        entry = (doc, fetched_at or time.time())
+        with self._lock:
+            self._docs[did] = entry
+        if self.store is not None:
+            self.store.put_did_doc(did, *entry)
+
+    def resolve(self, did: str, force: bool = False) -> dict:
+        """DID ドキュメントを返す。キャッシュが ttl 以内なら取得しない。"""
+        entry = self._cached(did)
+        if entry is not None and not force and time.time() - entry[1] < self.ttl:
+            self._stats["hits"] += 1
+            return entry[0]
+        base_url, path = self._doc_location(did)
+        try:
+            self._stats["fetches"] += 1
+            doc = self.get_json(path, {}, base_url=base_url, cache=False)
+            if not isinstance(doc, dict) or doc.get("id") != did:
+                raise ValueError(f"DID document id mismatch for {did}")
+        except Exception as e:
+            self._stats["errors"] += 1
+            if entry is None:
+                raise
+            self._stats["stale"] += 1
+            print(f"DID resolution failed for {did}, using cached document: {e}", file=sys.stderr)
+            return entry[0]
+        self.put(did, doc)
+        return doc
+
+    def pds_for_did(self, did: str) -> Optional[str]:
+        return pds_endpoint(self.resolve(did))
+
+    def pds_for_handle(self, handle: str) -> Optional[str]:
+        """ハンドル -> DID -> PDS。DID ドキュメントがハンドルを名乗っていなければ None。"""
+        did = self.get_json(
+            "/xrpc/com.atproto.identity.resolveHandle", {"handle": handle}, base_url=APPVIEW
+        ).get("did")
+        if not did:
+            return None
+        doc = self.resolve(did)
+        if handle.lower() not in handles_of(doc):
+            return None
+        return pds_endpoint(doc)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            cached = len(self._docs)
+        return {**self._stats, "cached": cached, "ttl": self.ttl, "plc_url": self.plc_url}
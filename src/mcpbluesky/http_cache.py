@@ -0,0 +1,172 @@
+import copy
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+
+# 読み取り XRPC ごとの TTL（秒）。ここに無いエンドポイント（タイムライン・通知など）はキャッシュしない。
+DEFAULT_TTLS: Dict[str, float] = {
+    "/xrpc/app.bsky.actor.getProfile": 60,
+    "/xrpc/app.bsky.actor.getProfiles": 60,
+    "/xrpc/com.atproto.identity.resolveHandle": 600,
+    "/xrpc/app.bsky.feed.getActorFeeds": 300,
+    "/xrpc/app.bsky.feed.getAuthorFeed": 15,
+    "/xrpc/app.bsky.feed.getPostThread": 15,
+    "/xrpc/app.bsky.feed.getPosts": 15,
+    "/xrpc/app.bsky.feed.getLikes": 30,
+    "/xrpc/app.bsky.graph.getFollows": 60,
+    "/xrpc/app.bsky.graph.getFollowers": 60,
+    "/xrpc/app.bsky.graph.getLists": 120,
+    "/xrpc/app.bsky.graph.getList": 60,
+}
+
+# 自分の書き込み（レコードのコレクション）が変更しうる読み取りエンドポイント。
+WRITE_INVALIDATIONS: Dict[str, tuple] = {
+    "app.bsky.feed.post": (
+        "/xrpc/app.bsky.feed.getAuthorFeed",
+        "/xrpc/app.bsky.feed.getPostThread",
+        "/xrpc/app.bsky.feed.getPosts",
+        "/xrpc/app.bsky.actor.getProfile",
+        "/xrpc/app.bsky.actor.getProfiles",
+    ),
+    "app.bsky.feed.like": (
+        "/xrpc/app.bsky.feed.getLikes",
+        "/xrpc/app.bsky.feed.getPostThread",
+        "/xrpc/app.bsky.feed.getPosts",
+        "/xrpc/app.bsky.feed.getAuthorFeed",
+    ),
+    "app.bsky.feed.repost": (
+        "/xrpc/app.bsky.feed.getPostThread",
+        "/xrpc/app.bsky.feed.getPosts",
+        "/xrpc/app.bsky.feed.getAuthorFeed",
+    ),
+    "app.bsky.feed.threadgate": ("/xrpc/app.bsky.feed.getPostThread",),
+    "app.bsky.graph.follow": (
+        "/xrpc/app.bsky.graph.getFollows",
+        "/xrpc/app.bsky.graph.getFollowers",
+        "/xrpc/app.bsky.actor.getProfile",
+        "/xrpc/app.bsky.actor.getProfiles",
+    ),
+    "app.bsky.graph.block": (
+        "/xrpc/app.bsky.graph.getFollows",
+        "/xrpc/app.bsky.graph.getFollowers",
+        "/xrpc/app.bsky.actor.getProfile",
+        "/xrpc/app.bsky.actor.getProfiles",
+    ),
+    "app.bsky.graph.list": (
+        "/xrpc/app.bsky.graph.getLists",
+        "/xrpc/app.bsky.graph.getList",
+    ),
+    "app.bsky.graph.listitem": ("/xrpc/app.bsky.graph.getList",),
+    "app.bsky.actor.profile": ("/xrpc/app.bsky.actor.getProfile", "/xrpc/app.bsky.actor.getProfiles"),
+}
+
+# レコード以外の書き込み XRPC が変更しうる読み取りエンドポイント。
+PROCEDURE_INVALIDATIONS: Dict[str, tuple] = {
+    "/xrpc/app.bsky.graph.muteActor": ("/xrpc/app.bsky.actor.getProfile", "/xrpc/app.bsky.actor.getProfiles"),
+    "/xrpc/app.bsky.graph.unmuteActor": ("/xrpc/app.bsky.actor.getProfile", "/xrpc/app.bsky.actor.getProfiles"),
+}
+
+
+class ResponseCache:
+    """読み取り XRPC 応答の TTL 付き LRU キャッシュ。
+
+    キーは (base_url, path, params, 実行アカウント)。返す値はコピーなので、呼び出し側で変更してよい。
+    """
+
+    def __init__(self, max_entries: int = 1024, ttls: Optional[Dict[str, float]] = None):
+        self.max_entries = max_entries
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self._entries: "OrderedDict[tuple, tuple[float, str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(base_url: str, path: str, params: dict, identity: str) -> tuple:
+        items = []
+        for k, v in sorted(params.items()):
+            items.append((k, tuple(v) if isinstance(v, (list, tuple)) else v))
+        return (base_url, path, tuple(items), identity)
+
+    def is_cacheable(self, path: str) -> bool:
+        return self.max_entries > 0 and self.ttls.get(path, 0) > 0
+
+    def get(self, key: tuple) -> tuple[bool, Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value = entry[2]
+        return True, copy.deepcopy(value)
+
+    def put(self, key: tuple, value: Any) -> None:
+        path = key[1]
+        ttl = self.ttls.get(path, 0)
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, path, copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, paths: Optional[Iterable[str]] = None) -> int:
+        """指定エンドポイント（省略時は全件）のエントリを破棄し、破棄件数を返す。"""
+        with self._lock:
+            if paths is None:
+                n = len(self._entries)
+                self._entries.clear()
+            else:
+                targets = set(paths)
+                keys = [k for k, e in self._entries.items() if e[1] in targets]
+                for k in keys:
+                    del self._entries[k]
+                n = len(keys)
+            self.invalidations += n
+            return n
+
+    def invalidate_for_write(self, path: str, payload: dict) -> int:
+        """書き込み XRPC の path / payload から影響を受けるエンドポイントを求めて破棄する。"""
+        paths: set = set(PROCEDURE_INVALIDATIONS.get(path, ()))
+        collections = []
+        if isinstance(payload, dict):
+            if payload.get("collection"):
+                collections.append(payload["collection"])
+            for w in payload.get("writes") or ():
+                if isinstance(w, dict) and w.get("collection"):
+                    collections.append(w["collection"])
+        for c in collections:
+            paths.update(WRITE_INVALIDATIONS.get(c, ()))
+        if not paths:
+            return 0
+        return self.invalidate(paths)
+
+    def configure(self, max_entries: int, ttls: Optional[Dict[str, float]] = None) -> None:
+        with self._lock:
+            self.max_entries = max_entries
+            if ttls is not None:
+                self.ttls = dict(ttls)
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
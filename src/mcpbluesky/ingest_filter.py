@@ -0,0 +1,204 @@
+import re
+import json
+from typing import Any, Dict, List, Optional
+
+# scripts ルールで名前指定できる Unicode 範囲
+SCRIPT_RANGES: Dict[str, str] = {
+    "hiragana": "\u3040-\u309F",
+    "katakana": "\u30A0-\u30FF",
+    "han": "\u3400-\u4DBF\u4E00-\u9FFF",
+    "hangul": "\u1100-\u11FF\u3130-\u318F\uAC00-\uD7AF",
+    "thai": "\u0E00-\u0E7F",
+    "arabic": "\u0600-\u06FF",
+    "hebrew": "\u0590-\u05FF",
+    "cyrillic": "\u0400-\u04FF",
+    "greek": "\u0370-\u03FF",
+    "devanagari": "\u0900-\u097F",
+}
+
+# 従来の BlueskyDB.is_japanese と同じ判定
+JAPANESE_RULES: List[Dict[str, Any]] = [
+    {"name": "lang:ja", "langs": ["ja"]},
+    {"name": "kana", "scripts": ["hiragana", "katakana"]},
+]
+
+# 生フレーム（空白なしの JSON）で langs 配列が始まる位置の目印
+_LANGS_KEY = '"langs":['
+
+# ルールが持てる条件の種類（1 ルールにつき 1 種類）
+_RULE_KINDS = ("langs", "dids", "scripts", "keywords")
+
+_RANGE_RE = re.compile(r"^U\+([0-9A-Fa-f]{4,6})-U\+([0-9A-Fa-f]{4,6})$")
+
+
+def _script_class(scripts: List[str]) -> tuple[str, bool]:
+    """scripts 指定を正規表現の文字クラス本体に変換する。ASCII を含むかも返す。"""
+    parts = []
+    has_ascii = False
+    for s in scripts:
+        if s in SCRIPT_RANGES:
+            parts.append(SCRIPT_RANGES[s])
+            continue
+        m = _RANGE_RE.match(s)
+        if not m:
+            raise ValueError(f"Unknown script: {s} (use a name in SCRIPT_RANGES or 'U+XXXX-U+YYYY')")
+        lo, hi = int(m.group(1), 16), int(m.group(2), 16)
+        has_ascii = has_ascii or lo < 0x80
+        parts.append(f"{re.escape(chr(lo))}-{re.escape(chr(hi))}")
+    return "".join(parts), has_ascii
+
+
+def _keyword_pattern(words: List[str]) -> str:
+    """キーワード集合を接頭辞木（trie）に畳み込んだ正規表現にする。
+
+    "cat|car|cart" を "ca(?:r(?:t)?|t)" の形にすることで、正規表現エンジンが
+    各位置で全キーワードを試すのではなく 1 文字ずつ木を辿るだけになる（Aho-Corasick に近い）。
+    """
+    trie: Dict[str, Any] = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node: Dict[str, Any]) -> str:
+        branches = [re.escape(ch) + build(sub) for ch, sub in sorted(node.items()) if ch != ""]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class IngestFilter:
+    """Jetstream 取り込み用のフィルタエンジン。起動時に 1 回だけコンパイルする。
+
+    rules は次のいずれか 1 種類の条件を持つ dict のリストで、どれか 1 つに一致すれば保存対象。
+    1 つのルールに複数の種類の条件は書けない（ValueError）。OR にしたい場合はルールを分ける。
+
+    - {"name": ..., "langs": ["ja", "ko"]}            langs タグ（"pt-BR" は "pt" にも一致）
+    - {"name": ..., "scripts": ["hangul", "U+0E00-U+0E7F"]}  本文に含まれる文字種
+    - {"name": ..., "keywords": ["bluesky", "atproto"]}      本文のキーワード（大文字小文字を区別しない）
+    - {"name": ..., "dids": ["did:plc:..."]}                投稿者の DID
+
+    langs と dids は集合の引き当て、scripts と keywords はそれぞれ全ルール分を 1 本の正規表現に
+    まとめるため、ルール数が増えても本文の走査は種類ごとに 1 回で済む（キーワードは trie 化して照合）。
+    文字種は元の本文、キーワードは小文字化した本文と照合する。
+    ルールごとの一致件数は counts に記録される（1 件の投稿は最初に一致したルールに計上）。
+    """
+
+    def __init__(self, rules: Optional[List[Dict[str, Any]]] = None):
+        self.rules = list(JAPANESE_RULES if rules is None else rules)
+        self.counts: Dict[str, int] = {}
+        self._langs: Dict[str, str] = {}
+        self._dids: Dict[str, str] = {}
+        self._lang_marks: List[str] = []
+        self._group_rules: Dict[str, str] = {}
+
+        script_alternatives = []
+        keyword_alternatives = []
+        text_has_ascii = False
+        for i, rule in enumerate(self.rules):
+            name = rule.get("name") or f"rule{i}"
+            self.counts[name] = 0
+            kinds = [k for k in _RULE_KINDS if rule.get(k)]
+            if len(kinds) > 1:
+                raise ValueError(f"Rule {name} has more than one of langs/dids/scripts/keywords: {', '.join(kinds)}")
+            if rule.get("langs"):
+                for lang in rule["langs"]:
+                    lang = lang.lower()
+                    self._langs.setdefault(lang, name)
+                    self._lang_marks.extend([f'"{lang}"', f'"{lang}-'])
+            elif rule.get("dids"):
+                for did in rule["dids"]:
+                    self._dids.setdefault(did, name)
+            elif rule.get("scripts"):
+                cls, has_ascii = _script_class(rule["scripts"])
+                text_has_ascii = text_has_ascii or has_ascii
+                group = f"r{i}"
+                self._group_rules[group] = name
+                script_alternatives.append(f"(?P<{group}>[{cls}])")
+            elif rule.get("keywords"):
+                words = sorted({w.lower() for w in rule["keywords"] if w})
+                if not words:
+                    continue
+                text_has_ascii = text_has_ascii or any(w.isascii() for w in words)
+                group = f"r{i}"
+                self._group_rules[group] = name
+                keyword_alternatives.append(f"(?P<{group}>{_keyword_pattern(words)})")
+            else:
+                raise ValueError(f"Rule {name} has no langs/scripts/keywords/dids")
+
+        self._script_re = re.compile("|".join(script_alternatives)) if script_alternatives else None
+        self._keyword_re = re.compile("|".join(keyword_alternatives)) if keyword_alternatives else None
+        # 本文ルールが全て非 ASCII 文字を要求するなら、ASCII だけの本文は走査せずに落とせる
+        self._text_skips_ascii = not text_has_ascii
+
+    @classmethod
+    def from_file(cls, path: str) -> "IngestFilter":
+        """JSON ファイル（ルールのリスト、または {"rules": [...]}）から読み込む。"""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data.get("rules", [])
+        return cls(data)
+
+    def _match_text(self, text: str) -> Optional[str]:
+        if not text or (self._script_re is None and self._keyword_re is None):
+            return None
+        if self._text_skips_ascii and text.isascii():
+            return None
+        # 大文字を含む範囲（"U+0041-U+005A" など）があるので、文字種は小文字化せずに照合する
+        m = self._script_re.search(text) if self._script_re is not None else None
+        if self._keyword_re is not None:
+            k = self._keyword_re.search(text.lower())
+            # 両方に一致したら本文の先に現れた方（同じ位置ならルールの順）を採る
+            if k is not None and (m is None or (k.start(), int(k.lastgroup[1:])) < (m.start(), int(m.lastgroup[1:]))):
+                m = k
+        return self._group_rules[m.lastgroup] if m else None
+
+    def raw_match(self, raw: str) -> bool:
+        """デコード前の JSON 文字列に対する判定。一致しうるフレームを落とさない（偽陽性は可）。
+
+        langs タグは match() と同じく大文字小文字を区別しない。
+
+        >>> IngestFilter([{"name": "br", "langs": ["pt-BR"]}]).raw_match('{"langs":["pt-BR"]}')
+        True
+        """
+        if self._dids:
+            i = raw.find('"did":"')
+            if i >= 0:
+                j = raw.find('"', i + 7)
+                if raw[i + 7 : j] in self._dids:
+                    return True
+        if self._lang_marks:
+            # マークは小文字で持っているので、langs 配列の部分だけを小文字化して探す
+            i = raw.find(_LANGS_KEY)
+            while i >= 0:
+                i += len(_LANGS_KEY)
+                j = raw.find("]", i)
+                tags = raw[i:j].lower() if j >= 0 else raw[i:].lower()
+                for mark in self._lang_marks:
+                    if mark in tags:
+                        return True
+                i = raw.find(_LANGS_KEY, i)
+        return self._match_text(raw) is not None
+
+    def match(self, did: Optional[str], text: Optional[str], langs: Optional[List[str]]) -> Optional[str]:
+        """投稿が保存対象なら一致したルール名を、そうでなければ None を返す。"""
+        name = self._dids.get(did) if did and self._dids else None
+        if name is None and langs and self._langs:
+            for lang in langs:
+                lang = lang.lower()
+                name = self._langs.get(lang) or self._langs.get(lang.split("-", 1)[0])
+                if name:
+                    break
+        if name is None:
+            name = self._match_text(text or "")
+        if name is not None:
+            self.counts[name] += 1
+        return name
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self.counts)
@@ -0,0 +1,397 @@
+import re
+import sys
+import json
+import time
+import random
+import asyncio
+import threading
+import urllib.parse
+from typing import Any, Dict, List, Optional
+
+import websockets
+
+from .bluesky_db import ENGAGEMENT_TABLES, BlueskyDB
+from .ingest_filter import IngestFilter
+
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+DEFAULT_ENDPOINT = "wss://jetstream1.us-east.bsky.network/subscribe"
+POST_COLLECTION = "app.bsky.feed.post"
+
+# 圧縮フレームに元サイズが書かれていない場合の解凍上限
+_MAX_FRAME_SIZE = 4 * 1024 * 1024
+
+# Jetstream が受け付ける wantedCollections / wantedDids の上限
+MAX_WANTED_COLLECTIONS = 100
+MAX_WANTED_DIDS = 10_000
+
+# JSON をデコードする前に生フレームに対して行う安価な判定。
+# Jetstream は空白なしの JSON を送るので、部分文字列の有無で大半のメッセージを落とせる。
+_CREATE_MARK = '"operation":"create"'
+_TIME_US_KEY = '"time_us":'
+_COLLECTION_KEY = '"collection":"'
+_DIGITS_RE = re.compile(r"\d+")
+
+
+def _raw_time_us(message: str) -> Optional[int]:
+    """デコードせずに生フレームから time_us を取り出す。"""
+    i = message.find(_TIME_US_KEY)
+    m = _DIGITS_RE.match(message, i + len(_TIME_US_KEY)) if i >= 0 else None
+    return int(m.group()) if m else None
+
+
+def _raw_collection(message: str) -> Optional[str]:
+    """デコードせずに生フレームから commit.collection を取り出す。"""
+    i = message.find(_COLLECTION_KEY)
+    if i < 0:
+        return None
+    i += len(_COLLECTION_KEY)
+    return message[i : message.find('"', i)]
+
+
+def load_zstd_dict(path: str):
+    """Jetstream の zstd_dictionary を読み込む。zstandard が無ければ ImportError、読めなければ OSError。"""
+    import zstandard
+
+    with open(path, "rb") as f:
+        return zstandard.ZstdCompressionDict(f.read())
+
+
+def post_from_event(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Jetstream の投稿作成イベントを BlueskyDB.insert_post 用の dict に変換する。"""
+    commit = data.get("commit") or {}
+    record = commit.get("record") or {}
+    reply = record.get("reply") or {}
+    return {
+        "uri": f"at://{data['did']}/{commit['collection']}/{commit['rkey']}",
+        "cid": commit.get("cid"),
+        "author_did": data["did"],
+        "author_handle": None,
+        "text": record.get("text", ""),
+        "created_at": record.get("createdAt"),
+        "reply_parent": (reply.get("parent") or {}).get("uri"),
+        "reply_root": (reply.get("root") or {}).get("uri"),
+    }
+
+
+class JetstreamListener:
+    """Jetstream を購読して、フィルタ（デフォルトは日本語判定）に一致する投稿をローカル DB に保存する。
+
+    - 処理したイベントの time_us をカーソルとして DB（jetstream_state）に保存する。
+      保存は PostWriter が投稿と同じトランザクションで行うため、カーソルだけ先に進むことはない。
+    - 切断時は「最後のカーソル − overlap_seconds」から再接続し、取りこぼしを防ぐ。
+      重複して受信した投稿は uri 主キー（INSERT OR IGNORE）で除外される。
+    - 再接続の待ち時間は指数バックオフ＋ジッタ。
+    - collections に app.bsky.feed.like / app.bsky.feed.repost / app.bsky.graph.follow を加えると、
+      それらの作成・削除も専用テーブルに保存する（engagement_local_only=True なら、
+      ローカル DB にある投稿へのいいね・リポストだけ）。
+    - wanted_dids を指定すると Jetstream 側でその DID のイベントだけに絞り込み、
+      投稿は本文フィルタを通さずに保存する（特定アカウントの監視用）。
+      wantedDids は URL には載せず、requireHello=true で接続して最初の options_update で送る
+      （最大 10,000 件の DID で URL が長くなりすぎないように）。
+      update_options() で接続を切らずに wantedDids / wantedCollections を変更できる。
+    - compress=True で zstd 圧縮ストリーム（compress=true）を購読する。
+      Jetstream が公開している共有辞書（zstd_dictionary）のパスを zstd_dict_path に指定し、
+      `pip install zstandard` が必要。解凍コンテキストは接続ごとに 1 つ作って使い回す。
+    """
+
+    def __init__(
+        self,
+        db: BlueskyDB,
+        endpoint: str = DEFAULT_ENDPOINT,
+        overlap_seconds: float = 5.0,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        cursor_interval: float = 1.0,
+        compress: bool = False,
+        zstd_dict_path: Optional[str] = None,
+        prefilter: bool = True,
+        ingest_filter: Optional[IngestFilter] = None,
+        collections: Optional[List[str]] = None,
+        engagement_local_only: bool = True,
+        wanted_dids: Optional[List[str]] = None,
+    ):
+        self.db = db
+        self.endpoint = endpoint
+        self.collections = list(collections or [POST_COLLECTION])
+        self.engagement_local_only = engagement_local_only
+        self.wanted_dids: List[str] = list(wanted_dids or [])
+        self._wanted_did_set = frozenset(self.wanted_dids)
+        # 接続中の WebSocket とそのイベントループ（update_options を別スレッドから呼ぶため）
+        self._websocket = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._options_lock = threading.Lock()
+        self.overlap_us = int(overlap_seconds * 1_000_000)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.cursor_interval = cursor_interval
+        self.compress = compress
+        self.zstd_dict_path = zstd_dict_path
+        self._zstd_dict = None
+        self.prefilter = prefilter
+        self.filter = ingest_filter or IngestFilter()
+        self.last_time_us: Optional[int] = None
+        self._last_cursor_save = 0.0
+        self.stats: Dict[str, Any] = {
+            "connects": 0,
+            "messages": 0,
+            "kept": 0,
+            # DB に渡したいいね・リポスト・フォロー（writer 経由のとき、行を変更しなかった分は
+            # writer の records_skipped に出る）
+            "records": 0,
+            "options_updates": 0,
+            "wire_bytes": 0,
+            "json_bytes": 0,
+            "decompress_seconds": 0.0,
+            # 段階ごとの破棄件数と所要時間（どこで CPU を使っているかの確認用）
+            "dropped_prefilter": 0,
+            "dropped_decoded": 0,
+            "dropped_classifier": 0,
+            "prefilter_seconds": 0.0,
+            "decode_seconds": 0.0,
+            "classify_seconds": 0.0,
+            "errors": 0,
+            "last_error": None,
+            "last_catchup_seconds": None,
+            "last_catchup_events": None,
+        }
+
+    def subscribe_url(self) -> str:
+        params = [("wantedCollections", c) for c in self.collections]
+        if self.wanted_dids:
+            # DID の一覧は接続後の options_update で送る。それまでサーバーはイベントを送らない
+            params.append(("requireHello", "true"))
+        if self.compress:
+            params.append(("compress", "true"))
+        if self.last_time_us:
+            params.append(("cursor", str(max(0, self.last_time_us - self.overlap_us))))
+        return f"{self.endpoint}?{urllib.parse.urlencode(params)}"
+
+    def options_update_message(self) -> str:
+        """現在の wantedCollections / wantedDids を Jetstream の options_update メッセージにする。"""
+        payload = {
+            "wantedCollections": self.collections,
+            "wantedDids": self.wanted_dids,
+            "maxMessageSizeBytes": 0,
+        }
+        return json.dumps({"type": "options_update", "payload": payload})
+
+    def update_options(
+        self,
+        wanted_collections: Optional[List[str]] = None,
+        wanted_dids: Optional[List[str]] = None,
+        timeout: float = 10.0,
+    ) -> Dict[str, Any]:
+        """購読条件を変更する（None の項目は現状維持、空リストの wanted_dids は全アカウント）。
+
+        接続中なら options_update を送り、切断せずに反映する。未接続なら次の接続時に反映される。
+        どのスレッドから呼んでもよい。
+        """
+        if wanted_collections is not None and not wanted_collections:
+            raise ValueError("wanted_collections must not be empty")
+        if wanted_collections is not None and len(wanted_collections) > MAX_WANTED_COLLECTIONS:
+            raise ValueError(f"Too many wanted_collections (max {MAX_WANTED_COLLECTIONS})")
+        if wanted_dids is not None and len(wanted_dids) > MAX_WANTED_DIDS:
+            raise ValueError(f"Too many wanted_dids (max {MAX_WANTED_DIDS})")
+
+        with self._options_lock:
+            if wanted_collections is not None:
+                self.collections = list(dict.fromkeys(wanted_collections))
+            if wanted_dids is not None:
+                self.wanted_dids = list(dict.fromkeys(wanted_dids))
+                self._wanted_did_set = frozenset(self.wanted_dids)
+            message = self.options_update_message()
+            websocket, loop = self._websocket, self._loop
+
+        sent = False
+        if websocket is not None and loop is not None and loop.is_running():
+            future = asyncio.run_coroutine_threadsafe(websocket.send(message), loop)
+            future.result(timeout)
+            sent = True
+            self.stats["options_updates"] += 1
+        return {
+            "sent": sent,
+            "wantedCollections": self.collections,
+            "wantedDids": len(self.wanted_dids),
+        }
+
+    async def _publish_connection(self, websocket, uri: str) -> None:
+        """接続直後に wantedDids を送り（requireHello）、update_options から送れるよう接続を公開する。
+
+        URL を作ってから接続までの間に変更された条件もここで反映する。送信はロックの外で行い、
+        送信中に update_options で条件が変わったら、公開する前に最新の条件を送り直す。
+        """
+        with self._options_lock:
+            needs_hello = "requireHello=true" in uri or self.subscribe_url() != uri
+        sent = None
+        while True:
+            with self._options_lock:
+                message = self.options_update_message()
+                if message == sent or (sent is None and not needs_hello):
+                    self._websocket = websocket
+                    self._loop = asyncio.get_running_loop()
+                    return
+            await websocket.send(message)
+            sent = message
+
+    def _backoff_delay(self, failures: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (failures - 1)))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def _new_decompressor(self):
+        """接続ごとに使い回す zstd 解凍コンテキストを作る（圧縮モード以外では None）。"""
+        if not self.compress:
+            return None
+        import zstandard
+
+        if self._zstd_dict is None:
+            if not self.zstd_dict_path:
+                raise ValueError("compress=True requires zstd_dict_path (Jetstream zstd_dictionary)")
+            self._zstd_dict = load_zstd_dict(self.zstd_dict_path)
+        return zstandard.ZstdDecompressor(dict_data=self._zstd_dict)
+
+    def handle_message(self, message, dctx=None) -> Optional[int]:
+        """1 メッセージを処理し、そのイベントの time_us を返す。"""
+        self.stats["wire_bytes"] += len(message)
+        if dctx is not None and isinstance(message, bytes):
+            t0 = time.perf_counter()
+            message = dctx.decompress(message, max_output_size=_MAX_FRAME_SIZE)
+            self.stats["decompress_seconds"] += time.perf_counter() - t0
+            self.stats["json_bytes"] += len(message)
+        else:
+            self.stats["json_bytes"] += len(message)
+        self.stats["messages"] += 1
+
+        time_us = self._filter_and_store(message)
+        if time_us is not None and (self.last_time_us is None or time_us > self.last_time_us):
+            self.last_time_us = time_us
+
+        now = time.monotonic()
+        if self.last_time_us and now - self._last_cursor_save >= self.cursor_interval:
+            self.db.save_jetstream_cursor(self.last_time_us)
+            self._last_cursor_save = now
+        return time_us if isinstance(time_us, int) else None
+
+    def _filter_and_store(self, message) -> Optional[int]:
+        """段階的なフィルタを通し、残った投稿を DB に保存する。イベントの time_us を返す。
+
+        1. 生フレームの部分文字列判定（投稿なら作成操作か・フィルタに一致しうるか、
+           それ以外は保存対象のコレクションか）
+        2. JSON デコード（orjson があれば使う）
+        3. 投稿は IngestFilter による判定、いいね・リポスト・フォローはそのまま保存
+        """
+        stats = self.stats
+        t0 = time.perf_counter()
+        if isinstance(message, (bytes, bytearray)):
+            message = message.decode("utf-8", errors="replace")
+        if self.prefilter:
+            collection = _raw_collection(message)
+            if collection == POST_COLLECTION:
+                keep = _CREATE_MARK in message and (
+                    bool(self._wanted_did_set) or self.filter.raw_match(message)
+                )
+            else:
+                keep = collection in ENGAGEMENT_TABLES and collection in self.collections
+            if not keep:
+                time_us = _raw_time_us(message)
+                stats["dropped_prefilter"] += 1
+                stats["prefilter_seconds"] += time.perf_counter() - t0
+                return time_us
+        t1 = time.perf_counter()
+        stats["prefilter_seconds"] += t1 - t0
+
+        data = _json_loads(message)
+        time_us = data.get("time_us")
+        if not isinstance(time_us, int):
+            time_us = None
+        commit = data.get("commit") or {}
+        t2 = time.perf_counter()
+        stats["decode_seconds"] += t2 - t1
+        collection = commit.get("collection")
+        if data.get("kind") == "commit" and collection in ENGAGEMENT_TABLES:
+            if collection in self.collections and self.db.apply_record_event(
+                collection,
+                commit.get("operation", ""),
+                data.get("did", ""),
+                commit.get("rkey", ""),
+                commit.get("record"),
+                time_us,
+                local_only=self.engagement_local_only,
+            ):
+                stats["records"] += 1
+            else:
+                stats["dropped_decoded"] += 1
+            return time_us
+        if (
+            data.get("kind") != "commit"
+            or collection != POST_COLLECTION
+            or commit.get("operation") != "create"
+        ):
+            stats["dropped_decoded"] += 1
+            return time_us
+
+        record = commit.get("record") or {}
+        did = data.get("did")
+        if did in self._wanted_did_set:
+            rule = "wantedDids"
+        else:
+            rule = self.filter.match(did, record.get("text"), record.get("langs"))
+        stats["classify_seconds"] += time.perf_counter() - t2
+        if rule is None:
+            stats["dropped_classifier"] += 1
+            return time_us
+
+        self.db.insert_post(post_from_event(data))
+        stats["kept"] += 1
+        return time_us
+
+    async def run(self) -> None:
+        if self.last_time_us is None:
+            self.last_time_us = self.db.get_jetstream_cursor()
+
+        failures = 0
+        while True:
+            uri = self.subscribe_url()
+            resuming = self.last_time_us is not None
+            print(f"Connecting to Jetstream: {uri}", file=sys.stderr)
+            try:
+                dctx = self._new_decompressor()
+                async with websockets.connect(uri) as websocket:
+                    await self._publish_connection(websocket, uri)
+                    self.stats["connects"] += 1
+                    connected_at = time.monotonic()
+                    replayed = 0
+                    async for message in websocket:
+                        failures = 0
+                        time_us = self.handle_message(message, dctx)
+                        if resuming and time_us is not None:
+                            replayed += 1
+                            # ほぼリアルタイム（2 秒以内）のイベントに追いついたら追従完了とみなす
+                            if time_us >= (time.time() - 2.0) * 1_000_000:
+                                resuming = False
+                                elapsed = time.monotonic() - connected_at
+                                self.stats["last_catchup_seconds"] = round(elapsed, 3)
+                                self.stats["last_catchup_events"] = replayed
+                                print(
+                                    f"Jetstream caught up in {elapsed:.1f} seconds "
+                                    f"({replayed} events replayed)",
+                                    file=sys.stderr,
+                                )
+                raise ConnectionError("connection closed by server")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._websocket = None
+                failures += 1
+                self.stats["errors"] += 1
+                self.stats["last_error"] = str(e)
+                if self.last_time_us:
+                    self.db.save_jetstream_cursor(self.last_time_us)
+                delay = self._backoff_delay(failures)
+                print(f"Jetstream Error: {e}. Reconnecting in {delay:.1f} seconds...", file=sys.stderr)
+                await asyncio.sleep(delay)
@@ -0,0 +1,261 @@
+import sys
+import json
+import time
+import atexit
+import random
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from .tid import next_tid
+
+# 配送に失敗したときの再試行間隔（秒）。attempts 回目の失敗の後は BASE * 2**(attempts-1)、上限 MAX
+OUTBOX_BACKOFF_BASE = 2.0
+OUTBOX_BACKOFF_MAX = 300.0
+# 1 回の走査で配送する件数
+OUTBOX_BATCH = 50
+
+_STATUSES = ("pending", "delivered", "failed")
+
+
+def _is_permanent(e: Exception) -> bool:
+    """再試行しても成功しないエラー（レコードの不正・権限など 4xx）か。"""
+    code = getattr(e, "code", None)
+    return isinstance(code, int) and 400 <= code < 500 and code not in (408, 429)
+
+
+class Outbox:
+    """書き込み（レコード作成）を SQLite に記録し、バックグラウンドで PDS へ配送するキュー。
+
+    - enqueue() は rkey（TID）を振って 1 行 INSERT するだけなので、ネットワークを待たずに URI を返せる。
+    - ワーカーは putRecord で配送する。rkey が決まっているので、再送しても同じレコードが 1 件できるだけ。
+    - 一時的な失敗（429・5xx・通信エラー）は指数バックオフで再試行し、4xx や max_attempts 回の失敗で failed にする。
+    - 同じアカウントの書き込みは登録順に配送する（失敗したものがあれば後続はそのアカウント分だけ待つ）。
+    - 未配送の行はファイルに残るので、再起動後のワーカーが続きを配送する。
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        get_api: Callable[[str], Any],
+        max_attempts: int = 10,
+        poll_interval: float = 5.0,
+    ):
+        self.db_path = db_path
+        # repo（DID）からそのアカウントの BlueskyAPI を返す関数（ログアウト済みなら None）
+        self.get_api = get_api
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self._conn = sqlite3.connect(db_path, timeout=30.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                repo TEXT NOT NULL,
+                collection TEXT NOT NULL,
+                rkey TEXT NOT NULL,
+                record TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                created_at REAL NOT NULL,
+                delivered_at REAL,
+                cid TEXT,
+                last_error TEXT
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox(status, next_attempt_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_outbox_repo ON outbox(repo, status, id)")
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.delivered = 0
+        self.retried = 0
+        self.failed = 0
+
+    def start(self) -> "Outbox":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="bsky-outbox", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+        return self
+
+    def close(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def enqueue(self, data: dict) -> Dict[str, Any]:
+        """createRecord の payload（repo / collection / record）を登録し、受付結果を返す。"""
+        repo = data["repo"]
+        collection = data["collection"]
+        rkey = data.get("rkey") or next_tid()
+        now = time.time()
+        with self._lock:
+            with self._conn:
+                row_id = self._conn.execute(
+                    """
+                    INSERT INTO outbox (repo, collection, rkey, record, next_attempt_at, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    """,
+                    (repo, collection, rkey, json.dumps(data["record"], ensure_ascii=False), now, now),
+                ).lastrowid
+        self._wake.set()
+        return {"status": "queued", "id": row_id, "uri": f"at://{repo}/{collection}/{rkey}"}
+
+    # -------------------------
+    # Delivery
+    # -------------------------
+    def _due(self) -> List[tuple]:
+        """配送時刻を過ぎた行。同じアカウントの先の行が再試行待ちなら、その後ろの行は含めない。"""
+        now = time.time()
+        with self._lock:
+            return self._conn.execute(
+                """
+                SELECT id, repo, collection, rkey, record, attempts FROM outbox AS o
+                WHERE o.status = 'pending' AND o.next_attempt_at <= ?
+                  AND NOT EXISTS (
+                      SELECT 1 FROM outbox AS p
+                      WHERE p.repo = o.repo AND p.status = 'pending' AND p.id < o.id AND p.next_attempt_at > ?
+                  )
+                ORDER BY o.id LIMIT ?
+                """,
+                (now, now, OUTBOX_BATCH),
+            ).fetchall()
+
+    def _next_wait(self) -> float:
+        """各アカウントの先頭の未配送行のうち、最も早い配送時刻までの秒数。"""
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT MIN(next_attempt_at) FROM outbox AS o
+                WHERE o.status = 'pending'
+                  AND NOT EXISTS (
+                      SELECT 1 FROM outbox AS p WHERE p.repo = o.repo AND p.status = 'pending' AND p.id < o.id
+                  )
+                """
+            ).fetchone()
+        if row[0] is None:
+            return self.poll_interval
+        return min(self.poll_interval, max(0.0, row[0] - time.time()))
+
+    def _update(self, sql: str, params: tuple) -> None:
+        with self._lock:
+            with self._conn:
+                self._conn.execute(sql, params)
+
+    def _deliver(self, row: tuple) -> bool:
+        """1 件を配送する。同じアカウントの後続を配送してよければ True。"""
+        row_id, repo, collection, rkey, record, attempts = row
+        api = self.get_api(repo)
+        if api is None:
+            self.failed += 1
+            self._update(
+                "UPDATE outbox SET status = 'failed', last_error = ? WHERE id = ?",
+                (f"No logged-in session for {repo}", row_id),
+            )
+            return True
+        try:
+            # 再試行とその待機はこのワーカーが行うので、http_post_json には 1 回だけ送らせる
+            result = api.http_post_json(
+                "/xrpc/com.atproto.repo.putRecord",
+                {"repo": repo, "collection": collection, "rkey": rkey, "record": json.loads(record)},
+                retries=1,
+                **api.auth_params(),
+            )
+        except Exception as e:
+            attempts += 1
+            if _is_permanent(e) or attempts >= self.max_attempts:
+                self.failed += 1
+                self._update(
+                    "UPDATE outbox SET status = 'failed', attempts = ?, last_error = ? WHERE id = ?",
+                    (attempts, str(e), row_id),
+                )
+                return True
+            self.retried += 1
+            delay = min(OUTBOX_BACKOFF_MAX, OUTBOX_BACKOFF_BASE * 2 ** (attempts - 1))
+            self._update(
+                "UPDATE outbox SET attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                (attempts, time.time() + delay * random.uniform(0.8, 1.2), str(e), row_id),
+            )
+            return False
+        self.delivered += 1
+        self._update(
+            """
+            UPDATE outbox SET status = 'delivered', attempts = ?, delivered_at = ?, cid = ?, last_error = NULL
+            WHERE id = ?
+            """,
+            (attempts + 1, time.time(), result.get("cid"), row_id),
+        )
+        return True
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.clear()
+            blocked = set()
+            for row in self._due():
+                if self._stop.is_set():
+                    break
+                if row[1] in blocked:
+                    continue
+                try:
+                    if not self._deliver(row):
+                        blocked.add(row[1])
+                except Exception as e:
+                    blocked.add(row[1])
+                    print(f"Outbox delivery error: {e}", file=sys.stderr)
+            self._wake.wait(self._next_wait())
+
+    # -------------------------
+    # Status
+    # -------------------------
+    def status(
+        self, item_id: Optional[int] = None, status: Optional[str] = None, limit: int = 20
+    ) -> Dict[str, Any]:
+        """状態ごとの件数と、新しい順の項目（item_id / status で絞り込み）を返す。"""
+        if status is not None and status not in _STATUSES:
+            raise ValueError(f"Unknown status: {status} (use one of {', '.join(_STATUSES)})")
+        where, params = [], []
+        if item_id is not None:
+            where.append("id = ?")
+            params.append(item_id)
+        if status is not None:
+            where.append("status = ?")
+            params.append(status)
+        sql = "SELECT id, repo, collection, rkey, status, attempts, created_at, delivered_at, cid, last_error FROM outbox"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY id DESC LIMIT ?"
+        params.append(max(1, min(int(limit), 200)))
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+            rows = self._conn.execute(sql, params).fetchall()
+        items = []
+        for row_id, repo, collection, rkey, st, attempts, created_at, delivered_at, cid, last_error in rows:
+            item = {
+                "id": row_id,
+                "uri": f"at://{repo}/{collection}/{rkey}",
+                "status": st,
+                "attempts": attempts,
+                "created_at": created_at,
+            }
+            if delivered_at is not None:
+                item["delivered_at"] = delivered_at
+                item["cid"] = cid
+            if last_error:
+                item["last_error"] = last_error
+            items.append(item)
+        return {
+            "counts": {s: counts.get(s, 0) for s in _STATUSES},
+            "running": self._thread is not None and self._thread.is_alive(),
+            "delivered": self.delivered,
+            "retried": self.retried,
+            "failed": self.failed,
+            "items": items,
+        }
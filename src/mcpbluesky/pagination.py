@@ -0,0 +1,88 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, Optional
+
+# cursor 付き一覧 API の 1 ページあたりの最大件数（getFollows / searchPosts などの limit 上限）
+MAX_PAGE_SIZE = 100
+
+
+class Paginator:
+    """cursor を辿ってページを順に取得し、項目を 1 件ずつ返すイテレータ。
+
+    - fetch(cursor, limit) は 1 ページ分の応答 dict を返す関数。
+    - 現在のページを返している間に次のページを別スレッドで先読みする。
+    - key を渡すとその値でページをまたいだ重複を除く。
+    - 取得件数は max_items まで。最後のページの limit を残り件数に合わせるので、
+      途中で打ち切ってもページの境界で止まり、cursor から続きを取得できる。
+    - 保持するのは処理中と先読み中の 2 ページ分だけで、全件をメモリに溜めない。
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[Optional[str], int], Dict[str, Any]],
+        items_key: str,
+        max_items: int,
+        page_size: int = MAX_PAGE_SIZE,
+        key: Optional[Callable[[Dict[str, Any]], Any]] = None,
+        cursor: Optional[str] = None,
+    ):
+        self.fetch = fetch
+        self.items_key = items_key
+        self.max_items = max(0, int(max_items))
+        self.page_size = max(1, min(int(page_size), MAX_PAGE_SIZE))
+        self.key = key
+        # 続きを取得するための cursor（complete なら使わない）
+        self.cursor = cursor
+        self.complete = False
+        self.count = 0
+        self.pages = 0
+        self.duplicates = 0
+        self._seen: set = set()
+
+    def _limit(self, remaining: int) -> int:
+        return max(1, min(self.page_size, remaining))
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        if self.max_items <= 0:
+            return
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="bsky-prefetch") as ex:
+            pending = ex.submit(self.fetch, self.cursor, self._limit(self.max_items))
+            while pending is not None:
+                page = pending.result()
+                self.pages += 1
+                items = page.get(self.items_key) or []
+                next_cursor = page.get("cursor")
+
+                # 重複が無ければこのページで埋まらない場合だけ、次のページを先読みする
+                remaining = self.max_items - self.count - len(items)
+                pending = None
+                if next_cursor and items and remaining > 0:
+                    pending = ex.submit(self.fetch, next_cursor, self._limit(remaining))
+
+                for item in items:
+                    if self.count >= self.max_items:
+                        break
+                    if self.key is not None:
+                        k = self.key(item)
+                        if k in self._seen:
+                            self.duplicates += 1
+                            continue
+                        self._seen.add(k)
+                    self.count += 1
+                    yield item
+
+                self.cursor = next_cursor
+                if not next_cursor or not items:
+                    self.complete = True
+                    break
+                # 重複を除いた分だけ足りなければ続きを取りに行く
+                if pending is None and self.count < self.max_items:
+                    pending = ex.submit(self.fetch, next_cursor, self._limit(self.max_items - self.count))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "pages": self.pages,
+            "duplicates": self.duplicates,
+            "complete": self.complete,
+            "cursor": None if self.complete else self.cursor,
+        }
@@ -0,0 +1,197 @@
+import json
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional
+
+# 読み取り結果の名前付きビュー。種類ごとに残すフィールドをドット区切りのパスで列挙する。
+# "full" はフィールドを削らない（AppView の応答そのまま）。
+VIEW_NAMES = ("minimal", "summary", "full")
+DEFAULT_VIEW = "full"
+
+VIEWS: Dict[str, Dict[str, tuple]] = {
+    "post": {
+        "minimal": (
+            "uri", "cid", "author.handle", "record.text", "record.createdAt",
+        ),
+        "summary": (
+            "uri", "cid", "author.did", "author.handle", "author.displayName",
+            "record.text", "record.createdAt", "record.langs", "record.reply",
+            "embed.$type", "embed.external.uri", "embed.record.uri",
+            "likeCount", "replyCount", "repostCount", "quoteCount", "indexedAt",
+        ),
+    },
+    "profile": {
+        "minimal": ("did", "handle", "displayName"),
+        "summary": (
+            "did", "handle", "displayName", "description",
+            "followersCount", "followsCount", "postsCount", "createdAt",
+            "viewer.following", "viewer.followedBy", "viewer.muted", "viewer.blocking",
+        ),
+    },
+    "notification": {
+        "minimal": ("uri", "reason", "author.handle", "isRead", "indexedAt"),
+        "summary": (
+            "uri", "cid", "reason", "reasonSubject", "author.did", "author.handle",
+            "author.displayName", "record.text", "record.createdAt", "isRead", "indexedAt",
+        ),
+    },
+    "list": {
+        "minimal": ("uri", "name", "purpose"),
+        "summary": ("uri", "cid", "name", "purpose", "description", "listItemCount", "creator.handle", "indexedAt"),
+    },
+    "list_item": {
+        "minimal": ("uri", "subject.did", "subject.handle"),
+        "summary": ("uri", "subject.did", "subject.handle", "subject.displayName", "subject.description"),
+    },
+    "generator": {
+        "minimal": ("uri", "displayName"),
+        "summary": ("uri", "cid", "did", "displayName", "description", "creator.handle", "likeCount", "indexedAt"),
+    },
+    "like": {
+        "minimal": ("actor.did", "actor.handle", "createdAt"),
+        "summary": ("actor.did", "actor.handle", "actor.displayName", "createdAt", "indexedAt"),
+    },
+}
+
+# 他の種類を入れ子で持つ構造（フィードの 1 項目・スレッド）。中の投稿に post のビューを適用する。
+_COMPOSITE_KINDS = ("feed_item", "thread")
+
+
+def dumps(obj: Any) -> str:
+    """インデント・区切りの空白を省いた JSON 文字列にする（MCP クライアントへ返す読み取り結果用）。"""
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+@lru_cache(maxsize=256)
+def compile_fields(fields: tuple) -> Dict[str, Any]:
+    """フィールドパスの並びを入れ子の dict（葉は None）に変換する。
+
+    ("author.did", "author.handle", "record") -> {"author": {"did": None, "handle": None}, "record": None}
+    短いパスが指定されていれば、その下は丸ごと残す。
+    """
+    tree: Dict[str, Any] = {}
+    for path in fields:
+        parts = [p for p in str(path).split(".") if p]
+        if not parts:
+            continue
+        node = tree
+        for part in parts[:-1]:
+            child = node.get(part, {})
+            if child is None:
+                break
+            node = node.setdefault(part, child)
+        else:
+            node[parts[-1]] = None
+    return tree
+
+
+def _apply(obj: Any, tree: Optional[Dict[str, Any]]) -> Any:
+    if tree is None:
+        return obj
+    if isinstance(obj, list):
+        return [_apply(o, tree) for o in obj]
+    if not isinstance(obj, dict):
+        return obj
+    out = {}
+    for key, sub in tree.items():
+        if key in obj:
+            value = _apply(obj[key], sub)
+            # 入れ子の中身が 1 つも無ければキーごと省く
+            if sub is None or value not in ({}, []):
+                out[key] = value
+    return out
+
+
+def _tree(kind: str, view: str, fields: Optional[Iterable[str]]) -> Optional[Dict[str, Any]]:
+    """適用するフィールド木を返す。None はフィールドを削らないことを表す。"""
+    if fields:
+        return compile_fields(tuple(fields))
+    if view == "full":
+        return None
+    return compile_fields(VIEWS[kind][view])
+
+
+def _project_thread(node: Any, tree: Optional[Dict[str, Any]]) -> Any:
+    if not isinstance(node, dict):
+        return node
+    if "post" not in node:
+        # notFoundPost / blockedPost はそのまま（uri と $type だけの小さな値）
+        return node
+    out: Dict[str, Any] = {"post": _apply(node["post"], tree)}
+    if node.get("parent") is not None:
+        out["parent"] = _project_thread(node["parent"], tree)
+    if node.get("replies"):
+        out["replies"] = [_project_thread(r, tree) for r in node["replies"]]
+    return out
+
+
+def _project_feed_item(item: Any, tree: Optional[Dict[str, Any]]) -> Any:
+    if not isinstance(item, dict):
+        return item
+    out: Dict[str, Any] = {"post": _apply(item.get("post"), tree)}
+    reply = item.get("reply")
+    if isinstance(reply, dict):
+        out["reply"] = {k: _apply(v, tree) for k, v in reply.items() if k in ("parent", "root")}
+    reason = item.get("reason")
+    if isinstance(reason, dict):
+        # リポスト等の理由は種類と実行者だけで十分
+        out["reason"] = {"$type": reason.get("$type"), "by": (reason.get("by") or {}).get("handle")}
+    return out
+
+
+def check_view(view: str) -> None:
+    if view not in VIEW_NAMES:
+        raise ValueError(f"Unknown view: {view} (use one of {', '.join(VIEW_NAMES)})")
+
+
+def configure_default_view(view: str) -> None:
+    """view 引数を省略した読み取りツールが使うビューを設定する。"""
+    global DEFAULT_VIEW
+    check_view(view)
+    DEFAULT_VIEW = view
+
+
+def project(
+    obj: Any, kind: str, view: Optional[str] = None, fields: Optional[Iterable[str]] = None
+) -> Any:
+    """1 件分の値（投稿・プロフィール・通知・スレッド等）にビューまたはフィールド指定を適用する。
+
+    view を省略すると DEFAULT_VIEW。fields を指定した場合は view より優先する
+    （スレッドとフィードでは中の各投稿に適用）。
+    """
+    view = view or DEFAULT_VIEW
+    check_view(view)
+    if kind in _COMPOSITE_KINDS:
+        tree = _tree("post", view, fields)
+        if tree is None:
+            return obj
+        return _project_thread(obj, tree) if kind == "thread" else _project_feed_item(obj, tree)
+    return _apply(obj, _tree(kind, view, fields))
+
+
+def project_result(
+    result: Any,
+    shape: Dict[str, str],
+    view: Optional[str] = None,
+    fields: Optional[Iterable[str]] = None,
+) -> Any:
+    """XRPC 応答全体に project() を適用する。
+
+    shape は {応答のキー: 種類}。キーが "" なら応答そのものが 1 件の値。
+    キーの値がリストなら各要素に適用し、cursor など shape に無いキーはそのまま残す。
+    """
+    view = view or DEFAULT_VIEW
+    check_view(view)
+    if view == "full" and not fields:
+        return result
+    if "" in shape:
+        return project(result, shape[""], view, fields)
+    if not isinstance(result, dict):
+        return result
+    out = dict(result)
+    for key, kind in shape.items():
+        value = out.get(key)
+        if isinstance(value, list):
+            out[key] = [project(v, kind, view, fields) for v in value]
+        elif value is not None:
+            out[key] = project(value, kind, view, fields)
+    return out
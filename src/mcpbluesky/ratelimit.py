@@ -0,0 +1,135 @@
+import time
+import threading
+from typing import Dict, Optional, Tuple
+
+# 1 キー（ホスト × アカウント）あたりのデフォルト上限。従来のグローバル 0.2 秒間隔と同じ 5 req/s。
+DEFAULT_RATE = 5.0
+DEFAULT_BURST = 5.0
+MIN_RATE = 0.05
+
+
+class TokenBucket:
+    """予約方式のトークンバケット。
+
+    reserve() はロックを短時間だけ取ってトークンを 1 つ予約し、待つべき秒数を返す。
+    トークンが足りない場合は残量がマイナスになり、後続の呼び出しほど長く待つ（到着順の待ち行列）。
+    実際の sleep はロックの外で行うため、他のキーや他の待機者を止めない。
+    """
+
+    def __init__(self, rate: float = DEFAULT_RATE, capacity: float = DEFAULT_BURST):
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.server_limit: Optional[int] = None
+        self.server_remaining: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated = now
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1.0
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self.blocked_until - now)
+
+    def block_for(self, seconds: float) -> None:
+        """429 などで指定秒数このキーへの送信を止める。"""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def update_from_headers(self, headers) -> None:
+        """RateLimit-Limit / RateLimit-Remaining / RateLimit-Reset ヘッダに合わせて速度を調整する。"""
+        if headers is None:
+            return
+        try:
+            limit = headers.get("RateLimit-Limit")
+            remaining = headers.get("RateLimit-Remaining")
+            reset = headers.get("RateLimit-Reset")
+            if remaining is None or reset is None:
+                return
+            remaining_n = int(remaining)
+            time_left = float(reset) - time.time()
+        except (TypeError, ValueError):
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.server_limit = int(limit) if limit and str(limit).isdigit() else self.server_limit
+            self.server_remaining = remaining_n
+            if remaining_n <= 0:
+                if time_left > 0:
+                    self.blocked_until = max(self.blocked_until, now + time_left)
+                self.tokens = min(self.tokens, 0.0)
+                return
+            if time_left > 0:
+                # 残り枠をリセットまでの時間で均等に使うペースに合わせる（上限は max_rate）
+                self.rate = max(MIN_RATE, min(self.max_rate, remaining_n / time_left))
+            else:
+                self.rate = self.max_rate
+            self.tokens = min(self.tokens, float(remaining_n))
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            self._refill(time.monotonic())
+            return {
+                "rate": round(self.rate, 3),
+                "tokens": round(self.tokens, 3),
+                "blocked_for": round(max(0.0, self.blocked_until - time.monotonic()), 3),
+                "server_limit": self.server_limit,
+                "server_remaining": self.server_remaining,
+            }
+
+
+class RateLimiter:
+    """(base_url, acting DID) ごとに TokenBucket を持つレートリミッタ。"""
+
+    def __init__(self, rate: float = DEFAULT_RATE, burst: float = DEFAULT_BURST):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, rate: float, burst: Optional[float] = None) -> None:
+        """新しく作られるバケットの速度・バースト量を設定する。"""
+        with self._lock:
+            self.rate = rate
+            self.burst = burst if burst is not None else max(1.0, rate)
+            self._buckets.clear()
+
+    def bucket(self, key: Tuple[str, str]) -> TokenBucket:
+        b = self._buckets.get(key)
+        if b is None:
+            with self._lock:
+                b = self._buckets.get(key)
+                if b is None:
+                    b = TokenBucket(self.rate, self.burst)
+                    self._buckets[key] = b
+        return b
+
+    def acquire(self, key: Tuple[str, str]) -> float:
+        """送信枠を 1 つ取得する（必要なら待つ）。待った秒数を返す。"""
+        wait = self.bucket(key).reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def update(self, key: Tuple[str, str], headers) -> None:
+        self.bucket(key).update_from_headers(headers)
+
+    def penalize(self, key: Tuple[str, str], seconds: float) -> None:
+        self.bucket(key).block_for(seconds)
+
+    def stats(self) -> dict:
+        with self._lock:
+            items = list(self._buckets.items())
+        return {f"{base_url} {identity}": b.snapshot() for (base_url, identity), b in items}
@@ -3,66 +3,129 @@ import sys
 import json
 import asyncio
 import argparse
-import websockets
-from typing import Dict, Optional
+import threading
+from collections import OrderedDict
+from typing import Optional
 
 from mcp.server.fastmcp import FastMCP
 
-from .bluesky_db import BlueskyDB
-from .common_http import http_get_json, http_post_json
+from .bluesky_db import ENGAGEMENT_TABLES, BlueskyDB
+from .common_http import (
+    RATE_LIMITER,
+    RESPONSE_CACHE,
+    configure_transport,
+    http_get_json,
+    http_post_json,
+)
 from .bluesky_api import BlueskyAPI, BlueskySession
-from .tools_bluesky import register_bluesky_tools
+from .did_resolver import PLC_DIRECTORY, DidResolver
+from .ingest_filter import IngestFilter
+from .projection import VIEW_NAMES, configure_default_view
+from .outbox import Outbox
+from .session_store import SessionStore
+from .jetstream import MAX_WANTED_DIDS, POST_COLLECTION, JetstreamListener, load_zstd_dict
+from .tools_bluesky import configure_executor, register_bluesky_tools, run_blocking
 
 
 class SessionManager:
-    """複数ユーザーのセッションを管理するクラス（永続化対応）"""
-
-    def __init__(self, get_json, post_json, storage_file: str = "sessions.json"):
-        self.sessions: Dict[str, BlueskyAPI] = {}
+    """複数ユーザーのセッションを管理するクラス（永続化対応）
+
+    セッションは SessionStore（SQLite）に 1 ハンドル 1 行で保存する。
+    BlueskyAPI は get_api で初めて使われたときに作り、最近使った max_clients 個だけ保持する。
+    DID ドキュメントのキャッシュも同じストアに置き、各アカウントの PDS へ直接つなぐのに使う。
+    """
+
+    def __init__(
+        self,
+        get_json,
+        post_json,
+        storage_file: str = "sessions.json",
+        db_file: str = "sessions.db",
+        max_clients: int = 256,
+    ):
+        # 使用中の BlueskyAPI（最近使った順、LRU）
+        self.sessions: "OrderedDict[str, BlueskyAPI]" = OrderedDict()
         self.http_get_json = get_json
         self.http_post_json = post_json
         self.storage_file = storage_file
+        self.max_clients = max_clients
         self.default_handle: Optional[str] = None
+        self.store = SessionStore(db_file)
+        self.resolver = DidResolver(get_json, self.store)
+        # start_outbox() で作る。設定後に作る BlueskyAPI はレコード作成をここに記録する
+        self.outbox: Optional[Outbox] = None
+        self._lock = threading.Lock()
         self.load_sessions()
 
+    def _watch(self, handle: str, api: BlueskyAPI) -> None:
+        """トークンが自動更新されたら、そのハンドルの行だけを書き換える。"""
+        api.on_session_update = lambda _api: self.store.update_tokens(handle, _api.session)
+        api.outbox = self.outbox
+
+    def _api_for_did(self, did: str) -> Optional[BlueskyAPI]:
+        handle = self.store.handle_for_did(did)
+        return self.get_api(handle) if handle else None
+
+    def start_outbox(self, max_attempts: int = 10) -> Outbox:
+        """書き込みを Outbox 経由の非同期配送に切り替え、配送スレッドを起動する。"""
+        self.outbox = Outbox(self.store.db_path, self._api_for_did, max_attempts=max_attempts).start()
+        with self._lock:
+            for api in self.sessions.values():
+                api.outbox = self.outbox
+        return self.outbox
+
     def load_sessions(self) -> None:
-        """ファイルからセッション情報を読み込む"""
-        if not os.path.exists(self.storage_file):
-            return
+        """旧形式の sessions.json があれば取り込み、デフォルトのハンドルを決める"""
         try:
-            with open(self.storage_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                for handle, s_data in data.items():
-                    session = BlueskySession(**s_data)
-                    api = BlueskyAPI(session, self.http_get_json, self.http_post_json)
-                    self.sessions[handle] = api
-                self.default_handle = list(self.sessions.keys())[-1] if self.sessions else None
-                print(f"Loaded {len(self.sessions)} sessions from {self.storage_file}")
+            self.store.import_json(self.storage_file)
         except Exception as e:
-            print(f"Failed to load sessions: {e}")
+            print(f"Failed to migrate sessions: {e}", file=sys.stderr)
+        self.default_handle = self.store.latest_handle()
+        print(f"{self.store.count()} sessions in {self.store.db_path}", file=sys.stderr)
 
     def save_sessions(self) -> None:
-        """セッション情報をファイルに保存する"""
-        try:
-            data = {}
-            for handle, api in self.sessions.items():
-                s = api.session
-                data[handle] = {
-                    "accessJwt": s.accessJwt,
-                    "refreshJwt": s.refreshJwt,
-                    "did": s.did,
-                    "handle": s.handle,
-                    "pds_url": s.pds_url,
-                }
-            with open(self.storage_file, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"Failed to save sessions: {e}")
+        """使用中のセッションのトークンをストアに書き込む"""
+        with self._lock:
+            items = list(self.sessions.items())
+        for handle, api in items:
+            try:
+                self.store.update_tokens(handle, api.session)
+            except Exception as e:
+                print(f"Failed to save session {handle}: {e}", file=sys.stderr)
+
+    def _remember(self, handle: str, api: BlueskyAPI) -> None:
+        # self._lock を持った状態で呼ぶ
+        self.sessions[handle] = api
+        self.sessions.move_to_end(handle)
+        while len(self.sessions) > max(1, self.max_clients):
+            self.sessions.popitem(last=False)
+
+    def has_session(self, handle: str) -> bool:
+        with self._lock:
+            if handle in self.sessions:
+                return True
+        return self.store.get(handle) is not None
 
     def get_api(self, handle: Optional[str] = None) -> BlueskyAPI:
         target = handle or self.default_handle
-        if target and target in self.sessions:
-            return self.sessions[target]
+        if target:
+            with self._lock:
+                api = self.sessions.get(target)
+                if api is not None:
+                    self.sessions.move_to_end(target)
+                    return api
+            # ストアの読み込み（SQLite の busy 待ちがありうる）はロックの外で行う
+            session = self.store.get(target)
+            if session is not None:
+                with self._lock:
+                    # 読み込み中に他のスレッドが同じハンドルを載せていればそちらを使う
+                    api = self.sessions.get(target)
+                    if api is None:
+                        api = BlueskyAPI(session, self.http_get_json, self.http_post_json, resolver=self.resolver)
+                        self._watch(target, api)
+                        self._remember(target, api)
+                # PDS の解決（ネットワーク）はここでは行わず、最初の API 呼び出しの auth_params で行う
+                return api
         return BlueskyAPI(
             session=BlueskySession(pds_url="https://bsky.social"),
             http_get_json=self.http_get_json,
@@ -70,19 +133,21 @@ class SessionManager:
         )
 
     def add_session(self, handle: str, api: BlueskyAPI) -> None:
-        self.sessions[handle] = api
+        self.store.put(handle, api.session)
+        self._watch(handle, api)
+        with self._lock:
+            self._remember(handle, api)
         self.default_handle = handle
-        self.save_sessions()
 
     def remove_session(self, handle: str) -> bool:
-        """セッションを削除し、ファイルからも除去する"""
-        if handle in self.sessions:
-            del self.sessions[handle]
-            if self.default_handle == handle:
-                self.default_handle = list(self.sessions.keys())[-1] if self.sessions else None
-            self.save_sessions()
-            return True
-        return False
+        """セッションを削除し、ストアからも除去する"""
+        with self._lock:
+            self.sessions.pop(handle, None)
+        if not self.store.delete(handle):
+            return False
+        if self.default_handle == handle:
+            self.default_handle = self.store.latest_handle()
+        return True
 
 
 mcp = FastMCP(
@@ -90,8 +155,11 @@ mcp = FastMCP(
 )
 
 # database and session manager
-db = BlueskyDB()
+# ローカル DB は main() で引数を解釈してから開く（開くとスキーマのマイグレーションが走るため、
+# import や --help で待たせない）
+db: Optional[BlueskyDB] = None
 manager = SessionManager(http_get_json, http_post_json)
+jetstream: Optional[JetstreamListener] = None
 
 # Jetstream listener control (set in main)
 # NOTE: 起動時デフォルトでは Jetstream を起動しない。必要な場合は --jetstream を指定する。
@@ -102,10 +170,152 @@ register_bluesky_tools(mcp, manager)
 
 
 @mcp.tool()
-async def bsky_search_local_posts(keyword: Optional[str] = None, limit: int = 50) -> str:
-    """ローカルDBに保存された日本語投稿を検索します。"""
-    results = db.search_posts(keyword, limit)
-    return json.dumps(results, ensure_ascii=False, indent=2)
+async def bsky_search_local_posts(
+    keyword: Optional[str] = None,
+    limit: int = 50,
+    order: str = "recent",
+    author_did: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    reply_root: Optional[str] = None,
+    cursor: Optional[str] = None,
+) -> str:
+    """ローカルDBに保存された日本語投稿を検索します。
+
+    - order: "recent"（新しい順）または "rank"（キーワードとの関連度順）
+    - author_did / reply_root: 投稿者 DID・スレッドの root URI で絞り込み
+    - since / until: 投稿日時（ISO 8601）の範囲
+    - cursor: 前回結果の cursor を渡すと続きを取得（order="recent" のみ）
+    """
+    try:
+        page = await run_blocking(
+            db.search_posts_page,
+            keyword=keyword,
+            limit=limit,
+            order=order,
+            author_did=author_did,
+            since=since,
+            until=until,
+            reply_root=reply_root,
+            cursor=cursor,
+        )
+    except (ValueError, TimeoutError) as e:
+        return f"Error: {e}"
+    return json.dumps(page, ensure_ascii=False, indent=2)
+
+
+@mcp.tool()
+async def bsky_ingest_stats() -> str:
+    """Jetstream 取り込み（ローカルDBへのバッチ書き込み）の統計を取得します。"""
+    if db.writer is None:
+        return "Jetstream ingestion is not running."
+    stats = {
+        "writer": db.writer.stats(),
+        "jetstream": jetstream.stats,
+        "filter_rules": jetstream.filter.stats(),
+        "subscription": {
+            "wantedCollections": jetstream.collections,
+            "wantedDids": len(jetstream.wanted_dids),
+        },
+    }
+    return json.dumps(stats, ensure_ascii=False, indent=2)
+
+
+@mcp.tool()
+async def bsky_local_engagement_counts(uris: list[str]) -> str:
+    """ローカルDBに取り込んだいいね・リポストから、投稿 URI ごとの件数を返します。
+
+    Jetstream を --jetstream-collections で like / repost 付きで購読している場合に使えます。
+    """
+    try:
+        counts = await run_blocking(db.engagement_counts, uris)
+    except TimeoutError as e:
+        return f"Error: {e}"
+    return json.dumps(counts, ensure_ascii=False, indent=2)
+
+
+@mcp.tool()
+async def bsky_local_top_posts(
+    metric: str = "likes", since: Optional[str] = None, limit: int = 20
+) -> str:
+    """ローカルDBでいいね（metric="likes"）またはリポスト（"reposts"）の多い投稿を返します。
+
+    - since: この日時（ISO 8601）以降のいいね・リポストだけを数える
+    """
+    try:
+        posts = await run_blocking(db.top_posts, metric=metric, since=since, limit=limit)
+    except (ValueError, TimeoutError) as e:
+        return f"Error: {e}"
+    return json.dumps(posts, ensure_ascii=False, indent=2)
+
+
+@mcp.tool()
+async def bsky_local_follower_delta(
+    did: str, since: Optional[str] = None, until: Optional[str] = None
+) -> str:
+    """ローカルDBに取り込んだフォロー／解除から、DID のフォロワー増減を返します。
+
+    - since / until: 集計期間（ISO 8601）
+    """
+    try:
+        delta = await run_blocking(db.follower_delta, did, since=since, until=until)
+    except TimeoutError as e:
+        return f"Error: {e}"
+    return json.dumps(delta, ensure_ascii=False, indent=2)
+
+
+@mcp.tool()
+async def bsky_db_stats() -> str:
+    """ローカルDBのファイルサイズ・空きページ・テーブルごとの行数・保持ポリシーの実行状況を返します。"""
+    stats = await run_blocking(db.db_stats)
+    return json.dumps(stats, ensure_ascii=False, indent=2)
+
+
+def _list_member_dids(api: BlueskyAPI, list_uri: str) -> list[str]:
+    """リスト（app.bsky.graph.getList）のメンバー DID を全ページ分集める。"""
+    pager = api.paginate(
+        "/xrpc/app.bsky.graph.getList",
+        {"list": list_uri},
+        "items",
+        MAX_WANTED_DIDS,
+        key=lambda item: (item.get("subject") or {}).get("did"),
+    )
+    dids: list[str] = []
+    for item in pager:
+        did = (item.get("subject") or {}).get("did")
+        if did:
+            dids.append(did)
+    return dids
+
+
+@mcp.tool()
+async def bsky_jetstream_update_options(
+    wanted_dids: Optional[list[str]] = None,
+    wanted_collections: Optional[list[str]] = None,
+    list_uri: Optional[str] = None,
+    acting_handle: Optional[str] = None,
+) -> str:
+    """Jetstream の購読条件（wantedDids / wantedCollections）を接続を切らずに変更します。
+
+    - wanted_dids: 監視するアカウントの DID（空リストで全アカウントに戻す）
+    - list_uri: 指定するとリストのメンバーを wanted_dids に加える
+    - wanted_collections: 受信するコレクション（省略時は現状維持）
+    wantedDids を指定している間は、そのアカウントの投稿を本文フィルタを通さずに保存します。
+    """
+    if not JETSTREAM_ENABLED:
+        return "Jetstream ingestion is not running."
+    try:
+        if list_uri:
+            members = await run_blocking(lambda: _list_member_dids(manager.get_api(acting_handle), list_uri))
+            wanted_dids = list(wanted_dids or []) + members
+        result = await run_blocking(
+            jetstream.update_options,
+            wanted_collections=wanted_collections,
+            wanted_dids=wanted_dids,
+        )
+    except Exception as e:
+        return f"Error: {e}"
+    return json.dumps(result, ensure_ascii=False, indent=2)
 
 
 async def jetstream_listener() -> None:
@@ -113,41 +323,13 @@ async def jetstream_listener() -> None:
     if not JETSTREAM_ENABLED:
         return
 
-    uri = "wss://jetstream1.us-east.bsky.network/subscribe?wantedCollections=app.bsky.feed.post"
-    print(f"Connecting to Jetstream: {uri}")
-
-    while True:
-        try:
-            async with websockets.connect(uri) as websocket:
-                async for message in websocket:
-                    data = json.loads(message)
-                    if data.get("kind") == "commit" and data.get("commit", {}).get("operation") == "create":
-                        commit = data["commit"]
-                        record = commit.get("record", {})
-                        text = record.get("text", "")
-                        langs = record.get("langs", [])
-
-                        if db.is_japanese(text, langs):
-                            post_data = {
-                                "uri": f"at://{data['did']}/{commit['collection']}/{commit['rkey']}",
-                                "cid": commit.get("cid"),
-                                "author_did": data["did"],
-                                "author_handle": None,
-                                "text": text,
-                                "created_at": record.get("createdAt"),
-                                "reply_parent": record.get("reply", {}).get("parent", {}).get("uri"),
-                                "reply_root": record.get("reply", {}).get("root", {}).get("uri"),
-                            }
-                            db.insert_post(post_data)
-        except Exception as e:
-            print(f"Jetstream Error: {e}. Reconnecting in 5 seconds...")
-            await asyncio.sleep(5)
+    await jetstream.run()
 
 
 def main(argv: Optional[list[str]] = None) -> None:
     """Console script entry point."""
 
-    global JETSTREAM_ENABLED
+    global JETSTREAM_ENABLED, db, jetstream
 
     parser = argparse.ArgumentParser(description="mcpbluesky server")
     parser.add_argument(
@@ -168,9 +350,196 @@ def main(argv: Optional[list[str]] = None) -> None:
         action="store_true",
         help="Enable Jetstream background listener",
     )
+    parser.add_argument(
+        "--jetstream-overlap",
+        type=float,
+        default=5.0,
+        help="Seconds replayed before the saved cursor when (re)connecting to Jetstream (default: 5)",
+    )
+    parser.add_argument(
+        "--jetstream-compress",
+        action="store_true",
+        help="Subscribe to the zstd-compressed Jetstream stream (requires zstandard)",
+    )
+    parser.add_argument(
+        "--jetstream-zstd-dict",
+        default=os.getenv("JETSTREAM_ZSTD_DICT"),
+        help="Path to Jetstream's zstd_dictionary (default: env JETSTREAM_ZSTD_DICT)",
+    )
+    parser.add_argument(
+        "--jetstream-filter",
+        default=None,
+        help="JSON file with ingest filter rules (default: Japanese posts only)",
+    )
+    parser.add_argument(
+        "--jetstream-collections",
+        default=POST_COLLECTION,
+        help=(
+            "Comma-separated collections to ingest: app.bsky.feed.post, app.bsky.feed.like, "
+            "app.bsky.feed.repost, app.bsky.graph.follow (default: app.bsky.feed.post)"
+        ),
+    )
+    parser.add_argument(
+        "--jetstream-engagement-all",
+        action="store_true",
+        help="Store likes/reposts of any post (default: only posts already in the local DB)",
+    )
+    parser.add_argument(
+        "--db-batch-size",
+        type=int,
+        default=500,
+        help="Max posts per Jetstream ingest transaction (default: 500)",
+    )
+    parser.add_argument(
+        "--db-flush-interval",
+        type=float,
+        default=1.0,
+        help="Max seconds a received post waits before its batch is committed (default: 1.0)",
+    )
+    parser.add_argument(
+        "--db-retention-days",
+        type=float,
+        default=None,
+        help="Delete locally stored posts/likes/reposts/follows older than this many days (default: keep all)",
+    )
+    parser.add_argument(
+        "--db-max-posts",
+        type=int,
+        default=None,
+        help="Keep at most this many posts, deleting the oldest first (default: no limit)",
+    )
+    parser.add_argument(
+        "--db-maintenance-interval",
+        type=float,
+        default=300.0,
+        help="Seconds between retention/incremental-vacuum runs (default: 300)",
+    )
+    parser.add_argument(
+        "--db-read-pool-size",
+        type=int,
+        default=4,
+        help="Read-only SQLite connections kept for local search tools (default: 4)",
+    )
+    parser.add_argument(
+        "--db-query-timeout",
+        type=float,
+        default=5.0,
+        help="Abort local search queries running longer than this many seconds (0 disables, default: 5)",
+    )
+    parser.add_argument(
+        "--db-stats",
+        action="store_true",
+        help="Print local DB size and row counts as JSON and exit",
+    )
+    parser.add_argument(
+        "--http-pool-size",
+        type=int,
+        default=4,
+        help="Max idle keep-alive connections per host (default: 4)",
+    )
+    parser.add_argument(
+        "--http-idle-timeout",
+        type=float,
+        default=60.0,
+        help="Close pooled connections idle longer than this many seconds (default: 60)",
+    )
+    parser.add_argument(
+        "--http2",
+        action="store_true",
+        help="Use HTTP/2 multiplexing (requires httpx[http2])",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=5.0,
+        help="Requests per second per (host, account) before RateLimit headers are seen (default: 5)",
+    )
+    parser.add_argument(
+        "--rate-burst",
+        type=float,
+        default=None,
+        help="Token bucket burst size per (host, account) (default: same as --rate-limit)",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=1024,
+        help="Max cached read responses (LRU with per-endpoint TTL, 0 disables)",
+    )
+    parser.add_argument(
+        "--default-view",
+        choices=VIEW_NAMES,
+        default="full",
+        help="Projection applied by read tools when 'view' is omitted (default: full)",
+    )
+    parser.add_argument(
+        "--plc-directory",
+        default=os.getenv("PLC_DIRECTORY_URL", PLC_DIRECTORY),
+        help="PLC directory used to resolve did:plc documents (default: env PLC_DIRECTORY_URL or https://plc.directory)",
+    )
+    parser.add_argument(
+        "--did-cache-ttl",
+        type=float,
+        default=86400.0,
+        help="Seconds a resolved DID document (account PDS) is reused before fetching it again (default: 86400)",
+    )
+    parser.add_argument(
+        "--async-writes",
+        action="store_true",
+        help="Record create-type writes in a local outbox and deliver them in the background",
+    )
+    parser.add_argument(
+        "--outbox-max-attempts",
+        type=int,
+        default=10,
+        help="Delivery attempts before an outbox write is marked failed (default: 10)",
+    )
+    parser.add_argument(
+        "--max-live-sessions",
+        type=int,
+        default=256,
+        help="Logged-in accounts kept as live API clients; others are reloaded from the session DB on use (default: 256)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=8,
+        help="Worker threads for blocking Bluesky API calls made by tools (default: 8)",
+    )
 
     args = parser.parse_args(argv)
 
+    # 引数の検証は、バックグラウンドスレッド（writer・maintainer・outbox）を起動する前に済ませる
+    if args.jetstream:
+        collections = [c.strip() for c in args.jetstream_collections.split(",") if c.strip()]
+        unknown = set(collections) - {POST_COLLECTION, *ENGAGEMENT_TABLES}
+        if unknown:
+            parser.error(f"Unsupported --jetstream-collections: {', '.join(sorted(unknown))}")
+        if args.jetstream_compress:
+            if not args.jetstream_zstd_dict:
+                parser.error("--jetstream-compress requires --jetstream-zstd-dict")
+            # 接続後に失敗すると再接続のバックオフを繰り返すだけになるので、ここで確かめる
+            try:
+                load_zstd_dict(args.jetstream_zstd_dict)
+            except ImportError:
+                parser.error("--jetstream-compress requires zstandard (pip install 'mcpbluesky[zstd]')")
+            except OSError as e:
+                parser.error(f"Cannot read --jetstream-zstd-dict: {e}")
+        ingest_filter = None
+        if args.jetstream_filter:
+            try:
+                ingest_filter = IngestFilter.from_file(args.jetstream_filter)
+            except (OSError, ValueError) as e:
+                parser.error(f"Invalid --jetstream-filter: {e}")
+
+    db = BlueskyDB()
+    jetstream = JetstreamListener(db)
+    db.configure_reader(size=args.db_read_pool_size, timeout=args.db_query_timeout or None)
+
+    if args.db_stats:
+        print(json.dumps(db.db_stats(), ensure_ascii=False, indent=2))
+        return
+
     print(
         f"Starting mcpbluesky (Multi-user support) transport={args.transport}...",
         file=sys.stderr,
@@ -180,10 +549,39 @@ def main(argv: Optional[list[str]] = None) -> None:
         mcp.host = args.host
         mcp.port = args.port
 
+    configure_transport(
+        pool_size=args.http_pool_size,
+        idle_timeout=args.http_idle_timeout,
+        http2=args.http2,
+    )
+    configure_executor(args.workers)
+    RATE_LIMITER.configure(args.rate_limit, args.rate_burst)
+    RESPONSE_CACHE.configure(args.cache_size)
+    configure_default_view(args.default_view)
+    manager.max_clients = args.max_live_sessions
+    manager.resolver.configure(ttl=args.did_cache_ttl, plc_url=args.plc_directory)
+    if args.async_writes:
+        manager.start_outbox(max_attempts=args.outbox_max_attempts)
+
     JETSTREAM_ENABLED = bool(args.jetstream)
 
+    if JETSTREAM_ENABLED or args.db_retention_days or args.db_max_posts:
+        db.start_maintainer(
+            retention_seconds=args.db_retention_days * 86400 if args.db_retention_days else None,
+            max_posts=args.db_max_posts,
+            interval=args.db_maintenance_interval,
+        )
+
     if JETSTREAM_ENABLED:
-        import threading
+        db.start_writer(batch_size=args.db_batch_size, flush_interval=args.db_flush_interval)
+        jetstream.overlap_us = int(args.jetstream_overlap * 1_000_000)
+        jetstream.collections = collections
+        jetstream.engagement_local_only = not args.jetstream_engagement_all
+        if ingest_filter is not None:
+            jetstream.filter = ingest_filter
+        if args.jetstream_compress:
+            jetstream.compress = True
+            jetstream.zstd_dict_path = args.jetstream_zstd_dict
 
         def _jetstream_thread_main() -> None:
             asyncio.run(jetstream_listener())
@@ -191,7 +589,10 @@ def main(argv: Optional[list[str]] = None) -> None:
         t = threading.Thread(target=_jetstream_thread_main, name="jetstream", daemon=True)
         t.start()
 
-    mcp.run(transport=args.transport, mount_path=args.mount_path)
+    try:
+        mcp.run(transport=args.transport, mount_path=args.mount_path)
+    finally:
+        db.close()
 
 
 if __name__ == "__main__":
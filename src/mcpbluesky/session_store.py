@@ -0,0 +1,202 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+from typing import Dict, List, Optional, Tuple
+
+from .bluesky_api import BlueskySession
+
+_SESSION_FIELDS = ("accessJwt", "refreshJwt", "did", "handle", "pds_url")
+
+
+class SessionStore:
+    """ログインセッション（トークン）と DID ドキュメントのキャッシュを保存する SQLite ストア。
+
+    - 1 ハンドル 1 行で、ログイン・トークン更新・ログアウトはその行だけを書き換える。
+    - WAL と busy timeout を使うので、複数プロセスから同時に書き込んでも壊れない。
+    - 接続は操作ごとに開いて閉じる（どのスレッドから呼んでもよい）。
+    """
+
+    def __init__(self, db_path: str = "sessions.db"):
+        self.db_path = os.path.expandvars(os.path.expanduser(db_path))
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sessions (
+                    handle TEXT PRIMARY KEY,
+                    did TEXT,
+                    access_jwt TEXT,
+                    refresh_jwt TEXT,
+                    pds_url TEXT NOT NULL,
+                    logged_in_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_logged_in ON sessions(logged_in_at)")
+            # DidResolver が解決した DID ドキュメントのキャッシュ
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS did_docs (did TEXT PRIMARY KEY, doc TEXT NOT NULL, fetched_at REAL NOT NULL)"
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30.0)
+        # WAL ではコミットごとの fsync を省いてもファイルは壊れない
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def get(self, handle: str) -> Optional[BlueskySession]:
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT access_jwt, refresh_jwt, did, pds_url FROM sessions WHERE handle = ?", (handle,)
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        access_jwt, refresh_jwt, did, pds_url = row
+        return BlueskySession(accessJwt=access_jwt, refreshJwt=refresh_jwt, did=did, handle=handle, pds_url=pds_url)
+
+    def put(self, handle: str, session: BlueskySession) -> None:
+        """ログインしたハンドルの行を追加・置き換える（ログイン時刻も更新する）。"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    """
+                    INSERT INTO sessions (handle, did, access_jwt, refresh_jwt, pds_url, logged_in_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(handle) DO UPDATE SET
+                        did = excluded.did,
+                        access_jwt = excluded.access_jwt,
+                        refresh_jwt = excluded.refresh_jwt,
+                        pds_url = excluded.pds_url,
+                        logged_in_at = excluded.logged_in_at,
+                        updated_at = excluded.updated_at
+                    """,
+                    (handle, session.did, session.accessJwt, session.refreshJwt, session.pds_url, now, now),
+                )
+        finally:
+            conn.close()
+
+    def update_tokens(self, handle: str, session: BlueskySession) -> bool:
+        """トークン更新を書き込む。ログアウト済み（行が無い）なら何もせず False を返す。"""
+        conn = self._connect()
+        try:
+            with conn:
+                cur = conn.execute(
+                    """
+                    UPDATE sessions SET access_jwt = ?, refresh_jwt = ?, pds_url = ?, updated_at = ?
+                    WHERE handle = ?
+                    """,
+                    (session.accessJwt, session.refreshJwt, session.pds_url, time.time(), handle),
+                )
+                return cur.rowcount > 0
+        finally:
+            conn.close()
+
+    def delete(self, handle: str) -> bool:
+        conn = self._connect()
+        try:
+            with conn:
+                return conn.execute("DELETE FROM sessions WHERE handle = ?", (handle,)).rowcount > 0
+        finally:
+            conn.close()
+
+    def handle_for_did(self, did: str) -> Optional[str]:
+        """DID でログインしているハンドル（複数あれば最後にログインしたもの）。"""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT handle FROM sessions WHERE did = ? ORDER BY logged_in_at DESC LIMIT 1", (did,)
+            ).fetchone()
+        finally:
+            conn.close()
+        return row[0] if row else None
+
+    def latest_handle(self) -> Optional[str]:
+        """最後にログインしたハンドル（acting_handle 省略時のデフォルト）。"""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT handle FROM sessions ORDER BY logged_in_at DESC LIMIT 1").fetchone()
+        finally:
+            conn.close()
+        return row[0] if row else None
+
+    def handles(self) -> List[str]:
+        conn = self._connect()
+        try:
+            return [r[0] for r in conn.execute("SELECT handle FROM sessions ORDER BY logged_in_at")]
+        finally:
+            conn.close()
+
+    def count(self) -> int:
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        finally:
+            conn.close()
+
+    def get_did_doc(self, did: str) -> Optional[Tuple[dict, float]]:
+        """キャッシュした DID ドキュメントと取得時刻（UNIX 秒）。無ければ None。"""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT doc, fetched_at FROM did_docs WHERE did = ?", (did,)).fetchone()
+        finally:
+            conn.close()
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def put_did_doc(self, did: str, doc: dict, fetched_at: float) -> None:
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO did_docs (did, doc, fetched_at) VALUES (?, ?, ?)",
+                    (did, json.dumps(doc, ensure_ascii=False, separators=(",", ":")), fetched_at),
+                )
+        finally:
+            conn.close()
+
+    def import_json(self, json_path: str) -> int:
+        """旧形式の sessions.json を取り込み、取り込んだ件数を返す。
+
+        既にストアにあるハンドルは上書きしない（取り込み後にトークンが更新されている可能性があるため）。
+        取り込みが済んだファイルは <名前>.migrated にリネームし、次回以降は読まない。
+        """
+        if not os.path.exists(json_path):
+            return 0
+        with open(json_path, "r", encoding="utf-8") as f:
+            data: Dict[str, dict] = json.load(f)
+
+        # ファイル内の順序（最後が従来のデフォルト）をログイン時刻の順序として残す
+        base = time.time() - len(data)
+        rows = []
+        for i, (handle, s) in enumerate(data.items()):
+            s = {k: s.get(k) for k in _SESSION_FIELDS}
+            rows.append(
+                (handle, s["did"], s["accessJwt"], s["refreshJwt"], s["pds_url"] or "https://bsky.social", base + i, base + i)
+            )
+        conn = self._connect()
+        try:
+            with conn:
+                n = conn.executemany(
+                    """
+                    INSERT OR IGNORE INTO sessions
+                        (handle, did, access_jwt, refresh_jwt, pds_url, logged_in_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    rows,
+                ).rowcount
+        finally:
+            conn.close()
+        os.replace(json_path, json_path + ".migrated")
+        print(f"Migrated {n} sessions from {json_path} to {self.db_path}", file=sys.stderr)
+        return n
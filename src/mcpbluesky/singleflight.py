@@ -0,0 +1,70 @@
+import copy
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class _Call:
+    """実行中の 1 件の呼び出し。結果（または例外）を待機者と共有する。"""
+
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """同じキーの呼び出しが同時に来たら 1 回だけ実行し、結果を全員で共有する（single-flight）。
+
+    後から来た呼び出しは先行する呼び出しの完了を待ち、同じ結果のコピー（または同じ例外）を受け取る。
+    完了した呼び出しは記憶しない（結果の再利用は ResponseCache の役割）。
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        # 待機者がコピーを取っている間に呼び出し元が結果を書き換えないよう、共有した場合は自分もコピーを返す
+        return copy.deepcopy(call.result) if call.waiters else call.result
+
+    def stats(self) -> dict:
+        with self._lock:
+            in_flight = len(self._calls)
+        total = self.executed + self.coalesced
+        return {
+            "in_flight": in_flight,
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "saved_rate": round(self.coalesced / total, 3) if total else 0.0,
+        }
@@ -0,0 +1,30 @@
+import random
+import threading
+import time
+
+# TID（Timestamp Identifier）: レコードキーに使う 13 文字の時刻順の ID。
+# 64 bit = 先頭 1 bit は 0、53 bit がマイクロ秒の UNIX 時刻、10 bit がクロック ID。
+# 並び順が文字列順と一致する base32 で表す。
+_B32_SORTABLE = "234567abcdefghijklmnopqrstuvwxyz"
+
+_lock = threading.Lock()
+_last_us = 0
+_clock_id = random.getrandbits(10)
+
+
+def _encode(value: int) -> str:
+    chars = []
+    for _ in range(13):
+        chars.append(_B32_SORTABLE[value & 31])
+        value >>= 5
+    return "".join(reversed(chars))
+
+
+def next_tid() -> str:
+    """新しい TID を返す。同じプロセス内では呼ぶたびに必ず大きくなる。"""
+    global _last_us
+    with _lock:
+        now_us = time.time_ns() // 1000
+        # 同じマイクロ秒や時計の巻き戻りでも重複させない
+        _last_us = max(now_us, _last_us + 1)
+        return _encode((_last_us << 10) | _clock_id)
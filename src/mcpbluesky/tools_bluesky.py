@@ -1,7 +1,38 @@
 import json
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
 from .bluesky_api import BlueskyAPI
+from .common_http import RATE_LIMITER, RESPONSE_CACHE, SINGLE_FLIGHT
+
+# ブロッキングな BlueskyAPI 呼び出し（urllib/http.client・time.sleep）を実行する専用スレッドプール。
+# イベントループ上で直接呼ぶと、1 件の遅いリクエストが他クライアントのツール呼び出しを全て止めてしまう。
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_MAX_WORKERS = 8
+
+
+def configure_executor(max_workers: int) -> None:
+    """ツール実行用スレッドプールのワーカー数を設定する（最初の呼び出し前に設定すること）。"""
+    global _EXECUTOR, _MAX_WORKERS
+    _MAX_WORKERS = max(1, int(max_workers))
+    if _EXECUTOR is not None:
+        _EXECUTOR.shutdown(wait=False)
+        _EXECUTOR = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        _EXECUTOR = ThreadPoolExecutor(max_workers=_MAX_WORKERS, thread_name_prefix="bsky-tool")
+    return _EXECUTOR
+
+
+async def run_blocking(fn, *args, **kwargs):
+    """ブロッキング関数をスレッドプールで実行し、結果を await で受け取る。"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), functools.partial(fn, *args, **kwargs))
 
 
 def register_bluesky_tools(mcp, manager):
@@ -31,57 +62,130 @@ def register_bluesky_tools(mcp, manager):
         if not password:
             return "Error: password is required. Provide 'password' argument or set env var BSKY_APP_PASSWORD."
 
-        # 既存セッションがあれば削除(ログアウト)
-        if handle in manager.sessions:
-            manager.remove_session(handle)
+        def _login() -> str:
+            # 既存セッションがあれば削除(ログアウト)
+            if manager.has_session(handle):
+                manager.remove_session(handle)
 
-        new_session = manager.get_api().session.__class__(pds_url="https://bsky.social")
-        api = BlueskyAPI(new_session, manager.http_get_json, manager.http_post_json)
-        result = api.login(handle, password)
-        if "successful" in result:
-            manager.add_session(handle, api)
-        return result
+            new_session = manager.get_api().session.__class__(pds_url="https://bsky.social")
+            api = BlueskyAPI(new_session, manager.http_get_json, manager.http_post_json, resolver=manager.resolver)
+            result = api.login(handle, password)
+            if "successful" in result:
+                manager.add_session(handle, api)
+            return result
+
+        return await run_blocking(_login)
 
     @mcp.tool()
     async def bsky_logout(handle: str) -> str:
         """指定したハンドルのログインセッションを破棄（ログアウト）します。"""
-        if manager.remove_session(handle):
+        if await run_blocking(manager.remove_session, handle):
             return f"Successfully logged out: {handle}"
         return f"Handle not found in sessions: {handle}"
 
     @mcp.tool()
     async def bsky_refresh_session(acting_handle: Optional[str] = None) -> str:
         """セッションを更新します。"""
-        return manager.get_api(acting_handle).refresh_session()
+        return await run_blocking(lambda: manager.get_api(acting_handle).refresh_session())
 
     @mcp.tool()
-    async def bsky_get_profile(handle: str, acting_handle: Optional[str] = None) -> str:
-        """Blueskyのプロフィールを取得します。"""
-        return manager.get_api(acting_handle).get_profile(handle)
+    async def bsky_get_profile(
+        handle: str,
+        view: Optional[str] = None,
+        fields: Optional[list[str]] = None,
+        acting_handle: Optional[str] = None,
+    ) -> str:
+        """Blueskyのプロフィールを取得します。
+
+        view（minimal / summary / full）または fields（ドット区切りのパス）で返す項目を絞れます。
+        """
+        return await run_blocking(
+            lambda: manager.get_api(acting_handle).get_profile(handle, view=view, fields=fields)
+        )
+
+    @mcp.tool()
+    async def bsky_get_profiles(
+        actors: list[str],
+        view: Optional[str] = None,
+        fields: Optional[list[str]] = None,
+        acting_handle: Optional[str] = None,
+    ) -> str:
+        """複数ユーザーのプロフィールをまとめて取得します（ハンドルまたは DID のリスト）。
+
+        25 件ずつ getProfiles で並行に取得し、入力と同じ順序で返します（見つからないものは null）。
+        view（minimal / summary / full）または fields（ドット区切りのパス）で返す項目を絞れます。
+        """
+        return await run_blocking(
+            lambda: manager.get_api(acting_handle).get_profiles(actors, view=view, fields=fields)
+        )
+
+    @mcp.tool()
+    async def bsky_get_posts(
+        uris: list[str],
+        view: Optional[str] = None,
+        fields: Optional[list[str]] = None,
+        acting_handle: Optional[str] = None,
+    ) -> str:
+        """複数の投稿をまとめて取得します（at:// URI のリスト）。
+
+        25 件ずつ getPosts で並行に取得し、入力と同じ順序で返します（見つからないものは null）。
+        view（minimal / summary / full）または fields（ドット区切りのパス）で返す項目を絞れます。
+        """
+        return await run_blocking(
+            lambda: manager.get_api(acting_handle).get_posts(uris, view=view, fields=fields)
+        )
 
     @mcp.tool()
     async def bsky_get_author_feed(
         handle: str,
         limit: int = 10,
         cursor: Optional[str] = None,
+        view: Optional[str] = None,
+        fields: Optional[list[str]] = None,
         acting_handle: Optional[str] = None,
     ) -> str:
-        """指定したユーザーの最新投稿フィードを取得します。"""
-        return manager.get_api(acting_handle).get_author_feed(
-            handle=handle, limit=limit, cursor=cursor
+        """指定したユーザーの最新投稿フィードを取得します。
+
+        view（minimal / summary / full）または fields（ドット区切りのパス）で返す項目を絞れます。
+        """
+        return await run_blocking(
+            lambda: manager.get_api(acting_handle).get_author_feed(
+                handle=handle, limit=limit, cursor=cursor, view=view, fields=fields
+            )
         )
 
     @mcp.tool()
-    async def bsky_get_actor_feeds(handle: str, acting_handle: Optional[str] = None) -> str:
-        """指定したユーザーのカスタムフィード一覧を取得します。"""
-        return manager.get_api(acting_handle).get_actor_feeds(handle)
+    async def bsky_get_actor_feeds(
+        handle: str,
+        view: Optional[str] = None,
+        fields: Optional[list[str]] = None,
+        acting_handle: Optional[str] = None,
+    ) -> str:
+        """指定したユーザーのカスタムフィード一覧を取得します。
+
+        view（minimal / summary / full）または fields（ドット区切りのパス）で返す項目を絞れます。
+        """
+        return await run_blocking(
+            lambda: manager.get_api(acting_handle).get_actor_feeds(handle, view=view, fields=fields)
+        )
 
     @mcp.tool()
     async def bsky_get_timeline(
-        limit: int = 20, cursor: Optional[str] = None, acting_handle: Optional[str] = None
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        view: Optional[str] = None,
+        fields: Optional[list[str]] = None,
+        acting_handle: Optional[str] = None,
     ) -> str:
-        """ログインユーザーのホームタイムラインを取得します（要認証）。"""
-        return manager.get_api(acting_handle).get_timeline(limit=limit, cursor=cursor)
+        """ログインユーザーのホームタイムラインを取得します（要認証）。
+
+        view（minimal / summary / full）または fields（ドット区切りのパス）で返す項目を絞れます。
+        """
+        return await run_blocking(
+            lambda: manager.get_api(acting_handle).get_timeline(
+                limit=limit, cursor=cursor, view=view, fields=fields
+            )
+        )
 
     @mcp.tool()
     async def bsky_get_timeline_page(
@@ -92,30 +196,50 @@ def register_bluesky_tools(mcp, manager):
         acting_handle: Optional[str] = None,
     ) -> str:
         """ホームタイムラインを要約または全文で取得します（要認証）。"""
-        return manager.get_api(acting_handle).get_timeline_page(
-            limit=limit,
-            cursor=cursor,
-            summary=summary,
-            text_max_len=text_max_len,
+        return await run_blocking(
+            lambda: manager.get_api(acting_handle).get_timeline_page(
+                limit=limit,
+                cursor=cursor,
+                summary=summary,
+                text_max_len=text_max_len,
+            )
         )
 
     @mcp.tool()
     async def bsky_get_post_thread(
-        uri: str, depth: int = 6, acting_handle: Optional[str] = None
+        uri: str,
+        depth: int = 6,
+        view: Optional[str] = None,
+        fields: Optional[list[str]] = None,
+        acting_handle: Optional[str] = None,
     ) -> str:
-        """特定投稿のスレッド（返信ツリー）を取得します。"""
-        return manager.get_api(acting_handle).get_post_thread(uri=uri, depth=depth)
+        """特定投稿のスレッド（返信ツリー）を取得します。
+
+        view（minimal / summary / full）または fields（ドット区切りのパス）で返す項目を絞れます。
+        """
+        return await run_blocking(
+            lambda: manager.get_api(acting_handle).get_post_thread(
+                uri=uri, depth=depth, view=view, fields=fields
+            )
+        )
 
     @mcp.tool()
     async def bsky_get_follows(
         handle: str,
         limit: int = 50,
         cursor: Optional[str] = None,
+        view: Optional[str] = None,
+        fields: Optional[list[str]] = None,
         acting_handle: Optional[str] = None,
     ) -> str:
-        """指定ユーザーのフォロー一覧を取得します。"""
-        return manager.get_api(acting_handle).get_follows(
-            handle=handle, limit=limit, cursor=cursor
+        """指定ユーザーのフォロー一覧を取得します。
+
+        view（minimal / summary / full）または fields（ドット区切りのパス）で返す項目を絞れます。
+        """
+        return await run_blocking(
+            lambda: manager.get_api(acting_handle).get_follows(
+                handle=handle, limit=limit, cursor=cursor, view=view, fields=fields
+            )
         )
 
     @mcp.tool()
@@ -123,29 +247,81 @@ def register_bluesky_tools(mcp, manager):
         handle: str,
         limit: int = 50,
         cursor: Optional[str] = None,
+        view: Optional[str] = None,
+        fields: Optional[list[str]] = None,
+        acting_handle: Optional[str] = None,
+    ) -> str:
+        """指定ユーザーのフォロワー一覧を取得します。
+
+        view（minimal / summary / full）または fields（ドット区切りのパス）で返す項目を絞れます。
+        """
+        return await run_blocking(
+            lambda: manager.get_api(acting_handle).get_followers(
+                handle=handle, limit=limit, cursor=cursor, view=view, fields=fields
+            )
+        )
+
+    @mcp.tool()
+    async def bsky_get_follows_all(
+        handle: str,
+        max_items: int = 1000,
+        cursor: Optional[str] = None,
         acting_handle: Optional[str] = None,
     ) -> str:
-        """指定ユーザーのフォロワー一覧を取得します。"""
-        return manager.get_api(acting_handle).get_followers(
-            handle=handle, limit=limit, cursor=cursor
+        """指定ユーザーのフォロー一覧を全件取得します。
+
+        cursor を辿って最大 max_items 件（上限 10000）を 1 回で取得し、重複を除いた要約形式で返します。
+        途中で打ち切った場合は結果の cursor を渡すと続きから取得できます。
+        """
+        return await run_blocking(
+            lambda: manager.get_api(acting_handle).get_follows_all(handle, max_items=max_items, cursor=cursor)
+        )
+
+    @mcp.tool()
+    async def bsky_get_followers_all(
+        handle: str,
+        max_items: int = 1000,
+        cursor: Optional[str] = None,
+        acting_handle: Optional[str] = None,
+    ) -> str:
+        """指定ユーザーのフォロワー一覧を全件取得します。
+
+        cursor を辿って最大 max_items 件（上限 10000）を 1 回で取得し、重複を除いた要約形式で返します。
+        途中で打ち切った場合は結果の cursor を渡すと続きから取得できます。
+        """
+        return await run_blocking(
+            lambda: manager.get_api(acting_handle).get_followers_all(
+                handle, max_items=max_items, cursor=cursor
+            )
         )
 
     @mcp.tool()
     async def bsky_get_notifications(
-        limit: int = 20, cursor: Optional[str] = None, acting_handle: Optional[str] = None
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        view: Optional[str] = None,
+        fields: Optional[list[str]] = None,
+        acting_handle: Optional[str] = None,
     ) -> str:
-        """ログインユーザーの通知一覧を取得します（要認証）。"""
-        return manager.get_api(acting_handle).get_notifications(limit=limit, cursor=cursor)
+        """ログインユーザーの通知一覧を取得します（要認証）。
+
+        view（minimal / summary / full）または fields（ドット区切りのパス）で返す項目を絞れます。
+        """
+        return await run_blocking(
+            lambda: manager.get_api(acting_handle).get_notifications(
+                limit=limit, cursor=cursor, view=view, fields=fields
+            )
+        )
 
     @mcp.tool()
     async def bsky_resolve_handle(handle: str, acting_handle: Optional[str] = None) -> str:
         """ハンドル名をDIDに変換します。"""
-        return manager.get_api(acting_handle).resolve_handle(handle)
+        return await run_blocking(lambda: manager.get_api(acting_handle).resolve_handle(handle))
 
     @mcp.tool()
     async def bsky_post(text: str, acting_handle: Optional[str] = None) -> str:
         """新規投稿を作成します（要認証）。"""
-        return manager.get_api(acting_handle).post(text)
+        return await run_blocking(lambda: manager.get_api(acting_handle).post(text))
 
     @mcp.tool()
     async def bsky_reply(
@@ -157,85 +333,173 @@ def register_bluesky_tools(mcp, manager):
         acting_handle: Optional[str] = None,
     ) -> str:
         """特定投稿へ返信します（要認証）。"""
-        return manager.get_api(acting_handle).reply(
-            text=text,
-            parent_uri=parent_uri,
-            parent_cid=parent_cid,
-            root_uri=root_uri,
-            root_cid=root_cid,
+        return await run_blocking(
+            lambda: manager.get_api(acting_handle).reply(
+                text=text,
+                parent_uri=parent_uri,
+                parent_cid=parent_cid,
+                root_uri=root_uri,
+                root_cid=root_cid,
+            )
         )
 
     @mcp.tool()
     async def bsky_like(uri: str, cid: str, acting_handle: Optional[str] = None) -> str:
         """特定投稿にいいねします（要認証）。"""
-        return manager.get_api(acting_handle).like(uri=uri, cid=cid)
+        return await run_blocking(lambda: manager.get_api(acting_handle).like(uri=uri, cid=cid))
 
     @mcp.tool()
     async def bsky_repost(uri: str, cid: str, acting_handle: Optional[str] = None) -> str:
         """特定投稿をリポストします（要認証）。"""
-        return manager.get_api(acting_handle).repost(uri=uri, cid=cid)
+        return await run_blocking(lambda: manager.get_api(acting_handle).repost(uri=uri, cid=cid))
 
     @mcp.tool()
     async def bsky_search_posts(
         query: str,
         limit: int = 10,
         cursor: Optional[str] = None,
+        view: Optional[str] = None,
+        fields: Optional[list[str]] = None,
         acting_handle: Optional[str] = None,
     ) -> str:
-        """公開投稿を検索します。"""
-        return manager.get_api(acting_handle).search_posts(
-            query=query, limit=limit, cursor=cursor
+        """公開投稿を検索します。
+
+        view（minimal / summary / full）または fields（ドット区切りのパス）で返す項目を絞れます。
+        """
+        return await run_blocking(
+            lambda: manager.get_api(acting_handle).search_posts(
+                query=query, limit=limit, cursor=cursor, view=view, fields=fields
+            )
         )
 
     @mcp.tool()
-    async def bsky_get_likes(uri: str, acting_handle: Optional[str] = None) -> str:
-        """指定投稿のいいね一覧を取得します。"""
-        return manager.get_api(acting_handle).get_likes(uri)
+    async def bsky_search_posts_all(
+        query: str,
+        max_items: int = 1000,
+        cursor: Optional[str] = None,
+        text_max_len: int = 120,
+        acting_handle: Optional[str] = None,
+    ) -> str:
+        """公開投稿を検索し、複数ページ分をまとめて取得します。
+
+        cursor を辿って最大 max_items 件（上限 10000）を 1 回で取得し、重複を除いた要約形式で返します。
+        途中で打ち切った場合は結果の cursor を渡すと続きから取得できます。
+        """
+        return await run_blocking(
+            lambda: manager.get_api(acting_handle).search_posts_all(
+                query, max_items=max_items, cursor=cursor, text_max_len=text_max_len
+            )
+        )
+
+    @mcp.tool()
+    async def bsky_get_likes(
+        uri: str,
+        view: Optional[str] = None,
+        fields: Optional[list[str]] = None,
+        acting_handle: Optional[str] = None,
+    ) -> str:
+        """指定投稿のいいね一覧を取得します。
+
+        view（minimal / summary / full）または fields（ドット区切りのパス）で返す項目を絞れます。
+        """
+        return await run_blocking(
+            lambda: manager.get_api(acting_handle).get_likes(uri, view=view, fields=fields)
+        )
 
     @mcp.tool()
     async def bsky_get_lists(
         handle: str,
         limit: int = 50,
         cursor: Optional[str] = None,
+        view: Optional[str] = None,
+        fields: Optional[list[str]] = None,
         acting_handle: Optional[str] = None,
     ) -> str:
-        """指定ユーザーのリスト一覧を取得します。"""
-        return manager.get_api(acting_handle).get_lists(handle=handle, limit=limit, cursor=cursor)
+        """指定ユーザーのリスト一覧を取得します。
+
+        view（minimal / summary / full）または fields（ドット区切りのパス）で返す項目を絞れます。
+        """
+        return await run_blocking(
+            lambda: manager.get_api(acting_handle).get_lists(
+                handle=handle, limit=limit, cursor=cursor, view=view, fields=fields
+            )
+        )
 
     @mcp.tool()
     async def bsky_get_list(
         list_uri: str,
         limit: int = 50,
         cursor: Optional[str] = None,
+        view: Optional[str] = None,
+        fields: Optional[list[str]] = None,
         acting_handle: Optional[str] = None,
     ) -> str:
-        """指定リストの詳細を取得します。"""
-        return manager.get_api(acting_handle).get_list(list_uri=list_uri, limit=limit, cursor=cursor)
+        """指定リストの詳細を取得します。
+
+        view（minimal / summary / full）または fields（ドット区切りのパス）で返す項目を絞れます。
+        """
+        return await run_blocking(
+            lambda: manager.get_api(acting_handle).get_list(
+                list_uri=list_uri, limit=limit, cursor=cursor, view=view, fields=fields
+            )
+        )
+
+    @mcp.tool()
+    async def bsky_get_lists_all(
+        handle: str,
+        max_items: int = 1000,
+        cursor: Optional[str] = None,
+        acting_handle: Optional[str] = None,
+    ) -> str:
+        """指定ユーザーのリスト一覧を全件取得します。
+
+        cursor を辿って最大 max_items 件（上限 10000）を 1 回で取得し、重複を除いた要約形式で返します。
+        途中で打ち切った場合は結果の cursor を渡すと続きから取得できます。
+        """
+        return await run_blocking(
+            lambda: manager.get_api(acting_handle).get_lists_all(handle, max_items=max_items, cursor=cursor)
+        )
+
+    @mcp.tool()
+    async def bsky_get_list_all(
+        list_uri: str,
+        max_items: int = 1000,
+        cursor: Optional[str] = None,
+        acting_handle: Optional[str] = None,
+    ) -> str:
+        """指定リストのメンバーを全件取得します。
+
+        cursor を辿って最大 max_items 件（上限 10000）を 1 回で取得し、重複を除いた要約形式で返します。
+        途中で打ち切った場合は結果の cursor を渡すと続きから取得できます。
+        """
+        return await run_blocking(
+            lambda: manager.get_api(acting_handle).get_list_all(list_uri, max_items=max_items, cursor=cursor)
+        )
 
     @mcp.tool()
     async def bsky_delete_post(post_uri: str, acting_handle: Optional[str] = None) -> str:
         """投稿を削除します（要認証）。"""
-        return manager.get_api(acting_handle).delete_post(post_uri)
+        return await run_blocking(lambda: manager.get_api(acting_handle).delete_post(post_uri))
 
     @mcp.tool()
     async def bsky_follow(subject_did: str, acting_handle: Optional[str] = None) -> str:
         """指定DIDをフォローします（要認証）。"""
-        return manager.get_api(acting_handle).follow(subject_did)
+        return await run_blocking(lambda: manager.get_api(acting_handle).follow(subject_did))
 
     @mcp.tool()
     async def bsky_unfollow(follow_uri: str, acting_handle: Optional[str] = None) -> str:
         """フォローを解除します（要認証）。"""
-        return manager.get_api(acting_handle).unfollow(follow_uri)
+        return await run_blocking(lambda: manager.get_api(acting_handle).unfollow(follow_uri))
 
     @mcp.tool()
     async def bsky_block(subject_did: str, acting_handle: Optional[str] = None) -> str:
         """指定DIDをブロックします（要認証）。"""
-        return manager.get_api(acting_handle).block(subject_did)
+        return await run_blocking(lambda: manager.get_api(acting_handle).block(subject_did))
 
     @mcp.tool()
     async def bsky_unblock(block_uri: str, acting_handle: Optional[str] = None) -> str:
         """ブロックを解除します（要認証）。"""
-        return manager.get_api(acting_handle).unblock(block_uri)
+        return await run_blocking(lambda: manager.get_api(acting_handle).unblock(block_uri))
 
     @mcp.tool()
     async def bsky_create_list(
@@ -245,22 +509,24 @@ def register_bluesky_tools(mcp, manager):
         acting_handle: Optional[str] = None,
     ) -> str:
         """新しいリストを作成します（要認証）。"""
-        return manager.get_api(acting_handle).create_list(
-            name=name, purpose=purpose, description=description
+        return await run_blocking(
+            lambda: manager.get_api(acting_handle).create_list(
+                name=name, purpose=purpose, description=description
+            )
         )
 
     @mcp.tool()
     async def bsky_delete_list(list_uri: str, acting_handle: Optional[str] = None) -> str:
         """リストを削除します（要認証）。"""
-        return manager.get_api(acting_handle).delete_list(list_uri)
+        return await run_blocking(lambda: manager.get_api(acting_handle).delete_list(list_uri))
 
     @mcp.tool()
     async def bsky_add_to_list(
         subject_did: str, list_uri: str, acting_handle: Optional[str] = None
     ) -> str:
         """ユーザーをリストに追加します（要認証）。"""
-        return manager.get_api(acting_handle).add_to_list(
-            subject_did=subject_did, list_uri=list_uri
+        return await run_blocking(
+            lambda: manager.get_api(acting_handle).add_to_list(subject_did=subject_did, list_uri=list_uri)
         )
 
     @mcp.tool()
@@ -268,29 +534,88 @@ def register_bluesky_tools(mcp, manager):
         listitem_uri: str, acting_handle: Optional[str] = None
     ) -> str:
         """ユーザーをリストから削除します（要認証）。"""
-        return manager.get_api(acting_handle).remove_from_list(listitem_uri)
+        return await run_blocking(lambda: manager.get_api(acting_handle).remove_from_list(listitem_uri))
+
+    @mcp.tool()
+    async def bsky_outbox_status(
+        id: Optional[int] = None, status: Optional[str] = None, limit: int = 20
+    ) -> str:
+        """--async-writes で受け付けた書き込みの配送状況を返します。
+
+        - id: 受付時に返された id の項目だけを返す
+        - status: "pending"（配送待ち）/ "delivered"（配送済み、cid 付き）/ "failed"（失敗、last_error 付き）で絞り込み
+        """
+        if manager.outbox is None:
+            return "Async writes are not enabled (start the server with --async-writes)."
+        try:
+            result = await run_blocking(manager.outbox.status, item_id=id, status=status, limit=limit)
+        except ValueError as e:
+            return f"Error: {e}"
+        return json.dumps(result, ensure_ascii=False, indent=2)
+
+    @mcp.tool()
+    async def bsky_batch_write(
+        operations: list[dict], concurrency: int = 2, acting_handle: Optional[str] = None
+    ) -> str:
+        """複数の作成・削除を applyWrites でまとめて実行し、操作ごとの結果を返します（要認証）。
+
+        operations の各要素（action ごとに必要なキー）:
+        - {"action": "follow" | "block", "subject": DID}
+        - {"action": "like" | "repost", "uri": 投稿URI, "cid": 投稿CID}
+        - {"action": "list_item", "subject": DID, "list": リストURI}
+        - {"action": "post", "text": 本文}
+        - {"action": "create", "collection": NSID, "record": {...}, "rkey": 省略可}
+        - {"action": "delete", "uri": 自分のレコードのURI}
+        200 件ずつ 1 リクエストにまとめ、concurrency 個まで並行に送ります。
+        """
+        return await run_blocking(
+            lambda: manager.get_api(acting_handle).batch_write(operations, concurrency=concurrency)
+        )
 
     @mcp.tool()
     async def bsky_search_users(
         term: str,
         limit: int = 10,
         cursor: Optional[str] = None,
+        view: Optional[str] = None,
+        fields: Optional[list[str]] = None,
         acting_handle: Optional[str] = None,
     ) -> str:
-        """ユーザーをキーワードで検索します。"""
-        return manager.get_api(acting_handle).search_users(
-            term=term, limit=limit, cursor=cursor
+        """ユーザーをキーワードで検索します。
+
+        view（minimal / summary / full）または fields（ドット区切りのパス）で返す項目を絞れます。
+        """
+        return await run_blocking(
+            lambda: manager.get_api(acting_handle).search_users(
+                term=term, limit=limit, cursor=cursor, view=view, fields=fields
+            )
+        )
+
+    @mcp.tool()
+    async def bsky_search_users_all(
+        term: str,
+        max_items: int = 1000,
+        cursor: Optional[str] = None,
+        acting_handle: Optional[str] = None,
+    ) -> str:
+        """ユーザーをキーワードで検索し、複数ページ分をまとめて取得します。
+
+        cursor を辿って最大 max_items 件（上限 10000）を 1 回で取得し、重複を除いた要約形式で返します。
+        途中で打ち切った場合は結果の cursor を渡すと続きから取得できます。
+        """
+        return await run_blocking(
+            lambda: manager.get_api(acting_handle).search_users_all(term, max_items=max_items, cursor=cursor)
         )
 
     @mcp.tool()
     async def bsky_mute(handle: str, acting_handle: Optional[str] = None) -> str:
         """指定ユーザーをミュートします（要認証）。"""
-        return manager.get_api(acting_handle).mute(handle)
+        return await run_blocking(lambda: manager.get_api(acting_handle).mute(handle))
 
     @mcp.tool()
     async def bsky_unmute(handle: str, acting_handle: Optional[str] = None) -> str:
         """ミュートを解除します（要認証）。"""
-        return manager.get_api(acting_handle).unmute(handle)
+        return await run_blocking(lambda: manager.get_api(acting_handle).unmute(handle))
 
     @mcp.tool()
     async def bsky_update_profile(
@@ -299,8 +624,10 @@ def register_bluesky_tools(mcp, manager):
         acting_handle: Optional[str] = None,
     ) -> str:
         """自分のプロフィールを更新します（要認証）。"""
-        return manager.get_api(acting_handle).update_profile(
-            displayName=displayName, description=description
+        return await run_blocking(
+            lambda: manager.get_api(acting_handle).update_profile(
+                displayName=displayName, description=description
+            )
         )
 
     @mcp.tool()
@@ -311,10 +638,29 @@ def register_bluesky_tools(mcp, manager):
         acting_handle: Optional[str] = None,
     ) -> str:
         """投稿に対する返信制限を設定します（要認証）。"""
-        return manager.get_api(acting_handle).set_threadgate(
-            post_uri=post_uri,
-            allow_mentions=allow_mentions,
-            allow_following=allow_following,
+        return await run_blocking(
+            lambda: manager.get_api(acting_handle).set_threadgate(
+                post_uri=post_uri,
+                allow_mentions=allow_mentions,
+                allow_following=allow_following,
+            )
         )
 
+    @mcp.tool()
+    async def bsky_http_stats() -> str:
+        """HTTP 層の統計（レスポンスキャッシュのヒット/ミス、同時リクエストの相乗り数、レート制限の状態、DID 解決）を取得します。"""
+        stats = {
+            "cache": RESPONSE_CACHE.stats(),
+            "singleflight": SINGLE_FLIGHT.stats(),
+            "rate_limit": RATE_LIMITER.stats(),
+            "did_resolver": manager.resolver.stats(),
+        }
+        return json.dumps(stats, ensure_ascii=False, indent=2)
+
+    @mcp.tool()
+    async def bsky_clear_cache() -> str:
+        """読み取り API のレスポンスキャッシュを全て破棄します。"""
+        n = RESPONSE_CACHE.invalidate()
+        return f"Cleared {n} cached responses."
+
     return True
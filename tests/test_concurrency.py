@@ -0,0 +1,133 @@
+import json
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from mcpbluesky import tools_bluesky
+from mcpbluesky.bluesky_api import BlueskyAPI, BlueskySession
+from mcpbluesky.common_http import RATE_LIMITER, http_get_json, http_post_json
+
+# スタンドインサーバーが 1 リクエストに掛ける時間（秒）と同時に投げるツール呼び出しの数
+DELAY = 0.3
+CALLS = 6
+
+
+class _SlowAppView(BaseHTTPRequestHandler):
+    """getProfile に DELAY 秒かけて応答し、同時に処理していたリクエスト数の最大を記録する。"""
+
+    protocol_version = "HTTP/1.1"
+    lock = threading.Lock()
+    active = 0
+    peak = 0
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.active += 1
+            cls.peak = max(cls.peak, cls.active)
+        try:
+            time.sleep(DELAY)
+            actor = self.path.split("actor=", 1)[-1]
+            body = json.dumps({"did": f"did:plc:{actor}", "handle": actor}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+class _Mcp:
+    def __init__(self):
+        self.tools = {}
+
+    def tool(self):
+        def register(fn):
+            self.tools[fn.__name__] = fn
+            return fn
+
+        return register
+
+
+class _Manager:
+    """ログインしていない API をスタンドインに向けて返すだけの SessionManager の代わり。"""
+
+    resolver = None
+    outbox = None
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+
+    def get_api(self, handle=None):
+        def get_json(path, params, **kwargs):
+            kwargs["base_url"] = self.base_url
+            return http_get_json(path, params, **kwargs)
+
+        return BlueskyAPI(BlueskySession(), get_json, http_post_json)
+
+
+@pytest.fixture
+def tools():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SlowAppView)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    _SlowAppView.peak = 0
+    RATE_LIMITER.configure(1000.0, 1000.0)
+    mcp = _Mcp()
+    tools_bluesky.register_bluesky_tools(mcp, _Manager(f"http://127.0.0.1:{server.server_port}"))
+    try:
+        yield mcp.tools
+    finally:
+        server.shutdown()
+        server.server_close()
+        tools_bluesky.configure_executor(tools_bluesky._MAX_WORKERS)
+
+
+async def _run_concurrently(tools, prefix: str) -> float:
+    start = time.monotonic()
+    results = await asyncio.gather(
+        *(tools["bsky_get_profile"](f"{prefix}{i}.test") for i in range(CALLS))
+    )
+    elapsed = time.monotonic() - start
+    for i, result in enumerate(results):
+        assert json.loads(result)["handle"] == f"{prefix}{i}.test"
+    return elapsed
+
+
+def test_slow_tool_calls_overlap(tools):
+    tools_bluesky.configure_executor(CALLS)
+    elapsed = asyncio.run(_run_concurrently(tools, "overlap"))
+    # 直列なら CALLS * DELAY 秒かかる。重なっていれば DELAY 秒強で終わる
+    assert elapsed < CALLS * DELAY / 2
+    assert _SlowAppView.peak >= CALLS // 2
+
+
+def test_event_loop_stays_responsive(tools):
+    tools_bluesky.configure_executor(CALLS)
+
+    async def main():
+        calls = asyncio.ensure_future(_run_concurrently(tools, "loop"))
+        # ツール呼び出しの実行中もイベントループは他のタスクを回せる
+        ticks = 0
+        while not calls.done():
+            await asyncio.sleep(0.01)
+            ticks += 1
+        await calls
+        return ticks
+
+    assert asyncio.run(main()) >= DELAY / 0.01 / 2
+
+
+def test_worker_count_bounds_concurrency(tools):
+    tools_bluesky.configure_executor(1)
+    elapsed = asyncio.run(_run_concurrently(tools, "serial"))
+    # ワーカー 1 本なら 1 件ずつ処理される
+    assert _SlowAppView.peak == 1
+    assert elapsed >= CALLS * DELAY * 0.9
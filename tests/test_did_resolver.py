@@ -0,0 +1,129 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from mcpbluesky.common_http import RATE_LIMITER, http_get_json
+from mcpbluesky.did_resolver import DidResolver
+
+PLC_DID = "did:plc:ewvi7nxzyoun6zhxrhs64oiz"
+WEB_DID = "did:web:example.test"
+WEB_PATH_DID = "did:web:example.test:u:alice"
+
+
+def _doc(did, pds, handle="alice.test"):
+    return {
+        "id": did,
+        "alsoKnownAs": [f"at://{handle}"],
+        "service": [{"id": "#atproto_pds", "type": "AtprotoPersonalDataServer", "serviceEndpoint": pds}],
+    }
+
+
+class _Directory(BaseHTTPRequestHandler):
+    """PLC ディレクトリと did:web のホストのスタンドイン。docs にないパスや fail 中は 404 を返す。"""
+
+    protocol_version = "HTTP/1.1"
+    docs = {}
+    requests = []
+    fail = False
+
+    def do_GET(self):
+        cls = type(self)
+        path = self.path.split("?", 1)[0]
+        cls.requests.append(path)
+        doc = None if cls.fail else cls.docs.get(path)
+        body = json.dumps(doc if doc is not None else {"error": "NotFound"}).encode()
+        self.send_response(200 if doc is not None else 404)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def directory():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Directory)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    _Directory.docs = {
+        f"/{PLC_DID}": _doc(PLC_DID, "https://pds-1.test/"),
+        "/.well-known/did.json": _doc(WEB_DID, "https://web-pds.test"),
+        "/u/alice/did.json": _doc(WEB_PATH_DID, "https://web-pds.test"),
+    }
+    _Directory.requests = []
+    _Directory.fail = False
+    RATE_LIMITER.configure(1000.0, 1000.0)
+    try:
+        yield f"http://127.0.0.1:{server.server_port}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _resolver(url, **kwargs):
+    """did:web の https://<ホスト> をスタンドインに向け、要求された base_url を記録する。"""
+    bases = []
+
+    def get_json(path, params, **kw):
+        bases.append(kw["base_url"])
+        if kw["base_url"].startswith("https://"):
+            kw["base_url"] = url
+        return http_get_json(path, params, **kw)
+
+    resolver = DidResolver(get_json, plc_url=url + "/", **kwargs)
+    return resolver, bases
+
+
+def test_plc_resolution_is_cached(directory):
+    resolver, bases = _resolver(directory)
+    assert resolver.pds_for_did(PLC_DID) == "https://pds-1.test"
+    assert resolver.pds_for_did(PLC_DID) == "https://pds-1.test"
+    assert _Directory.requests == [f"/{PLC_DID}"]
+    assert bases == [directory]
+    stats = resolver.stats()
+    assert (stats["fetches"], stats["hits"], stats["cached"]) == (1, 1, 1)
+
+
+def test_did_web_location(directory):
+    resolver, bases = _resolver(directory)
+    assert resolver.pds_for_did(WEB_DID) == "https://web-pds.test"
+    assert resolver.pds_for_did(WEB_PATH_DID) == "https://web-pds.test"
+    assert _Directory.requests == ["/.well-known/did.json", "/u/alice/did.json"]
+    assert bases == ["https://example.test", "https://example.test"]
+    with pytest.raises(ValueError, match="Unsupported DID method"):
+        resolver.resolve("did:key:z6Mk")
+
+
+def test_document_is_fetched_again_after_ttl(directory):
+    resolver, _ = _resolver(directory, ttl=0.2)
+    assert resolver.pds_for_did(PLC_DID) == "https://pds-1.test"
+    # PDS を移行した
+    _Directory.docs[f"/{PLC_DID}"] = _doc(PLC_DID, "https://pds-2.test")
+    assert resolver.pds_for_did(PLC_DID) == "https://pds-1.test"
+    time.sleep(0.3)
+    assert resolver.pds_for_did(PLC_DID) == "https://pds-2.test"
+    assert len(_Directory.requests) == 2
+
+
+def test_stale_document_is_used_when_upstream_fails(directory):
+    resolver, _ = _resolver(directory, ttl=0.2)
+    doc = resolver.resolve(PLC_DID)
+    time.sleep(0.3)
+    _Directory.fail = True
+    assert resolver.resolve(PLC_DID) == doc
+    stats = resolver.stats()
+    assert (stats["fetches"], stats["errors"], stats["stale"]) == (2, 1, 1)
+    # キャッシュがなければ失敗をそのまま返す
+    with pytest.raises(Exception):
+        resolver.resolve("did:plc:unknown")
+
+
+def test_mismatched_document_id_is_rejected(directory):
+    resolver, _ = _resolver(directory)
+    _Directory.docs["/did:plc:other"] = _doc(PLC_DID, "https://evil.test")
+    with pytest.raises(ValueError, match="id mismatch"):
+        resolver.resolve("did:plc:other")
@@ -0,0 +1,58 @@
+import json
+
+from mcpbluesky.bluesky_db import BlueskyDB
+from mcpbluesky.jetstream import JetstreamListener
+
+
+LOCAL = "at://did:plc:author/app.bsky.feed.post/3kpost"
+REMOTE = "at://did:plc:other/app.bsky.feed.post/3kother"
+
+
+def _frame(event):
+    # Jetstream と同じ区切りのないフレーム（事前判定は生の文字列を見る）
+    return json.dumps(event, separators=(",", ":"), ensure_ascii=False)
+
+
+def _post_frame():
+    return _frame({
+        "did": "did:plc:author", "time_us": 1, "kind": "commit",
+        "commit": {"operation": "create", "collection": "app.bsky.feed.post", "rkey": "3kpost", "cid": "c",
+                   "record": {"text": "こんにちは", "langs": ["ja"], "createdAt": "2024-11-01T00:00:00Z"}},
+    })
+
+
+def _like_frame(rkey, subject):
+    return _frame({
+        "did": "did:plc:liker", "time_us": 2, "kind": "commit",
+        "commit": {"operation": "create", "collection": "app.bsky.feed.like", "rkey": rkey,
+                   "record": {"subject": {"uri": subject, "cid": "c"}, "createdAt": "2024-11-01T00:00:00Z"}},
+    })
+
+
+def _listener(db):
+    return JetstreamListener(db, collections=["app.bsky.feed.post", "app.bsky.feed.like"])
+
+
+def test_like_on_missing_post_is_not_counted(tmp_path):
+    db = BlueskyDB(str(tmp_path / "posts.db"))
+    listener = _listener(db)
+    for frame in (_post_frame(), _like_frame("l1", LOCAL), _like_frame("l2", REMOTE)):
+        listener.handle_message(frame)
+    assert listener.stats["records"] == 1
+    assert listener.stats["dropped_decoded"] == 1
+    assert db.engagement_counts([LOCAL, REMOTE]) == {
+        LOCAL: {"likes": 1, "reposts": 0},
+        REMOTE: {"likes": 0, "reposts": 0},
+    }
+    db.close()
+
+
+def test_writer_counts_skipped_records(tmp_path):
+    db = BlueskyDB(str(tmp_path / "posts.db"))
+    db.start_writer(flush_interval=0.05)
+    listener = _listener(db)
+    for frame in (_post_frame(), _like_frame("l1", LOCAL), _like_frame("l2", REMOTE)):
+        listener.handle_message(frame)
+    db.close()
+    stats = db.writer.stats()
+    assert (stats["records_received"], stats["records_applied"], stats["records_skipped"]) == (2, 1, 1)
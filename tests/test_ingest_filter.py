@@ -0,0 +1,29 @@
+import pytest
+
+from mcpbluesky.ingest_filter import IngestFilter
+
+
+def test_rule_with_several_condition_kinds_is_rejected():
+    with pytest.raises(ValueError, match="langs, keywords"):
+        IngestFilter([{"name": "mixed", "langs": ["ko"], "keywords": ["x"]}])
+
+
+def test_condition_kinds_in_separate_rules_are_ored():
+    f = IngestFilter([{"name": "ko", "langs": ["ko"]}, {"name": "x", "keywords": ["x"]}])
+    assert f.match(None, "x", ["en"]) == "x"
+    assert f.match(None, "y", ["ko"]) == "ko"
+
+
+def test_script_range_with_uppercase_letters():
+    f = IngestFilter([{"name": "upper", "scripts": ["U+0041-U+005A"]}])
+    assert f.match(None, "HELLO", None) == "upper"
+    assert f.match(None, "hello", None) is None
+    assert f.raw_match('{"text":"HELLO"}')
+
+
+def test_keywords_ignore_case_next_to_scripts():
+    f = IngestFilter([{"name": "kw", "keywords": ["Bluesky"]}, {"name": "kana", "scripts": ["hiragana"]}])
+    # 本文の先に現れた方のルールに計上する
+    assert f.match(None, "BLUESKY です", None) == "kw"
+    assert f.match(None, "です bluesky", None) == "kana"
+    assert f.match(None, "nothing", None) is None
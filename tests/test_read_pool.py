@@ -0,0 +1,70 @@
+import random
+import threading
+import time
+
+from mcpbluesky.bluesky_db import BlueskyDB
+
+WORDS = "今日 は いい 天気 です ね 東京 ラーメン 食べた 猫 かわいい 仕事 おはよう 眠い bluesky photo".split()
+
+
+def _posts(start, n):
+    rng = random.Random(start)
+    posts = []
+    for i in range(start, start + n):
+        did = f"did:plc:{rng.randrange(2000):024d}"
+        words = [rng.choice(WORDS) for _ in range(rng.randint(3, 20))]
+        posts.append({
+            "uri": f"at://{did}/app.bsky.feed.post/3k{i:011d}",
+            "cid": f"c{i}",
+            "author_did": did,
+            "text": " ".join(words + [f"topic{i % 100:02d}"]),
+            "created_at": f"2024-11-01T{i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}Z",
+        })
+    return posts
+
+
+def _search_p99(db, n=200):
+    times = []
+    for i in range(n):
+        t0 = time.perf_counter()
+        db.search_posts_page(keyword=f"topic{i % 100:02d}", limit=20)
+        times.append(time.perf_counter() - t0)
+    times.sort()
+    return times[int(n * 0.99) - 1]
+
+
+def test_search_p99_stays_stable_during_ingest(tmp_path):
+    db = BlueskyDB(str(tmp_path / "posts.db"))
+    writer = db.start_writer(batch_size=500, flush_interval=0.05)
+    for post in _posts(0, 10000):
+        writer.submit(post)
+    while writer.inserted < 10000:
+        time.sleep(0.05)
+    idle = _search_p99(db)
+
+    # 同じ検索を、PostWriter が全速で書き込んでいる間にもう一度測る
+    backlog = _posts(10000, 15000)
+    stop = threading.Event()
+
+    def ingest():
+        for post in backlog:
+            if stop.is_set():
+                break
+            writer.submit(post)
+
+    thread = threading.Thread(target=ingest, daemon=True)
+    before = writer.inserted
+    thread.start()
+    try:
+        busy = _search_p99(db)
+        ingested = writer.inserted - before
+        # 測定の最後まで書き込みが続いていたこと
+        pending = writer.queue.qsize()
+    finally:
+        stop.set()
+        thread.join()
+        db.close()
+
+    assert ingested > 0 and pending > 0
+    # 読み取り専用の WAL 接続は書き込みのコミットを待たないので、p99 は取り込みがないときの数倍に収まる
+    assert busy < max(5 * idle, 0.05), (idle, busy, ingested)